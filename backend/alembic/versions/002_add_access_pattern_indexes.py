@@ -0,0 +1,76 @@
+"""Reconcile the event table and add indexes for foreign keys and list endpoint filters
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns) - kept in sync with the model declarations
+INDEXES = [
+    ('ix_thesis_student_id', 'thesis', ['student_id']),
+    ('ix_thesis_supervisor_id', 'thesis', ['supervisor_id']),
+    ('ix_thesiscomment_thesis_id_parent_id', 'thesiscomment', ['thesis_id', 'parent_id']),
+    ('ix_thesisattachment_thesis_id', 'thesisattachment', ['thesis_id']),
+    ('ix_event_user_id_start_time', 'event', ['user_id', 'start_time']),
+    ('ix_deadline_is_active_is_global_deadline_date', 'deadline', ['is_active', 'is_global', 'deadline_date']),
+    ('ix_assistantrequest_assistant_id_status_created_at', 'assistantrequest', ['assistant_id', 'status', 'created_at']),
+    ('ix_thesiscommitteemember_thesis_id_user_id', 'thesiscommitteemember', ['thesis_id', 'user_id']),
+]
+
+
+def upgrade():
+    # Migration 001 created event with a single event_date and an
+    # event_type, while the model has start_time, end_time and is_all_day.
+    # Bring the table in line with the model before indexing start_time.
+    # Tables created by create_all already match and are left alone.
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('event')}
+    if 'event_date' in existing:
+        op.alter_column('event', 'event_date', new_column_name='start_time')
+        op.add_column('event', sa.Column('end_time', sa.DateTime(), nullable=True))
+        op.execute('UPDATE event SET end_time = start_time')
+        op.alter_column('event', 'end_time', nullable=False)
+        op.add_column('event', sa.Column('is_all_day', sa.Boolean(), nullable=True, server_default=sa.false()))
+        op.alter_column('event', 'is_all_day', server_default=None)
+        op.drop_column('event', 'event_type')
+        sa.Enum(name='eventtype').drop(op.get_bind(), checkfirst=True)
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block, and
+    # avoids locking the tables against writes while the indexes build.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+
+    event_type = sa.Enum('defense', 'presentation', 'meeting', 'deadline', name='eventtype')
+    event_type.create(op.get_bind(), checkfirst=True)
+    # Events created since have no type; 001 requires one
+    op.add_column('event', sa.Column('event_type', event_type, nullable=False, server_default='meeting'))
+    op.alter_column('event', 'event_type', server_default=None)
+    op.drop_column('event', 'is_all_day')
+    op.drop_column('event', 'end_time')
+    op.alter_column('event', 'start_time', new_column_name='event_date')
@@ -0,0 +1,133 @@
+"""Store attachment files as content-addressed, deduplicated blobs
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+import hashlib
+import os
+import shutil
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+attachments = sa.table(
+    'thesisattachment',
+    sa.column('id', sa.String),
+    sa.column('file_path', sa.String),
+    sa.column('blob_sha256', sa.String),
+)
+blobs = sa.table(
+    'fileblob',
+    sa.column('sha256', sa.String),
+    sa.column('file_path', sa.String),
+    sa.column('file_size', sa.Integer),
+    sa.column('ref_count', sa.Integer),
+    sa.column('created_at', sa.DateTime),
+)
+
+# The file layout as of this revision, written out here so that later
+# changes to the application do not change what this migration does
+UPLOAD_DIR = Path(os.environ.get('UPLOAD_DIR', '/app/uploads'))
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def blob_path(digest):
+    return f'blobs/{digest[:2]}/{digest}'
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(READ_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def upgrade():
+    op.create_table(
+        'fileblob',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('file_path', sa.String(), nullable=False),
+        sa.Column('file_size', sa.Integer(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('sha256'),
+    )
+    op.add_column('thesisattachment', sa.Column('blob_sha256', sa.String(length=64), nullable=True))
+    op.create_foreign_key(
+        'thesisattachment_blob_sha256_fkey', 'thesisattachment', 'fileblob',
+        ['blob_sha256'], ['sha256'],
+    )
+    op.create_index('ix_thesisattachment_blob_sha256', 'thesisattachment', ['blob_sha256'], unique=False)
+
+    # Hash every attachment file and point its row at the blob for that
+    # content. Files are hard-linked into the blob store and the originals
+    # removed only after all rows are written, so a failure part way leaves
+    # every row pointing at a file that still exists. Rows whose file is
+    # missing keep their path and no blob.
+    conn = op.get_bind()
+    rows = conn.execute(sa.select(attachments.c.id, attachments.c.file_path)).all()
+    refs = Counter()
+    sizes = {}
+    pointers = []
+    for attachment_id, file_path in rows:
+        source = UPLOAD_DIR / file_path
+        if not source.is_file():
+            continue
+        digest = file_digest(source)
+        target = UPLOAD_DIR / blob_path(digest)
+        if not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copy2(source, target)
+        refs[digest] += 1
+        sizes[digest] = source.stat().st_size
+        pointers.append((attachment_id, digest, source))
+
+    if refs:
+        now = datetime.utcnow()
+        op.bulk_insert(blobs, [
+            {'sha256': digest, 'file_path': blob_path(digest), 'file_size': sizes[digest],
+             'ref_count': count, 'created_at': now}
+            for digest, count in refs.items()
+        ])
+    for attachment_id, digest, _ in pointers:
+        conn.execute(
+            attachments.update()
+            .where(attachments.c.id == attachment_id)
+            .values(file_path=blob_path(digest), blob_sha256=digest)
+        )
+
+    # Every duplicate now shares one blob; drop the per-upload copies. After
+    # a downgrade and upgrade the rows already point at their blobs.
+    for _, digest, source in pointers:
+        if source == UPLOAD_DIR / blob_path(digest):
+            continue
+        source.unlink(missing_ok=True)
+        try:
+            source.parent.rmdir()
+        except OSError:
+            pass
+
+
+def downgrade():
+    # Rows keep pointing at the blob files, which stay where they are
+    op.drop_index('ix_thesisattachment_blob_sha256', table_name='thesisattachment')
+    op.drop_constraint('thesisattachment_blob_sha256_fkey', 'thesisattachment', type_='foreignkey')
+    op.drop_column('thesisattachment', 'blob_sha256')
+    op.drop_table('fileblob')
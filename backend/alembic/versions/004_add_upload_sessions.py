@@ -0,0 +1,46 @@
+"""Add resumable upload sessions
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'uploadsession',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('filename', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('file_size', sa.Integer(), nullable=False),
+        sa.Column('chunk_size', sa.Integer(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('thesis_id', sa.String(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['thesis_id'], ['thesis.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_uploadsession_id'), 'uploadsession', ['id'], unique=False)
+    op.create_index(op.f('ix_uploadsession_expires_at'), 'uploadsession', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_uploadsession_thesis_id'), 'uploadsession', ['thesis_id'], unique=False)
+
+
+def downgrade():
+    # Chunks of unfinished sessions stay on disk under uploads/sessions
+    op.drop_index(op.f('ix_uploadsession_thesis_id'), table_name='uploadsession')
+    op.drop_index(op.f('ix_uploadsession_expires_at'), table_name='uploadsession')
+    op.drop_index(op.f('ix_uploadsession_id'), table_name='uploadsession')
+    op.drop_table('uploadsession')
@@ -0,0 +1,43 @@
+"""Add background processing jobs for attachments
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'processingjob',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('attachment_id', sa.String(), nullable=False),
+        sa.Column('status', sa.Enum('pending', 'running', 'done', 'failed', name='jobstatus'), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['attachment_id'], ['thesisattachment.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('attachment_id'),
+    )
+    op.create_index(op.f('ix_processingjob_id'), 'processingjob', ['id'], unique=False)
+    op.create_index('ix_processingjob_status_created_at', 'processingjob', ['status', 'created_at'], unique=False)
+    # Existing attachments are previewed on first view, as before
+
+
+def downgrade():
+    op.drop_index('ix_processingjob_status_created_at', table_name='processingjob')
+    op.drop_index(op.f('ix_processingjob_id'), table_name='processingjob')
+    op.drop_table('processingjob')
+    sa.Enum(name='jobstatus').drop(op.get_bind(), checkfirst=False)
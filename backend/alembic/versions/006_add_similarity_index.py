@@ -0,0 +1,43 @@
+"""Add MinHash similarity index over attachment text
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'similaritysignature',
+        sa.Column('attachment_id', sa.String(), nullable=False),
+        sa.Column('signature', sa.LargeBinary(), nullable=False),
+        sa.Column('shingle_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['attachment_id'], ['thesisattachment.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('attachment_id'),
+    )
+    op.create_table(
+        'similaritybucket',
+        sa.Column('bucket', sa.BigInteger(), nullable=False),
+        sa.Column('attachment_id', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['attachment_id'], ['similaritysignature.attachment_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('bucket', 'attachment_id'),
+    )
+    op.create_index(op.f('ix_similaritybucket_attachment_id'), 'similaritybucket', ['attachment_id'], unique=False)
+    # Index existing attachments with scripts/reindex_attachments.py
+
+
+def downgrade():
+    op.drop_index(op.f('ix_similaritybucket_attachment_id'), table_name='similaritybucket')
+    op.drop_table('similaritybucket')
+    op.drop_table('similaritysignature')
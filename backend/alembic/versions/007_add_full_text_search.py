@@ -0,0 +1,73 @@
+"""Add full-text search over theses and attachment text
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table) - GIN indexes on the search_vector columns
+INDEXES = [
+    ('ix_thesis_search_vector', 'thesis'),
+    ('ix_attachmenttext_search_vector', 'attachmenttext'),
+]
+
+
+def upgrade():
+    # Adding a stored generated column rewrites the thesis table once
+    op.add_column('thesis', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('simple', translate(coalesce(title, ''), '<', ' ')), 'A') || "
+            "setweight(to_tsvector('simple', translate(coalesce(abstract, ''), '<', ' ')), 'B')",
+            persisted=True,
+        ),
+    ))
+    op.create_table(
+        'attachmenttext',
+        sa.Column('attachment_id', sa.String(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed("setweight(to_tsvector('simple', translate(content, '<', ' ')), 'C')", persisted=True),
+        ),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['attachment_id'], ['thesisattachment.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('attachment_id'),
+    )
+    # Built concurrently, like the indexes of 002, so theses stay writable
+    with op.get_context().autocommit_block():
+        for name, table in INDEXES:
+            op.create_index(
+                name, table, ['search_vector'],
+                unique=False,
+                postgresql_using='gin',
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+    # Index the text of existing attachments with scripts/reindex_attachments.py
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    op.drop_table('attachmenttext')
+    op.drop_column('thesis', 'search_vector')
@@ -0,0 +1,48 @@
+"""Add trigram indexes for user search
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+# (index name, column) - trigram GIN indexes on the user table
+INDEXES = [
+    ('ix_user_full_name_trgm', 'full_name'),
+    ('ix_user_email_trgm', 'email'),
+]
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Built concurrently, like the indexes of 002, so sign-ups are not blocked
+    with op.get_context().autocommit_block():
+        for name, column in INDEXES:
+            op.create_index(
+                name, 'user', [column],
+                unique=False,
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    # The extension stays; other objects may have come to depend on it
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name='user',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -3,12 +3,13 @@ from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import ValidationError
 
 from app.db.session import get_db
 from app.core.config import settings
-from app.models.user import User, UserRole
+from app.core.user_cache import Principal, get_principal
+from app.models.user import UserRole
 from app.schemas.user import UserInDB
 
 oauth2_scheme = OAuth2PasswordBearer(
@@ -16,11 +17,11 @@ oauth2_scheme = OAuth2PasswordBearer(
 )
 
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
+async def get_current_user(
+    db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> Principal:
     """
-    Get the current user from the token.
+    Get the current user's id, role and active flag from the token.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -37,7 +38,9 @@ def get_current_user(
     except (JWTError, ValidationError):
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
+    # Lets the session keep this user's reads on the primary after a write
+    db.info["user_id"] = user_id
+    user = await get_principal(db, user_id)
     if user is None:
         raise credentials_exception
     if not user.is_active:
@@ -46,8 +49,8 @@ def get_current_user(
 
 
 def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     """
     Get the current active user.
     """
@@ -57,8 +60,8 @@ def get_current_active_user(
 
 
 def get_current_student(
-    current_user: User = Depends(get_current_active_user),
-) -> User:
+    current_user: Principal = Depends(get_current_active_user),
+) -> Principal:
     """
     Get the current student user.
     """
@@ -70,8 +73,8 @@ def get_current_student(
 
 
 def get_current_professor(
-    current_user: User = Depends(get_current_active_user),
-) -> User:
+    current_user: Principal = Depends(get_current_active_user),
+) -> Principal:
     """
     Get the current professor user.
     """
@@ -83,8 +86,8 @@ def get_current_professor(
 
 
 def get_current_graduation_assistant(
-    current_user: User = Depends(get_current_active_user),
-) -> User:
+    current_user: Principal = Depends(get_current_active_user),
+) -> Principal:
     """
     Get the current graduation assistant user.
     """
@@ -96,8 +99,8 @@ def get_current_graduation_assistant(
 
 
 def get_current_reviewer(
-    current_user: User = Depends(get_current_active_user),
-) -> User:
+    current_user: Principal = Depends(get_current_active_user),
+) -> Principal:
     """
     Get the current reviewer user (professor or graduation assistant).
     """
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, users, theses, comments, committee, events, attachments, requests, reviews, deadlines
+from app.api.v1.endpoints import auth, users, theses, comments, committee, events, attachments, uploads, requests, reviews, deadlines, metrics
 
 # Create main API router
 api_router = APIRouter()
@@ -18,7 +18,9 @@ api_router.include_router(theses.router, prefix="/theses", tags=["theses"])
 api_router.include_router(comments.router, prefix="/theses", tags=["comments"])
 api_router.include_router(committee.router, prefix="/theses", tags=["committee"])
 api_router.include_router(attachments.router, prefix="/theses", tags=["attachments"])
+api_router.include_router(uploads.router, prefix="/theses", tags=["attachments"])
 api_router.include_router(events.router, prefix="/events", tags=["events"])
 api_router.include_router(requests.router, prefix="/assistant", tags=["requests"])
 api_router.include_router(reviews.router, prefix="/theses", tags=["reviews"])
-api_router.include_router(deadlines.router, prefix="/deadlines", tags=["deadlines"]) 
\ No newline at end of file
+api_router.include_router(deadlines.router, prefix="/deadlines", tags=["deadlines"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"]) 
\ No newline at end of file
@@ -1,65 +1,99 @@
-from typing import Any, List
+from typing import Any, List, Optional
 from datetime import datetime
 import uuid
 import os
 
-from fastapi import APIRouter, HTTPException, status, UploadFile, File, Form, Depends
-from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
+from fastapi import APIRouter, HTTPException, Query, Response, status, UploadFile, File, Form, Depends
+from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, update
+from sqlalchemy.orm import selectinload
+from starlette.concurrency import run_in_threadpool
 
 from app.core.deps import DB, CurrentActiveUser
+from app.core.thesis_access import thesis_access_or_404
+from app.core.pagination import paginate, set_next_cursor
 from app.models.thesis import Thesis, ThesisStatus
 from app.models.attachment import ThesisAttachment
+from app.models.processing_job import JobStatus, ProcessingJob
+from app.models.similarity import SimilaritySignature
 from app.models.user import UserRole
 from app.schemas.attachment import (
     Attachment as AttachmentSchema,
     AttachmentCreate,
     AttachmentUpdate,
-    AttachmentDetail
+    AttachmentDetail,
+    PreviewPage,
+    PreviewPages,
 )
+from app.schemas.processing_job import ProcessingJob as ProcessingJobSchema
+from app.schemas.similarity import SimilarityMatch, SimilarityPassage, SimilarityReport
+from app.core.config import settings
+from app.core.blob_store import collect_blobs, release_blob, store_blob
+from app.core.storage import get_storage
+from app.core.file_response import RangedFileResponse
+from app.core.preview_cache import (
+    get_cached_pages,
+    get_cached_preview,
+    html_path,
+    preview_etag,
+    read_meta,
+    read_preview,
+    read_text,
+)
+from app.core.processing import notify_processing, queue_processing
+from app.core.similarity import compare_texts, find_similar
 from app.core.file_utils import (
-    save_upload_file, 
+    guess_mimetype,
     validate_file_type, 
     delete_file, 
-    get_file_path,
     extract_text_from_file,
     convert_to_html,
-    get_file_preview
+    get_file_preview,
+    get_pdf_page_count,
+    get_pdf_pages,
 )
 
 router = APIRouter()
 
+# Most pages returned by one paged preview request
+MAX_PREVIEW_PAGES = 50
+
+# Limits of a similarity report: matches, passages per match, and
+# characters per passage
+MAX_SIMILARITY_MATCHES = 20
+MAX_SIMILARITY_PASSAGES = 10
+MAX_PASSAGE_CHARS = 1000
+
 @router.get("/{thesis_id}/attachments", response_model=List[AttachmentSchema])
 async def read_attachments(
     thesis_id: str,
     db: DB,
     current_user: CurrentActiveUser,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
 ) -> Any:
     """
     Retrieve all attachments for a thesis.
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the next page.
     """
     # Check if thesis exists
-    thesis = db.query(Thesis).filter(Thesis.id == thesis_id).first()
-    if not thesis:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Thesis not found",
-        )
+    thesis = await thesis_access_or_404(db, thesis_id)
     
     # Check permissions - students can only access their own thesis, professors/assistants can access any
-    if (current_user.role == UserRole.student and 
-        current_user.id != thesis.student_id):
+    if not thesis.can_view(current_user):
         raise HTTPException(
             status_code=403,
             detail="Not enough permissions to access this thesis",
         )
     
     # Retrieve attachments
-    attachments = db.query(ThesisAttachment).filter(
-        ThesisAttachment.thesis_id == thesis_id
-    ).offset(skip).limit(limit).all()
+    query = select(ThesisAttachment).where(ThesisAttachment.thesis_id == thesis_id)
+    query = paginate(query, ThesisAttachment.created_at, ThesisAttachment.id, cursor, skip, limit)
+    attachments = (await db.scalars(query)).all()
+    set_next_cursor(response, attachments, "created_at", limit)
     
     return attachments
 
@@ -75,12 +109,7 @@ async def create_attachment(
     Create new attachment for a thesis.
     """
     # Check if thesis exists
-    thesis = db.query(Thesis).filter(Thesis.id == thesis_id).first()
-    if not thesis:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Thesis not found",
-        )
+    thesis = await thesis_access_or_404(db, thesis_id)
     
     # Check permissions (only student who owns the thesis or reviewers can add attachments)
     is_owner = current_user.id == thesis.student_id
@@ -99,9 +128,11 @@ async def create_attachment(
             detail=f"Invalid file type. Allowed types: pdf, doc, docx, txt",
         )
     
-    # Save the file
+    # Store the content, sharing the blob of an identical earlier upload
     try:
-        file_path, file_type, file_size = await save_upload_file(file, thesis_id)
+        file_path, file_size, digest = await store_blob(db, file, settings.MAX_UPLOAD_SIZE)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -114,8 +145,9 @@ async def create_attachment(
         id=attachment_id,
         filename=file.filename,
         file_path=file_path,
-        file_type=file_type,
+        file_type=guess_mimetype(file.filename),
         file_size=file_size,
+        blob_sha256=digest,
         description=description,
         thesis_id=thesis_id,
         uploaded_by=current_user.id,
@@ -124,13 +156,15 @@ async def create_attachment(
     )
     
     db.add(db_attachment)
-    db.commit()
-    db.refresh(db_attachment)
+    # Extract text and render the preview in the background
+    await queue_processing(db, attachment_id)
+    await db.commit()
+    notify_processing()
+    await db.refresh(db_attachment)
     
     # Update thesis updated_at time
-    thesis.updated_at = datetime.utcnow()
-    db.add(thesis)
-    db.commit()
+    await db.execute(update(Thesis).where(Thesis.id == thesis_id).values(updated_at=datetime.utcnow()))
+    await db.commit()
     
     return db_attachment
 
@@ -145,26 +179,22 @@ async def read_attachment(
     Get a specific attachment by ID.
     """
     # Check if thesis exists
-    thesis = db.query(Thesis).filter(Thesis.id == thesis_id).first()
-    if not thesis:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Thesis not found",
-        )
+    thesis = await thesis_access_or_404(db, thesis_id)
     
     # Check permissions - students can only access their own thesis, professors/assistants can access any
-    if (current_user.role == UserRole.student and 
-        current_user.id != thesis.student_id):
+    if not thesis.can_view(current_user):
         raise HTTPException(
             status_code=403,
             detail="Not enough permissions to access this thesis",
         )
     
     # Retrieve attachment
-    attachment = db.query(ThesisAttachment).filter(
-        ThesisAttachment.id == attachment_id, 
-        ThesisAttachment.thesis_id == thesis_id
-    ).first()
+    attachment = await db.scalar(
+        select(ThesisAttachment).where(
+            ThesisAttachment.id == attachment_id, 
+            ThesisAttachment.thesis_id == thesis_id
+        ).options(selectinload(ThesisAttachment.uploader))
+    )
     
     if not attachment:
         raise HTTPException(
@@ -187,26 +217,22 @@ async def download_attachment(
     If inline=true, it will attempt to display in the browser instead of downloading.
     """
     # Check if thesis exists
-    thesis = db.query(Thesis).filter(Thesis.id == thesis_id).first()
-    if not thesis:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Thesis not found",
-        )
+    thesis = await thesis_access_or_404(db, thesis_id)
     
     # Check permissions - students can only access their own thesis, professors/assistants can access any
-    if (current_user.role == UserRole.student and 
-        current_user.id != thesis.student_id):
+    if not thesis.can_view(current_user):
         raise HTTPException(
             status_code=403,
             detail="Not enough permissions to access this thesis",
         )
     
     # Retrieve attachment
-    attachment = db.query(ThesisAttachment).filter(
-        ThesisAttachment.id == attachment_id, 
-        ThesisAttachment.thesis_id == thesis_id
-    ).first()
+    attachment = await db.scalar(
+        select(ThesisAttachment).where(
+            ThesisAttachment.id == attachment_id, 
+            ThesisAttachment.thesis_id == thesis_id
+        )
+    )
     
     if not attachment:
         raise HTTPException(
@@ -214,24 +240,25 @@ async def download_attachment(
             detail="Attachment not found",
         )
     
-    # Get the file path
-    file_path = get_file_path(attachment.file_path)
+    # Streamed from local storage, or a redirect to a presigned URL so the
+    # bytes do not pass through the API
+    response = await get_storage().download_response(
+        attachment.file_path,
+        media_type=attachment.file_type,
+        filename=attachment.filename,
+        inline=inline,
+        # Revalidated on every use; the content hash makes that a cheap 304
+        cache_control="private, no-cache",
+        etag=attachment.blob_sha256,
+    )
     
-    if not file_path.exists():
+    if response is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found on server",
         )
     
-    # Set disposition based on inline parameter
-    content_disposition = "inline" if inline else "attachment"
-    
-    return FileResponse(
-        path=file_path, 
-        filename=attachment.filename,
-        media_type=attachment.file_type,
-        headers={"Content-Disposition": f"{content_disposition}; filename={attachment.filename}"}
-    )
+    return response
 
 @router.get("/{thesis_id}/attachments/{attachment_id}/preview", response_class=JSONResponse)
 async def preview_attachment(
@@ -247,28 +274,25 @@ async def preview_attachment(
     - json: Full preview data including HTML and text content (default)
     - html: HTML-only response for direct embedding
     - text: Plain text content for simple display
+    PDFs are not inlined; their text is available page by page from /pages.
     """
     # Check if thesis exists
-    thesis = db.query(Thesis).filter(Thesis.id == thesis_id).first()
-    if not thesis:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Thesis not found",
-        )
+    thesis = await thesis_access_or_404(db, thesis_id)
     
     # Check permissions - students can only access their own thesis, professors/assistants can access any
-    if (current_user.role == UserRole.student and 
-        current_user.id != thesis.student_id):
+    if not thesis.can_view(current_user):
         raise HTTPException(
             status_code=403,
             detail="Not enough permissions to access this thesis",
         )
     
     # Retrieve attachment
-    attachment = db.query(ThesisAttachment).filter(
-        ThesisAttachment.id == attachment_id, 
-        ThesisAttachment.thesis_id == thesis_id
-    ).first()
+    attachment = await db.scalar(
+        select(ThesisAttachment).where(
+            ThesisAttachment.id == attachment_id, 
+            ThesisAttachment.thesis_id == thesis_id
+        )
+    )
     
     if not attachment:
         raise HTTPException(
@@ -276,17 +300,42 @@ async def preview_attachment(
             detail="Attachment not found",
         )
     
-    # Get the file path
-    file_path = get_file_path(attachment.file_path)
-    
-    if not file_path.exists():
+    # Previews are rendered once per content and file type and then served
+    # from the cache. Blob paths carry no extension; the type comes from the
+    # uploaded name
+    entry = None
+    try:
+        if attachment.blob_sha256:
+            entry = await get_cached_preview(attachment.blob_sha256, attachment.file_path, attachment.filename)
+        else:
+            async with get_storage().local_copy(attachment.file_path) as file_path:
+                preview_data = await get_file_preview(file_path, attachment.filename)
+    except FileNotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found on server",
         )
     
-    # Generate preview data
-    preview_data = await get_file_preview(file_path)
+    if entry is not None:
+        # Only read the parts of the entry the format needs
+        if format == "html" and html_path(entry):
+            return RangedFileResponse(
+                html_path(entry),
+                media_type="text/html; charset=utf-8",
+                headers={"Cache-Control": "private, no-cache"},
+                etag=preview_etag(entry),
+            )
+        if format == "text":
+            content = await run_in_threadpool(read_text, entry)
+            if content:
+                return JSONResponse(content={"content": content}, status_code=200)
+        preview_data = await run_in_threadpool(read_preview, entry)
+    
+    if preview_data.get("content_type") == "pdf":
+        # Point the viewer at the download, which serves Range requests, so
+        # it fetches only what it shows instead of the whole file up front
+        download_url = f"{settings.API_V1_STR}/theses/{thesis_id}/attachments/{attachment_id}/download?inline=true"
+        preview_data["html"] = f'<object data="{download_url}" type="application/pdf" width="100%" height="600px"></object>'
     
     # Add metadata to the response
     preview_data["filename"] = attachment.filename
@@ -302,6 +351,214 @@ async def preview_attachment(
         # Default to JSON with all data
         return JSONResponse(content=jsonable_encoder(preview_data), status_code=200)
 
+@router.get("/{thesis_id}/attachments/{attachment_id}/pages", response_model=PreviewPages)
+async def read_attachment_pages(
+    thesis_id: str,
+    attachment_id: str,
+    db: DB,
+    current_user: CurrentActiveUser,
+    start: int = Query(1, ge=1),
+    count: int = Query(10, ge=1, le=MAX_PREVIEW_PAGES),
+) -> Any:
+    """
+    Get the page count and the text of up to count pages of a PDF attachment,
+    from page start (numbered from 1). Each page is extracted the first time
+    it is requested and cached.
+    """
+    # Check if thesis exists
+    thesis = await thesis_access_or_404(db, thesis_id)
+    
+    # Check permissions - students can only access their own thesis, professors/assistants can access any
+    if not thesis.can_view(current_user):
+        raise HTTPException(
+            status_code=403,
+            detail="Not enough permissions to access this thesis",
+        )
+    
+    # Retrieve attachment
+    attachment = await db.scalar(
+        select(ThesisAttachment).where(
+            ThesisAttachment.id == attachment_id, 
+            ThesisAttachment.thesis_id == thesis_id
+        )
+    )
+    
+    if not attachment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attachment not found",
+        )
+    
+    if guess_mimetype(attachment.filename) != "application/pdf":
+        raise HTTPException(
+            status_code=400,
+            detail="Paged preview is only available for PDF files",
+        )
+    
+    try:
+        if attachment.blob_sha256:
+            entry = await get_cached_preview(attachment.blob_sha256, attachment.file_path, attachment.filename)
+            page_count = (await run_in_threadpool(read_meta, entry)).get("page_count")
+            numbers = range(start, min(start + count - 1, page_count or 0) + 1)
+            pages = await get_cached_pages(entry, attachment.file_path, numbers)
+        else:
+            async with get_storage().local_copy(attachment.file_path) as file_path:
+                page_count = await get_pdf_page_count(file_path)
+                numbers = range(start, min(start + count - 1, page_count or 0) + 1)
+                pages = await get_pdf_pages(file_path, list(numbers))
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found on server",
+        )
+    
+    if page_count is None:
+        raise HTTPException(
+            status_code=422,
+            detail="The file could not be read as a PDF",
+        )
+    
+    return PreviewPages(
+        page_count=page_count,
+        pages=[PreviewPage(number=number, text=pages[number]) for number in numbers],
+    )
+
+@router.get("/{thesis_id}/attachments/{attachment_id}/processing", response_model=ProcessingJobSchema)
+async def read_attachment_processing(
+    thesis_id: str,
+    attachment_id: str,
+    db: DB,
+    current_user: CurrentActiveUser,
+) -> Any:
+    """
+    Get the status of the background text extraction and HTML conversion
+    of an attachment. Poll until it is done (the preview is then served
+    from the cache) or failed.
+    """
+    # Check if thesis exists
+    thesis = await thesis_access_or_404(db, thesis_id)
+    
+    # Check permissions - students can only access their own thesis, professors/assistants can access any
+    if not thesis.can_view(current_user):
+        raise HTTPException(
+            status_code=403,
+            detail="Not enough permissions to access this thesis",
+        )
+    
+    job = await db.scalar(
+        select(ProcessingJob)
+        .join(ThesisAttachment, ThesisAttachment.id == ProcessingJob.attachment_id)
+        .where(
+            ProcessingJob.attachment_id == attachment_id,
+            ThesisAttachment.thesis_id == thesis_id
+        )
+    )
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No processing job for this attachment",
+        )
+    
+    return job
+
+@router.get("/{thesis_id}/attachments/{attachment_id}/similarity", response_model=SimilarityReport)
+async def read_attachment_similarity(
+    thesis_id: str,
+    attachment_id: str,
+    db: DB,
+    current_user: CurrentActiveUser,
+    limit: int = Query(5, ge=1, le=MAX_SIMILARITY_MATCHES),
+    min_overlap: float = Query(0.01, ge=0, le=1),
+) -> Any:
+    """
+    Check an attachment's text against the attachments of all other theses.
+    Returns up to limit attachments sharing at least min_overlap of its
+    text, most overlapping first, with the passages they share. Candidates
+    come from the similarity index, filled in by background processing.
+    """
+    # Reports quote other students' work
+    if current_user.role not in [UserRole.professor, UserRole.graduation_assistant]:
+        raise HTTPException(
+            status_code=403,
+            detail="Only professors and graduation assistants can view similarity reports",
+        )
+    
+    # Check if thesis exists
+    await thesis_access_or_404(db, thesis_id)
+    
+    # Retrieve attachment
+    attachment = await db.scalar(
+        select(ThesisAttachment).where(
+            ThesisAttachment.id == attachment_id, 
+            ThesisAttachment.thesis_id == thesis_id
+        )
+    )
+    
+    if not attachment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attachment not found",
+        )
+    
+    if not attachment.blob_sha256:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found on server",
+        )
+    
+    signature = await db.get(SimilaritySignature, attachment.id)
+    if signature is None:
+        job = await db.scalar(select(ProcessingJob).where(ProcessingJob.attachment_id == attachment.id))
+        # Uploaded before the index existed: process it again
+        if job is None or job.status == JobStatus.done:
+            await queue_processing(db, attachment.id)
+            await db.commit()
+            notify_processing()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Attachment text is not indexed yet. Retry once its processing is done",
+        )
+    
+    matches = await find_similar(db, attachment, limit)
+    # Release the database connection while the texts are compared
+    await db.commit()
+    
+    try:
+        comparisons = await compare_texts(
+            attachment,
+            [match["attachment"] for match in matches],
+            MAX_SIMILARITY_PASSAGES,
+            MAX_PASSAGE_CHARS,
+        )
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found on server",
+        )
+    
+    results = []
+    for match, comparison in zip(matches, comparisons):
+        if comparison is None or comparison["overlap"] < min_overlap:
+            continue
+        other = match["attachment"]
+        results.append(SimilarityMatch(
+            attachment_id=other.id,
+            filename=other.filename,
+            thesis_id=other.thesis_id,
+            thesis_title=match["thesis_title"],
+            similarity=match["similarity"],
+            overlap=comparison["overlap"],
+            passages=[SimilarityPassage(**passage) for passage in comparison["passages"]],
+        ))
+    results.sort(key=lambda result: result.overlap, reverse=True)
+    
+    return SimilarityReport(
+        attachment_id=attachment.id,
+        shingle_count=signature.shingle_count,
+        matches=results,
+    )
+
 @router.put("/{thesis_id}/attachments/{attachment_id}", response_model=AttachmentSchema)
 async def update_attachment(
     thesis_id: str,
@@ -314,18 +571,15 @@ async def update_attachment(
     Update an attachment metadata (not the file itself).
     """
     # Check if thesis exists
-    thesis = db.query(Thesis).filter(Thesis.id == thesis_id).first()
-    if not thesis:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Thesis not found",
-        )
+    thesis = await thesis_access_or_404(db, thesis_id)
     
     # Get the attachment
-    attachment = db.query(ThesisAttachment).filter(
-        ThesisAttachment.id == attachment_id,
-        ThesisAttachment.thesis_id == thesis_id
-    ).first()
+    attachment = await db.scalar(
+        select(ThesisAttachment).where(
+            ThesisAttachment.id == attachment_id,
+            ThesisAttachment.thesis_id == thesis_id
+        )
+    )
     
     if not attachment:
         raise HTTPException(
@@ -352,8 +606,8 @@ async def update_attachment(
     attachment.updated_at = datetime.utcnow()
     
     db.add(attachment)
-    db.commit()
-    db.refresh(attachment)
+    await db.commit()
+    await db.refresh(attachment)
     
     return attachment
 
@@ -368,18 +622,15 @@ async def delete_attachment(
     Delete an attachment.
     """
     # Check if thesis exists
-    thesis = db.query(Thesis).filter(Thesis.id == thesis_id).first()
-    if not thesis:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Thesis not found",
-        )
+    thesis = await thesis_access_or_404(db, thesis_id)
     
     # Get the attachment
-    attachment = db.query(ThesisAttachment).filter(
-        ThesisAttachment.id == attachment_id,
-        ThesisAttachment.thesis_id == thesis_id
-    ).first()
+    attachment = await db.scalar(
+        select(ThesisAttachment).where(
+            ThesisAttachment.id == attachment_id,
+            ThesisAttachment.thesis_id == thesis_id
+        )
+    )
     
     if not attachment:
         raise HTTPException(
@@ -398,15 +649,19 @@ async def delete_attachment(
             detail="Not enough permissions to delete this attachment",
         )
     
-    # Delete the file from filesystem
-    if not delete_file(attachment.file_path):
+    # Delete the DB record
+    await db.delete(attachment)
+    unreferenced = None
+    if attachment.blob_sha256:
+        # The file goes only once no other attachment shares its blob
+        unreferenced = await release_blob(db, attachment.blob_sha256)
+    elif not await delete_file(attachment.file_path):
         # Continue even if file deletion fails, as we still want to remove the DB record
         # But log the error
         print(f"Error: Could not delete file {attachment.file_path}")
-    
-    # Delete the DB record
-    db.delete(attachment)
-    db.commit()
+    await db.commit()
+    if unreferenced:
+        await collect_blobs([unreferenced])
     
     return None
 
@@ -422,18 +677,15 @@ async def replace_attachment(
     Replace an existing attachment with a new file.
     """
     # Check if thesis exists
-    thesis = db.query(Thesis).filter(Thesis.id == thesis_id).first()
-    if not thesis:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Thesis not found",
-        )
+    thesis = await thesis_access_or_404(db, thesis_id)
     
     # Get the attachment
-    attachment = db.query(ThesisAttachment).filter(
-        ThesisAttachment.id == attachment_id,
-        ThesisAttachment.thesis_id == thesis_id
-    ).first()
+    attachment = await db.scalar(
+        select(ThesisAttachment).where(
+            ThesisAttachment.id == attachment_id,
+            ThesisAttachment.thesis_id == thesis_id
+        )
+    )
     
     if not attachment:
         raise HTTPException(
@@ -458,12 +710,15 @@ async def replace_attachment(
             detail=f"Invalid file type. Allowed types: pdf, doc, docx, txt",
         )
     
-    # Save the old file path for deletion
+    # Save the old file for release
     old_file_path = attachment.file_path
+    old_digest = attachment.blob_sha256
     
-    # Save the new file
+    # Store the new content
     try:
-        file_path, file_type, file_size = await save_upload_file(file, thesis_id)
+        file_path, file_size, digest = await store_blob(db, file, settings.MAX_UPLOAD_SIZE)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -473,20 +728,28 @@ async def replace_attachment(
     # Update the attachment record
     attachment.filename = file.filename
     attachment.file_path = file_path
-    attachment.file_type = file_type
+    attachment.file_type = guess_mimetype(file.filename)
     attachment.file_size = file_size
+    attachment.blob_sha256 = digest
     attachment.updated_at = datetime.utcnow()
     
     db.add(attachment)
-    db.commit()
-    db.refresh(attachment)
-    
-    # Delete the old file
-    delete_file(old_file_path)  # We don't raise an exception if this fails
+    unreferenced = None
+    if old_digest:
+        unreferenced = await release_blob(db, old_digest)
+    await queue_processing(db, attachment.id)
+    await db.commit()
+    notify_processing()
+    if unreferenced:
+        await collect_blobs([unreferenced])
+    await db.refresh(attachment)
+    
+    if not old_digest:
+        # Delete the old file
+        await delete_file(old_file_path)  # We don't raise an exception if this fails
     
     # Update thesis updated_at time
-    thesis.updated_at = datetime.utcnow()
-    db.add(thesis)
-    db.commit()
+    await db.execute(update(Thesis).where(Thesis.id == thesis_id).values(updated_at=datetime.utcnow()))
+    await db.commit()
     
     return attachment 
\ No newline at end of file
@@ -5,12 +5,12 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import OAuth2PasswordRequestForm
 import uuid
 import httpx
-from authlib.jose import jwt
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 
 from app.core.deps import DB
 from app.core.config import settings
+from app.core.google_tokens import InvalidIdToken, verify_google_id_token
 from app.core.security import create_access_token, get_password_hash, verify_password
 from app.models.user import User, UserRole
 from app.schemas.user import User as UserSchema, UserCreate, GoogleAuthRequest
@@ -26,7 +26,7 @@ async def register_user(
     Register a new user.
     """
     # Check if user already exists
-    user = db.query(User).filter(User.email == user_in.email).first()
+    user = await db.scalar(select(User).where(User.email == user_in.email))
     if user:
         raise HTTPException(
             status_code=400,
@@ -40,12 +40,12 @@ async def register_user(
         email=user_in.email,
         full_name=user_in.full_name,
         role=user_in.role,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=await get_password_hash(user_in.password),
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     return new_user
 
@@ -58,8 +58,8 @@ async def login(
     OAuth2 compatible token login, get an access token for future requests.
     """
     # Authenticate user
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await db.scalar(select(User).where(User.email == form_data.username))
+    if not user or not await verify_password(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -102,26 +102,14 @@ async def google_auth(
         )
     
     try:
-        # Verify the Google token
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"https://www.googleapis.com/oauth2/v3/tokeninfo?id_token={auth_request.token}"
-            )
-            
-        if response.status_code != 200:
+        # Verify the Google ID token locally against Google's signing keys
+        try:
+            google_user_info = await verify_google_id_token(auth_request.token)
+        except InvalidIdToken:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid Google token"
             )
-            
-        google_user_info = response.json()
-        
-        # Verify the audience (client ID)
-        if google_user_info.get("aud") != settings.GOOGLE_CLIENT_ID:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token audience"
-            )
         
         email = google_user_info.get("email")
         full_name = google_user_info.get("name", email)
@@ -134,10 +122,10 @@ async def google_auth(
             )
         
         # Check if user already exists
-        user = db.query(User).filter(
+        user = await db.scalar(select(User).where(
             (User.email == email) | 
             ((User.oauth_provider == "google") & (User.oauth_id == google_id))
-        ).first()
+        ))
         
         is_new_user = user is None
         
@@ -147,7 +135,7 @@ async def google_auth(
                 user.oauth_provider = "google"
                 user.oauth_id = google_id
                 user.is_verified = True
-                db.commit()
+                await db.commit()
         else:
             # Create new user
             user_id = str(uuid.uuid4())
@@ -162,8 +150,8 @@ async def google_auth(
                 hashed_password=None,  # No password for OAuth users
             )
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
         
         if not user.is_active:
             raise HTTPException(
@@ -187,7 +175,9 @@ async def google_auth(
             "is_new_user": is_new_user
         }
         
-    except httpx.RequestError:
+    except HTTPException:
+        raise
+    except httpx.HTTPError:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to verify Google token"
@@ -1,12 +1,15 @@
-from typing import Any, List
+from typing import Any, List, Optional
 from datetime import datetime
 import uuid
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Response, status
 
+from app.core.comment_tree import load_comment_threads
 from app.core.deps import DB, CurrentActiveUser
+from app.core.thesis_access import thesis_access_or_404
+from app.core.pagination import set_next_cursor
 from app.models.comment import ThesisComment
-from app.models.thesis import Thesis, ThesisStatus
+from app.models.thesis import ThesisStatus
 from app.models.user import UserRole
 from app.schemas.comment import (
     Comment as CommentSchema,
@@ -22,33 +25,32 @@ async def read_thesis_comments(
     thesis_id: str,
     current_user: CurrentActiveUser,
     db: DB,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    max_depth: Optional[int] = Query(None, ge=0, description="Levels of replies to include"),
 ) -> Any:
     """
-    Retrieve comments for a specific thesis.
+    Retrieve comment threads for a specific thesis.
+    Pagination applies to top-level comments; each comes with its nested replies.
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the next page.
     """
     # Check if thesis exists
-    thesis = db.query(Thesis).filter(Thesis.id == thesis_id).first()
-    if not thesis:
-        raise HTTPException(
-            status_code=404,
-            detail="Thesis not found",
-        )
+    thesis = await thesis_access_or_404(db, thesis_id)
     
     # Check permissions (students can only view comments on their own theses)
-    if (current_user.role == UserRole.student and 
-        current_user.id != thesis.student_id):
+    if not thesis.can_view(current_user):
         raise HTTPException(
             status_code=403,
             detail="Not enough permissions to view comments on this thesis",
         )
     
-    # Get top-level comments (those without a parent)
-    comments = db.query(ThesisComment).filter(
-        ThesisComment.thesis_id == thesis_id,
-        ThesisComment.parent_id == None
-    ).offset(skip).limit(limit).all()
+    # Get top-level comments (those without a parent) with their reply trees
+    comments = await load_comment_threads(
+        db, thesis_id, cursor=cursor, skip=skip, limit=limit, max_depth=max_depth
+    )
+    set_next_cursor(response, comments, "created_at", limit)
     
     return comments
 
@@ -63,12 +65,7 @@ async def create_thesis_comment(
     Create a new comment on a thesis.
     """
     # Check if thesis exists
-    thesis = db.query(Thesis).filter(Thesis.id == thesis_id).first()
-    if not thesis:
-        raise HTTPException(
-            status_code=404,
-            detail="Thesis not found",
-        )
+    thesis = await thesis_access_or_404(db, thesis_id)
     
     # Check if thesis status allows comments
     if thesis.status == ThesisStatus.draft:
@@ -81,9 +78,7 @@ async def create_thesis_comment(
     
     # Check if parent comment exists if provided
     if comment_in.parent_id:
-        parent_comment = db.query(ThesisComment).filter(
-            ThesisComment.id == comment_in.parent_id
-        ).first()
+        parent_comment = await db.get(ThesisComment, comment_in.parent_id)
         if not parent_comment:
             raise HTTPException(
                 status_code=404,
@@ -111,8 +106,8 @@ async def create_thesis_comment(
     )
     
     db.add(db_comment)
-    db.commit()
-    db.refresh(db_comment)
+    await db.commit()
+    await db.refresh(db_comment)
     
     return db_comment
 
@@ -127,7 +122,7 @@ async def update_comment(
     Update a comment.
     """
     # Get the comment
-    comment = db.query(ThesisComment).filter(ThesisComment.id == comment_id).first()
+    comment = await db.get(ThesisComment, comment_id)
     if not comment:
         raise HTTPException(
             status_code=404,
@@ -154,8 +149,8 @@ async def update_comment(
     comment.updated_at = datetime.utcnow()
     
     db.add(comment)
-    db.commit()
-    db.refresh(comment)
+    await db.commit()
+    await db.refresh(comment)
     
     return comment
 
@@ -169,7 +164,7 @@ async def delete_comment(
     Delete a comment.
     """
     # Get the comment
-    comment = db.query(ThesisComment).filter(ThesisComment.id == comment_id).first()
+    comment = await db.get(ThesisComment, comment_id)
     if not comment:
         raise HTTPException(
             status_code=404,
@@ -185,7 +180,7 @@ async def delete_comment(
                 detail="Not enough permissions to delete this comment",
             )
     
-    db.delete(comment)
-    db.commit()
+    await db.delete(comment)
+    await db.commit()
     
     return None 
\ No newline at end of file
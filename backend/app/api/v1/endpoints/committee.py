@@ -3,8 +3,11 @@ from datetime import datetime
 import uuid
 
 from fastapi import APIRouter, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
 
 from app.core.deps import DB, CurrentActiveUser
+from app.core.thesis_access import thesis_access_or_404
 from app.models.committee import ThesisCommitteeMember, CommitteeMemberRole
 from app.models.thesis import Thesis
 from app.models.user import User, UserRole
@@ -27,24 +30,24 @@ async def read_thesis_committee(
     Retrieve committee members for a specific thesis.
     """
     # Check if thesis exists
-    thesis = db.query(Thesis).filter(Thesis.id == thesis_id).first()
-    if not thesis:
-        raise HTTPException(
-            status_code=404,
-            detail="Thesis not found",
-        )
+    thesis = await thesis_access_or_404(db, thesis_id)
     
     # Check permissions (students can only view committee for their own theses)
-    if (current_user.role == UserRole.student and 
-        current_user.id != thesis.student_id):
+    if not thesis.can_view(current_user):
         raise HTTPException(
             status_code=403,
             detail="Not enough permissions to view committee for this thesis",
         )
     
-    committee_members = db.query(ThesisCommitteeMember).filter(
-        ThesisCommitteeMember.thesis_id == thesis_id
-    ).all()
+    committee_members = (await db.scalars(
+        select(ThesisCommitteeMember).where(
+            ThesisCommitteeMember.thesis_id == thesis_id
+        ).options(
+            selectinload(ThesisCommitteeMember.user),
+            # ThesisSimple needs three columns, not the abstract
+            selectinload(ThesisCommitteeMember.thesis).load_only(Thesis.id, Thesis.title, Thesis.status),
+        )
+    )).all()
     
     return committee_members
 
@@ -59,12 +62,7 @@ async def add_committee_member(
     Add a committee member to a thesis.
     """
     # Check if thesis exists
-    thesis = db.query(Thesis).filter(Thesis.id == thesis_id).first()
-    if not thesis:
-        raise HTTPException(
-            status_code=404,
-            detail="Thesis not found",
-        )
+    thesis = await thesis_access_or_404(db, thesis_id)
     
     # Check permissions (only professors or the supervisor can manage committee)
     if (current_user.role != UserRole.professor and 
@@ -75,7 +73,7 @@ async def add_committee_member(
         )
     
     # Check if user exists and is eligible (must be a professor or grad assistant)
-    user = db.query(User).filter(User.id == member_in.user_id).first()
+    user = await db.get(User, member_in.user_id)
     if not user:
         raise HTTPException(
             status_code=404,
@@ -89,10 +87,12 @@ async def add_committee_member(
         )
     
     # Check if user is already a committee member for this thesis
-    existing_member = db.query(ThesisCommitteeMember).filter(
-        ThesisCommitteeMember.thesis_id == thesis_id,
-        ThesisCommitteeMember.user_id == member_in.user_id
-    ).first()
+    existing_member = await db.scalar(
+        select(ThesisCommitteeMember).where(
+            ThesisCommitteeMember.thesis_id == thesis_id,
+            ThesisCommitteeMember.user_id == member_in.user_id
+        )
+    )
     
     if existing_member:
         raise HTTPException(
@@ -114,8 +114,8 @@ async def add_committee_member(
     )
     
     db.add(db_member)
-    db.commit()
-    db.refresh(db_member)
+    await db.commit()
+    await db.refresh(db_member)
     
     return db_member
 
@@ -130,9 +130,7 @@ async def update_committee_member(
     Update a committee member's information.
     """
     # Get the committee member
-    member = db.query(ThesisCommitteeMember).filter(
-        ThesisCommitteeMember.id == member_id
-    ).first()
+    member = await db.get(ThesisCommitteeMember, member_id)
     
     if not member:
         raise HTTPException(
@@ -141,12 +139,7 @@ async def update_committee_member(
         )
     
     # Get the thesis
-    thesis = db.query(Thesis).filter(Thesis.id == member.thesis_id).first()
-    if not thesis:
-        raise HTTPException(
-            status_code=404,
-            detail="Thesis not found",
-        )
+    thesis = await thesis_access_or_404(db, member.thesis_id)
     
     # Check permissions
     is_supervisor = current_user.id == thesis.supervisor_id
@@ -181,8 +174,8 @@ async def update_committee_member(
     member.updated_at = datetime.utcnow()
     
     db.add(member)
-    db.commit()
-    db.refresh(member)
+    await db.commit()
+    await db.refresh(member)
     
     return member
 
@@ -196,9 +189,7 @@ async def remove_committee_member(
     Remove a committee member from a thesis.
     """
     # Get the committee member
-    member = db.query(ThesisCommitteeMember).filter(
-        ThesisCommitteeMember.id == member_id
-    ).first()
+    member = await db.get(ThesisCommitteeMember, member_id)
     
     if not member:
         raise HTTPException(
@@ -207,12 +198,7 @@ async def remove_committee_member(
         )
     
     # Get the thesis
-    thesis = db.query(Thesis).filter(Thesis.id == member.thesis_id).first()
-    if not thesis:
-        raise HTTPException(
-            status_code=404,
-            detail="Thesis not found",
-        )
+    thesis = await thesis_access_or_404(db, member.thesis_id)
     
     # Check permissions (only supervisors can remove committee members)
     if current_user.id != thesis.supervisor_id:
@@ -222,7 +208,7 @@ async def remove_committee_member(
                 detail="Only the thesis supervisor can remove committee members",
             )
     
-    db.delete(member)
-    db.commit()
+    await db.delete(member)
+    await db.commit()
     
     return None 
\ No newline at end of file
@@ -1,10 +1,12 @@
-from typing import Any, List
+from typing import Any, List, Optional
 from datetime import datetime, timedelta, timezone
 
-from fastapi import APIRouter, HTTPException, status, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Response, status, Depends
+from sqlalchemy import select
 
 from app.core.deps import DB, CurrentActiveUser
+from app.core.pagination import paginate, set_next_cursor
+from app.db.base_class import naive_utc
 from app.models.deadline import Deadline, DeadlineType
 from app.models.user import UserRole
 from app.schemas.deadline import (
@@ -21,28 +23,33 @@ router = APIRouter()
 async def read_deadlines(
     db: DB,
     current_user: CurrentActiveUser,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     deadline_type: DeadlineType = None,
     active_only: bool = True,
 ) -> Any:
     """
     Retrieve deadlines. Students see all active global deadlines.
     Professors and assistants see all deadlines.
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the next page.
     """
-    query = db.query(Deadline)
+    query = select(Deadline)
     
     # Students can only see active global deadlines
     if current_user.role == UserRole.student:
-        query = query.filter(Deadline.is_active == True, Deadline.is_global == True)
+        query = query.where(Deadline.is_active == True, Deadline.is_global == True)
     elif active_only:
-        query = query.filter(Deadline.is_active == True)
+        query = query.where(Deadline.is_active == True)
     
     # Filter by deadline type if specified
     if deadline_type:
-        query = query.filter(Deadline.deadline_type == deadline_type)
+        query = query.where(Deadline.deadline_type == deadline_type)
     
-    deadlines = query.order_by(Deadline.deadline_date.asc()).offset(skip).limit(limit).all()
+    query = paginate(query, Deadline.deadline_date, Deadline.id, cursor, skip, limit)
+    deadlines = (await db.scalars(query)).all()
+    set_next_cursor(response, deadlines, "deadline_date", limit)
     
     # Add computed fields
     now = datetime.utcnow()
@@ -146,17 +153,17 @@ async def create_deadline(
         db.add(review_deadline)
         
         # Commit all deadlines
-        db.commit()
+        await db.commit()
         
         # Refresh all objects
-        db.refresh(defense_deadline)
-        db.refresh(submission_deadline) 
-        db.refresh(review_deadline)
+        await db.refresh(defense_deadline)
+        await db.refresh(submission_deadline) 
+        await db.refresh(review_deadline)
         
         created_deadlines = [defense_deadline, submission_deadline, review_deadline]
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"Failed to create deadlines: {str(e)}",
@@ -174,7 +181,7 @@ async def read_deadline(
     """
     Get a specific deadline by ID.
     """
-    deadline = db.query(Deadline).filter(Deadline.id == deadline_id).first()
+    deadline = await db.get(Deadline, deadline_id)
     if not deadline:
         raise HTTPException(
             status_code=404,
@@ -219,7 +226,7 @@ async def update_deadline(
             detail="Only professors and graduation assistants can update deadlines",
         )
     
-    deadline = db.query(Deadline).filter(Deadline.id == deadline_id).first()
+    deadline = await db.get(Deadline, deadline_id)
     if not deadline:
         raise HTTPException(
             status_code=404,
@@ -241,8 +248,8 @@ async def update_deadline(
     deadline.updated_at = datetime.utcnow()
     
     db.add(deadline)
-    db.commit()
-    db.refresh(deadline)
+    await db.commit()
+    await db.refresh(deadline)
     
     return deadline
 
@@ -263,15 +270,15 @@ async def delete_deadline(
             detail="Only professors and graduation assistants can delete deadlines",
         )
     
-    deadline = db.query(Deadline).filter(Deadline.id == deadline_id).first()
+    deadline = await db.get(Deadline, deadline_id)
     if not deadline:
         raise HTTPException(
             status_code=404,
             detail="Deadline not found",
         )
     
-    db.delete(deadline)
-    db.commit()
+    await db.delete(deadline)
+    await db.commit()
     
     return None
 
@@ -288,24 +295,24 @@ async def get_upcoming_deadlines(
     now = datetime.now(timezone.utc)
     end_date = now + timedelta(days=days_ahead)
     
-    query = db.query(Deadline).filter(
-        Deadline.deadline_date >= now,
-        Deadline.deadline_date <= end_date,
+    query = select(Deadline).where(
+        Deadline.deadline_date >= naive_utc(now),
+        Deadline.deadline_date <= naive_utc(end_date),
         Deadline.is_active == True
     )
     
     # Role-based filtering
     if current_user.role == UserRole.student:
         # Students see submission and defense deadlines (global only)
-        query = query.filter(
+        query = query.where(
             Deadline.is_global == True,
             Deadline.deadline_type.in_(['submission', 'defense'])
         )
     elif current_user.role in [UserRole.professor, UserRole.graduation_assistant]:
         # Professors and assistants see all active global deadlines
-        query = query.filter(Deadline.is_global == True)
+        query = query.where(Deadline.is_global == True)
     
-    deadlines = query.order_by(Deadline.deadline_date.asc()).all()
+    deadlines = (await db.scalars(query.order_by(Deadline.deadline_date.asc()))).all()
     
     # Add computed fields
     result = []
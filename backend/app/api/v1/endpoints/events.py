@@ -1,10 +1,15 @@
-from typing import Any, List
+from typing import Any, List, Optional
 from datetime import datetime, timedelta
 import uuid
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Response, status
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
 
 from app.core.deps import DB, CurrentActiveUser
+from app.core.thesis_access import thesis_access_or_404
+from app.core.pagination import paginate, set_next_cursor
+from app.db.base_class import naive_utc
 from app.models.event import Event
 from app.models.thesis import Thesis
 from app.models.user import UserRole
@@ -21,28 +26,30 @@ router = APIRouter()
 async def read_events(
     current_user: CurrentActiveUser,
     db: DB,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     start_date: datetime = None,
     end_date: datetime = None,
 ) -> Any:
     """
     Retrieve events for the current user.
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the next page.
     """
     # Base query - get user's events
-    query = db.query(Event).filter(Event.user_id == current_user.id)
+    query = select(Event).where(Event.user_id == current_user.id)
     
     # Filter by date range if provided
     if start_date:
-        query = query.filter(Event.end_time >= start_date)
+        query = query.where(Event.end_time >= naive_utc(start_date))
     if end_date:
-        query = query.filter(Event.start_time <= end_date)
+        query = query.where(Event.start_time <= naive_utc(end_date))
     
-    # Order by start time
-    query = query.order_by(Event.start_time)
-    
-    # Apply pagination
-    events = query.offset(skip).limit(limit).all()
+    # Order by start time and apply pagination
+    query = paginate(query, Event.start_time, Event.id, cursor, skip, limit)
+    events = (await db.scalars(query)).all()
+    set_next_cursor(response, events, "start_time", limit)
     
     return events
 
@@ -57,16 +64,10 @@ async def create_event(
     """
     # If thesis_id is provided, validate it exists and user has permissions
     if event_in.thesis_id:
-        thesis = db.query(Thesis).filter(Thesis.id == event_in.thesis_id).first()
-        if not thesis:
-            raise HTTPException(
-                status_code=404,
-                detail="Thesis not found",
-            )
+        thesis = await thesis_access_or_404(db, event_in.thesis_id)
         
         # Check permissions (students can only create events for their own theses)
-        if (current_user.role == UserRole.student and 
-            current_user.id != thesis.student_id):
+        if not thesis.can_view(current_user):
             raise HTTPException(
                 status_code=403,
                 detail="Cannot create events for theses you don't own",
@@ -96,8 +97,8 @@ async def create_event(
     )
     
     db.add(db_event)
-    db.commit()
-    db.refresh(db_event)
+    await db.commit()
+    await db.refresh(db_event)
     
     return db_event
 
@@ -110,7 +111,14 @@ async def read_event(
     """
     Get a specific event by ID.
     """
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await db.get(
+        Event,
+        event_id,
+        options=(
+            selectinload(Event.user),
+            selectinload(Event.thesis).load_only(Thesis.id, Thesis.title, Thesis.status),
+        ),
+    )
     if not event:
         raise HTTPException(
             status_code=404,
@@ -138,7 +146,7 @@ async def update_event(
     """
     Update an event.
     """
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await db.get(Event, event_id)
     if not event:
         raise HTTPException(
             status_code=404,
@@ -172,8 +180,8 @@ async def update_event(
     event.updated_at = datetime.utcnow()
     
     db.add(event)
-    db.commit()
-    db.refresh(event)
+    await db.commit()
+    await db.refresh(event)
     
     return event
 
@@ -186,7 +194,7 @@ async def delete_event(
     """
     Delete an event.
     """
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await db.get(Event, event_id)
     if not event:
         raise HTTPException(
             status_code=404,
@@ -202,7 +210,7 @@ async def delete_event(
                 detail="Not enough permissions to delete this event",
             )
     
-    db.delete(event)
-    db.commit()
+    await db.delete(event)
+    await db.commit()
     
     return None 
\ No newline at end of file
@@ -0,0 +1,21 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+from app.core.deps import verify_metrics_token
+from app.db.pool import pool_metrics
+from app.db.session import engine, replica_engine
+
+router = APIRouter(dependencies=[Depends(verify_metrics_token)])
+
+
+@router.get("/pool")
+async def read_pool_metrics() -> Any:
+    """
+    Connection pool occupancy and checkout wait statistics for this process.
+    Served only to scrapers presenting METRICS_TOKEN as a bearer token.
+    """
+    metrics = {"primary": pool_metrics(engine)}
+    if replica_engine is not None:
+        metrics["replica"] = pool_metrics(replica_engine)
+    return metrics
@@ -1,10 +1,13 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 from sqlalchemy.sql import select, and_, or_
 
 from app import schemas, models
 from app.api import deps
+from app.core.pagination import paginate, set_next_cursor
+from app.core.thesis_access import get_thesis_access
 from app.models.request import RequestStatus
 from app.models.thesis import ThesisStatus
 from datetime import datetime
@@ -12,10 +15,39 @@ from datetime import datetime
 router = APIRouter()
 
 
+def request_detail_query():
+    """
+    Select requests together with the names shown in RequestDetail, joined
+    in the same statement rather than looked up per row.
+    """
+    student = aliased(models.User)
+    assistant = aliased(models.User)
+    return (
+        select(
+            models.AssistantRequest,
+            student.full_name.label("student_name"),
+            assistant.full_name.label("assistant_name"),
+            models.Thesis.title.label("thesis_title"),
+        )
+        .outerjoin(student, student.id == models.AssistantRequest.student_id)
+        .outerjoin(assistant, assistant.id == models.AssistantRequest.assistant_id)
+        .outerjoin(models.Thesis, models.Thesis.id == models.AssistantRequest.thesis_id)
+    )
+
+
+def to_request_detail(row) -> schemas.RequestDetail:
+    request, student_name, assistant_name, thesis_title = row
+    request_detail = schemas.RequestDetail.from_orm(request)
+    request_detail.student_name = student_name
+    request_detail.assistant_name = assistant_name
+    request_detail.thesis_title = thesis_title
+    return request_detail
+
+
 @router.post("/requests/", response_model=schemas.Request)
 async def create_request(
     request_in: schemas.RequestCreate,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user),
 ) -> Any:
     """
@@ -28,12 +60,9 @@ async def create_request(
             detail="Only students can create assistant requests",
         )
     
-    thesis = db.query(models.Thesis).filter(
-        models.Thesis.id == request_in.thesis_id,
-        models.Thesis.student_id == current_user.id
-    ).first()
+    thesis = await get_thesis_access(db, request_in.thesis_id)
     
-    if not thesis:
+    if not thesis or not thesis.is_owner(current_user):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Thesis not found or does not belong to the current user",
@@ -47,10 +76,10 @@ async def create_request(
         )
     
     # Check if the assistant exists and is a grad assistant or professor
-    assistant = db.query(models.User).filter(
+    assistant = await db.scalar(select(models.User).where(
         models.User.id == request_in.assistant_id,
         models.User.role.in_([models.UserRole.graduation_assistant, models.UserRole.professor])
-    ).first()
+    ))
     
     if not assistant:
         raise HTTPException(
@@ -59,11 +88,11 @@ async def create_request(
         )
     
     # Check if a request to this assistant for this thesis was previously declined
-    existing_declined = db.query(models.AssistantRequest).filter(
+    existing_declined = await db.scalar(select(models.AssistantRequest).where(
         models.AssistantRequest.thesis_id == request_in.thesis_id,
         models.AssistantRequest.assistant_id == request_in.assistant_id,
         models.AssistantRequest.status == RequestStatus.declined
-    ).first()
+    ))
     
     if existing_declined:
         raise HTTPException(
@@ -72,10 +101,10 @@ async def create_request(
         )
     
     # Check if there's already a pending request for this thesis to any assistant
-    existing_request = db.query(models.AssistantRequest).filter(
+    existing_request = await db.scalar(select(models.AssistantRequest).where(
         models.AssistantRequest.thesis_id == request_in.thesis_id,
         models.AssistantRequest.status == RequestStatus.requested
-    ).first()
+    ))
     
     if existing_request:
         raise HTTPException(
@@ -92,8 +121,8 @@ async def create_request(
     )
     
     db.add(db_request)
-    db.commit()
-    db.refresh(db_request)
+    await db.commit()
+    await db.refresh(db_request)
     
     return db_request
 
@@ -102,7 +131,7 @@ async def create_request(
 async def update_request(
     request_id: str,
     request_update: schemas.RequestUpdate,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user),
 ) -> Any:
     """
@@ -116,11 +145,11 @@ async def update_request(
         )
     
     # Get the request
-    db_request = db.query(models.AssistantRequest).filter(
+    db_request = await db.scalar(select(models.AssistantRequest).where(
         models.AssistantRequest.id == request_id,
         models.AssistantRequest.assistant_id == current_user.id,
         models.AssistantRequest.status == RequestStatus.requested
-    ).first()
+    ))
     
     if not db_request:
         raise HTTPException(
@@ -134,37 +163,38 @@ async def update_request(
     
     # If accepted, update thesis status to UNDER_REVIEW
     if request_update.status == RequestStatus.accepted:
-        thesis = db.query(models.Thesis).filter(
-            models.Thesis.id == db_request.thesis_id
-        ).first()
+        thesis = await db.get(models.Thesis, db_request.thesis_id)
         
         if thesis:
             thesis.status = ThesisStatus.under_review
     
-    db.commit()
-    db.refresh(db_request)
+    await db.commit()
+    await db.refresh(db_request)
     
     return db_request
 
 
 @router.get("/requests/", response_model=List[schemas.RequestDetail])
 async def list_requests(
-    db: Session = Depends(deps.get_db),
+    response: Response,
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     status: RequestStatus = None,
 ) -> Any:
     """
     Retrieve requests (sent by students or received by assistants)
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the next page.
     """
-    query = db.query(models.AssistantRequest)
+    query = request_detail_query()
     
     # Filter based on user role
     if current_user.role == models.UserRole.student:
-        query = query.filter(models.AssistantRequest.student_id == current_user.id)
+        query = query.where(models.AssistantRequest.student_id == current_user.id)
     elif current_user.role in [models.UserRole.graduation_assistant, models.UserRole.professor]:
-        query = query.filter(models.AssistantRequest.assistant_id == current_user.id)
+        query = query.where(models.AssistantRequest.assistant_id == current_user.id)
     else:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -173,27 +203,20 @@ async def list_requests(
     
     # Apply status filter if provided
     if status:
-        query = query.filter(models.AssistantRequest.status == status)
-    
-    # Order by creation date (newest first)
-    query = query.order_by(models.AssistantRequest.created_at.desc())
-    
-    # Paginate results
-    requests = query.offset(skip).limit(limit).all()
-    
-    # Enrich with names for the detailed view
-    result = []
-    for req in requests:
-        student = db.query(models.User).filter(models.User.id == req.student_id).first()
-        assistant = db.query(models.User).filter(models.User.id == req.assistant_id).first()
-        thesis = db.query(models.Thesis).filter(models.Thesis.id == req.thesis_id).first()
-        
-        req_detail = schemas.RequestDetail.from_orm(req)
-        req_detail.student_name = student.full_name if student else None
-        req_detail.assistant_name = assistant.full_name if assistant else None
-        req_detail.thesis_title = thesis.title if thesis else None
-        
-        result.append(req_detail)
+        query = query.where(models.AssistantRequest.status == status)
+    
+    # Order by creation date (newest first) and paginate results
+    query = paginate(
+        query,
+        models.AssistantRequest.created_at,
+        models.AssistantRequest.id,
+        cursor,
+        skip,
+        limit,
+        descending=True,
+    )
+    result = [to_request_detail(row) for row in (await db.execute(query)).all()]
+    set_next_cursor(response, result, "created_at", limit)
     
     return result
 
@@ -201,23 +224,24 @@ async def list_requests(
 @router.get("/requests/{request_id}", response_model=schemas.RequestDetail)
 async def get_request(
     request_id: str,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Get details for a specific request
     """
-    request = db.query(models.AssistantRequest).filter(
-        models.AssistantRequest.id == request_id
-    ).first()
+    row = (await db.execute(
+        request_detail_query().where(models.AssistantRequest.id == request_id)
+    )).first()
     
-    if not request:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Request not found",
         )
     
     # Check if user has access to this request
+    request = row.AssistantRequest
     if (current_user.id != request.student_id and 
         current_user.id != request.assistant_id and
         current_user.role not in [models.UserRole.professor]):
@@ -226,23 +250,13 @@ async def get_request(
             detail="Not authorized to access this request",
         )
     
-    # Get additional data for detailed view
-    student = db.query(models.User).filter(models.User.id == request.student_id).first()
-    assistant = db.query(models.User).filter(models.User.id == request.assistant_id).first()
-    thesis = db.query(models.Thesis).filter(models.Thesis.id == request.thesis_id).first()
-    
-    request_detail = schemas.RequestDetail.from_orm(request)
-    request_detail.student_name = student.full_name if student else None
-    request_detail.assistant_name = assistant.full_name if assistant else None
-    request_detail.thesis_title = thesis.title if thesis else None
-    
-    return request_detail
+    return to_request_detail(row)
 
 
 @router.delete("/requests/{request_id}", response_model=schemas.Request)
 async def cancel_request(
     request_id: str,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user),
 ) -> Any:
     """
@@ -256,11 +270,11 @@ async def cancel_request(
         )
     
     # Get the request
-    db_request = db.query(models.AssistantRequest).filter(
+    db_request = await db.scalar(select(models.AssistantRequest).where(
         models.AssistantRequest.id == request_id,
         models.AssistantRequest.student_id == current_user.id,
         models.AssistantRequest.status == RequestStatus.requested
-    ).first()
+    ))
     
     if not db_request:
         raise HTTPException(
@@ -269,7 +283,7 @@ async def cancel_request(
         )
     
     # Delete the request
-    db.delete(db_request)
-    db.commit()
+    await db.delete(db_request)
+    await db.commit()
     
     return db_request 
\ No newline at end of file
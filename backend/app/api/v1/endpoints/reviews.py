@@ -1,19 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Any
 from datetime import datetime
 
 from app import models, schemas
 from app.core.deps import get_db, get_current_reviewer
-from app.models import User, Thesis, Review
+from app.core.thesis_access import thesis_access_or_404
+from app.models import User, Review
 
 router = APIRouter()
 
 
 @router.post("/theses/{thesis_id}/reviews", response_model=schemas.ReviewRead, status_code=status.HTTP_201_CREATED)
-def create_thesis_review(
+async def create_thesis_review(
     *, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     thesis_id: str,
     review_in: schemas.ReviewCreate,
     current_user: User = Depends(get_current_reviewer)
@@ -25,12 +26,7 @@ def create_thesis_review(
     The review title is auto-generated.
     """
     # Check if thesis exists
-    thesis = db.query(Thesis).filter(Thesis.id == thesis_id).first()
-    if not thesis:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Thesis not found",
-        )
+    thesis = await thesis_access_or_404(db, thesis_id)
     
     # Role check is handled by the get_current_reviewer dependency
 
@@ -52,8 +48,8 @@ def create_thesis_review(
     
     # Add to session, commit, and refresh
     db.add(db_review)
-    db.commit()
-    db.refresh(db_review)
+    await db.commit()
+    await db.refresh(db_review)
 
     return db_review
 
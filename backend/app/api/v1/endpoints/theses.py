@@ -2,31 +2,57 @@ from typing import Any, List, Optional
 from datetime import datetime
 import uuid
 
-from fastapi import APIRouter, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Query, Response, status, UploadFile, File, Form
 from pydantic import ValidationError
+from sqlalchemy import func, select, union_all
+from sqlalchemy.orm import joinedload, raiseload, selectinload
 
+from app.core.blob_store import collect_blobs, release_blob
 from app.core.deps import DB, CurrentActiveUser, CurrentUser
+from app.core.pagination import paginate, set_next_cursor
+from app.core.search import headline, rank, render_highlight, search_query
+from app.core.thesis_access import listed_for
+from app.models.attachment import ThesisAttachment
+from app.models.attachment_text import AttachmentText
+from app.models.committee import ThesisCommitteeMember
 from app.models.thesis import Thesis, ThesisStatus
 from app.models.user import UserRole, User
 from app.schemas.thesis import (
     Thesis as ThesisSchema,
     ThesisCreate,
     ThesisUpdate,
-    ThesisDetail
+    ThesisDetail,
+    ThesisSearchResult,
 )
 
 router = APIRouter()
 
+# Loader strategy for ThesisDetail responses. Many-to-one users are joined
+# into the main query and each collection costs one extra SELECT ... IN for
+# the whole page, so a page of theses takes a constant number of statements.
+# Anything else raises instead of lazy loading (impossible on AsyncSession).
+THESIS_DETAIL_OPTIONS = (
+    joinedload(Thesis.student),
+    joinedload(Thesis.supervisor),
+    selectinload(Thesis.comments),
+    selectinload(Thesis.committee_members).joinedload(ThesisCommitteeMember.user),
+    selectinload(Thesis.attachments),
+    raiseload("*"),
+)
+
 @router.get("/all", response_model=List[ThesisDetail])
 async def read_all_theses_for_professors(
     db: DB,
     current_user: CurrentActiveUser,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
 ) -> Any:
     """
     Retrieve all theses with their details for professors to view all thesis statuses.
     Only accessible by professors and graduation assistants.
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the next page.
     """
     # Only professors and graduation assistants can access this endpoint
     if current_user.role not in [UserRole.professor, UserRole.graduation_assistant]:
@@ -36,39 +62,124 @@ async def read_all_theses_for_professors(
         )
     
     # Get all theses with their relationships
-    theses = db.query(Thesis).offset(skip).limit(limit).all()
+    query = select(Thesis).options(*THESIS_DETAIL_OPTIONS)
+    query = paginate(query, Thesis.created_at, Thesis.id, cursor, skip, limit)
+    theses = (await db.scalars(query)).all()
+    set_next_cursor(response, theses, "created_at", limit)
     
     return theses
 
+@router.get("/search", response_model=List[ThesisSearchResult])
+async def search_theses(
+    db: DB,
+    current_user: CurrentActiveUser,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    supervisor_id: Optional[str] = None,
+) -> Any:
+    """
+    Search theses by title, abstract and attachment text, best matches first.
+    q takes web search syntax: words, "quoted phrases", OR, and -word to
+    exclude. Searches the same theses GET / lists for the user's role, and
+    highlights the matches.
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the next page.
+    """
+    tsquery = search_query(q)
+    # Each side is a lookup in its GIN index; a thesis matching in both
+    # ranks above one matching in either
+    title_hits = (
+        select(Thesis.id.label("thesis_id"), rank(Thesis.search_vector, tsquery).label("rank"))
+        .where(Thesis.search_vector.bool_op("@@")(tsquery))
+    )
+    text_hits = (
+        select(ThesisAttachment.thesis_id, func.max(rank(AttachmentText.search_vector, tsquery)))
+        .join(AttachmentText, AttachmentText.attachment_id == ThesisAttachment.id)
+        .where(AttachmentText.search_vector.bool_op("@@")(tsquery))
+        .group_by(ThesisAttachment.thesis_id)
+    )
+    hits = union_all(title_hits, text_hits).subquery()
+    ranked = (
+        select(hits.c.thesis_id, func.sum(hits.c.rank).label("rank"))
+        .group_by(hits.c.thesis_id)
+        .subquery()
+    )
+
+    # Headlines are only computed for the rows of the page
+    query = (
+        select(
+            Thesis,
+            ranked.c.rank,
+            headline(Thesis.title, tsquery, "HighlightAll=true"),
+            headline(Thesis.abstract, tsquery, "MaxFragments=2, MaxWords=30, MinWords=10"),
+        )
+        .join(ranked, ranked.c.thesis_id == Thesis.id)
+    )
+    query = query.where(listed_for(current_user, supervisor_id))
+    query = paginate(query, ranked.c.rank, Thesis.id, cursor, skip, limit, descending=True)
+    rows = (await db.execute(query)).all()
+
+    # The best matching attachment of each thesis on the page
+    best = (
+        select(ThesisAttachment.thesis_id, ThesisAttachment.id, ThesisAttachment.filename)
+        .distinct(ThesisAttachment.thesis_id)
+        .join(AttachmentText, AttachmentText.attachment_id == ThesisAttachment.id)
+        .where(
+            ThesisAttachment.thesis_id.in_([thesis.id for thesis, *_ in rows]),
+            AttachmentText.search_vector.bool_op("@@")(tsquery),
+        )
+        .order_by(ThesisAttachment.thesis_id, rank(AttachmentText.search_vector, tsquery).desc())
+        .subquery()
+    )
+    contents = {
+        thesis_id: (attachment_id, filename, content)
+        for thesis_id, attachment_id, filename, content in (await db.execute(
+            select(
+                best.c.thesis_id,
+                best.c.id,
+                best.c.filename,
+                headline(AttachmentText.content, tsquery, "MaxFragments=3, MaxWords=30, MinWords=10"),
+            )
+            .join(AttachmentText, AttachmentText.attachment_id == best.c.id)
+        )).all()
+    } if rows else {}
+
+    results = []
+    for thesis, score, title, abstract in rows:
+        attachment_id, filename, content = contents.get(thesis.id, (None, None, None))
+        results.append(ThesisSearchResult(
+            **ThesisSchema.model_validate(thesis).model_dump(),
+            rank=score,
+            title_highlight=render_highlight(title),
+            abstract_highlight=render_highlight(abstract),
+            content_highlight=render_highlight(content),
+            attachment_id=attachment_id,
+            attachment_filename=filename,
+        ))
+    set_next_cursor(response, results, "rank", limit)
+
+    return results
+
 @router.get("/", response_model=List[ThesisSchema])
 async def read_theses(
     db: DB,
     current_user: CurrentActiveUser,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     supervisor_id: Optional[str] = None,
 ) -> Any:
     """
     Retrieve theses based on user role. Can be filtered by supervisor_id (for admins/assistants).
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the next page.
     """
-    # Filter theses based on user role
-    query = db.query(Thesis) # Start building the query
-
-    if current_user.role == UserRole.student:
-        # Students can only see their own theses
-        theses = query.filter(
-            Thesis.student_id == current_user.id
-        ).offset(skip).limit(limit).all()
-    elif current_user.role == UserRole.professor:
-        # Professors can see theses they supervise
-        theses = query.filter(
-            Thesis.supervisor_id == current_user.id
-        ).offset(skip).limit(limit).all()
-    else:  # Graduation assistant or admin
-        # Can see all theses, optionally filtered by supervisor_id
-        if supervisor_id is not None:
-            query = query.filter(Thesis.supervisor_id == supervisor_id)
-        theses = query.offset(skip).limit(limit).all()
+    query = select(Thesis).where(listed_for(current_user, supervisor_id))
+    query = paginate(query, Thesis.created_at, Thesis.id, cursor, skip, limit)
+    theses = (await db.scalars(query)).all()
+    set_next_cursor(response, theses, "created_at", limit)
 
     return theses
 
@@ -91,7 +202,7 @@ async def create_thesis(
     # Validate supervisor_id if provided
     if thesis_in.supervisor_id:
         # Check if supervisor exists and is a professor or grad assistant
-        supervisor = db.query(User).filter(User.id == thesis_in.supervisor_id).first()
+        supervisor = await db.get(User, thesis_in.supervisor_id)
         if not supervisor:
             raise HTTPException(
                 status_code=404,
@@ -123,8 +234,8 @@ async def create_thesis(
     )
     
     db.add(db_thesis)
-    db.commit()
-    db.refresh(db_thesis)
+    await db.commit()
+    await db.refresh(db_thesis)
     
     return db_thesis
 
@@ -137,7 +248,7 @@ async def read_thesis(
     """
     Get a specific thesis by ID.
     """
-    thesis = db.query(Thesis).filter(Thesis.id == thesis_id).first()
+    thesis = await db.get(Thesis, thesis_id, options=THESIS_DETAIL_OPTIONS)
     if not thesis:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -164,7 +275,7 @@ async def update_thesis(
     """
     Update a thesis.
     """
-    thesis = db.query(Thesis).filter(Thesis.id == thesis_id).first()
+    thesis = await db.get(Thesis, thesis_id)
     if not thesis:
         raise HTTPException(
             status_code=404,
@@ -198,7 +309,7 @@ async def update_thesis(
         # If not None, validate
         elif thesis_in.supervisor_id:
             # Check if supervisor exists and is a professor or grad assistant
-            supervisor = db.query(User).filter(User.id == thesis_in.supervisor_id).first()
+            supervisor = await db.get(User, thesis_in.supervisor_id)
             if not supervisor:
                 raise HTTPException(
                     status_code=404,
@@ -240,8 +351,8 @@ async def update_thesis(
     thesis.updated_at = datetime.utcnow()
     
     db.add(thesis)
-    db.commit()
-    db.refresh(thesis)
+    await db.commit()
+    await db.refresh(thesis)
     
     return thesis
 
@@ -254,7 +365,7 @@ async def delete_thesis(
     """
     Delete a thesis.
     """
-    thesis = db.query(Thesis).filter(Thesis.id == thesis_id).first()
+    thesis = await db.get(Thesis, thesis_id)
     if not thesis:
         raise HTTPException(
             status_code=404,
@@ -274,7 +385,16 @@ async def delete_thesis(
             detail="Cannot delete thesis that is not in draft status",
         )
     
-    db.delete(thesis)
-    db.commit()
+    # The attachments go with the thesis; drop their references on the blobs
+    digests = (await db.scalars(
+        select(ThesisAttachment.blob_sha256).where(
+            ThesisAttachment.thesis_id == thesis_id,
+            ThesisAttachment.blob_sha256.isnot(None),
+        )
+    )).all()
+    await db.delete(thesis)
+    unreferenced = [digest for digest in digests if await release_blob(db, digest)]
+    await db.commit()
+    await collect_blobs(unreferenced)
     
     return None 
\ No newline at end of file
@@ -0,0 +1,273 @@
+from typing import Any
+from datetime import datetime
+import uuid
+
+from fastapi import APIRouter, Header, HTTPException, Path as PathParam, Request, status
+from sqlalchemy import select, update
+from starlette.concurrency import run_in_threadpool
+
+from app.core.blob_store import staging_path, store_staged_blob
+from app.core.config import settings
+from app.core.deps import DB, CurrentActiveUser
+from app.core.file_utils import guess_mimetype, validate_file_type
+from app.core.processing import notify_processing, queue_processing
+from app.core.upload_sessions import (
+    assemble,
+    chunk_count,
+    keep_chunk,
+    next_expiry,
+    receive_chunk,
+    received_chunks,
+    remove_session_files,
+)
+from app.core.thesis_access import ThesisAccess, thesis_access_or_404
+from app.core.user_cache import Principal
+from app.models.attachment import ThesisAttachment
+from app.models.thesis import Thesis
+from app.models.upload_session import UploadSession
+from app.models.user import UserRole
+from app.schemas.attachment import Attachment as AttachmentSchema
+from app.schemas.upload_session import (
+    UploadSession as UploadSessionSchema,
+    UploadSessionCreate,
+)
+
+router = APIRouter()
+
+
+async def get_thesis_for_upload(db: DB, thesis_id: str, current_user: Principal) -> ThesisAccess:
+    """
+    Check that the current user may add attachments to a thesis.
+    """
+    thesis = await thesis_access_or_404(db, thesis_id)
+
+    # Same rule as direct uploads: the student who owns the thesis or reviewers
+    is_owner = current_user.id == thesis.student_id
+    is_reviewer = current_user.role in [UserRole.professor, UserRole.graduation_assistant]
+
+    if not (is_owner or is_reviewer):
+        raise HTTPException(
+            status_code=403,
+            detail="Not enough permissions to update this thesis",
+        )
+    return thesis
+
+
+async def get_upload_session(
+    db: DB, thesis_id: str, upload_id: str, current_user: Principal, for_update: bool = False
+) -> UploadSession:
+    """
+    Load a live upload session started by the current user.
+    """
+    query = select(UploadSession).where(
+        UploadSession.id == upload_id,
+        UploadSession.thesis_id == thesis_id,
+        UploadSession.user_id == current_user.id,
+        UploadSession.expires_at > datetime.utcnow(),
+    )
+    if for_update:
+        query = query.with_for_update()
+    session = await db.scalar(query)
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session not found or expired",
+        )
+    return session
+
+
+def to_upload_schema(session: UploadSession) -> UploadSessionSchema:
+    chunks = received_chunks(session.id)
+    return UploadSessionSchema(
+        id=session.id,
+        thesis_id=session.thesis_id,
+        filename=session.filename,
+        description=session.description,
+        file_size=session.file_size,
+        chunk_size=session.chunk_size,
+        chunk_count=chunk_count(session),
+        received_chunks=sorted(chunks),
+        received_bytes=sum(chunks.values()),
+        created_at=session.created_at,
+        expires_at=session.expires_at,
+    )
+
+
+@router.post("/{thesis_id}/uploads", response_model=UploadSessionSchema)
+async def create_upload_session(
+    thesis_id: str,
+    upload_in: UploadSessionCreate,
+    db: DB,
+    current_user: CurrentActiveUser,
+) -> Any:
+    """
+    Start a resumable upload of a large attachment.
+    Send the file in chunk_size pieces to the chunks endpoint, in any order
+    and again after a dropped connection, then complete the upload.
+    """
+    await get_thesis_for_upload(db, thesis_id, current_user)
+
+    # Validate file type
+    if not validate_file_type(upload_in.filename):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid file type. Allowed types: pdf, doc, docx, txt",
+        )
+
+    if upload_in.file_size > settings.MAX_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File size too large. Maximum size is {round(settings.MAX_UPLOAD_SIZE / (1024 * 1024), 1):g}MB.",
+        )
+
+    session = UploadSession(
+        id=str(uuid.uuid4()),
+        filename=upload_in.filename,
+        description=upload_in.description,
+        file_size=upload_in.file_size,
+        chunk_size=settings.UPLOAD_SESSION_CHUNK_SIZE,
+        sha256=upload_in.sha256.lower() if upload_in.sha256 else None,
+        created_at=datetime.utcnow(),
+        expires_at=next_expiry(),
+        thesis_id=thesis_id,
+        user_id=current_user.id,
+    )
+    db.add(session)
+    await db.commit()
+
+    return to_upload_schema(session)
+
+
+@router.get("/{thesis_id}/uploads/{upload_id}", response_model=UploadSessionSchema)
+async def read_upload_session(
+    thesis_id: str,
+    upload_id: str,
+    db: DB,
+    current_user: CurrentActiveUser,
+) -> Any:
+    """
+    Get the progress of an upload, e.g. to see which chunks to resend after
+    a dropped connection.
+    """
+    session = await get_upload_session(db, thesis_id, upload_id, current_user)
+    return to_upload_schema(session)
+
+
+@router.put("/{thesis_id}/uploads/{upload_id}/chunks/{index}", response_model=UploadSessionSchema)
+async def upload_chunk(
+    thesis_id: str,
+    upload_id: str,
+    request: Request,
+    db: DB,
+    current_user: CurrentActiveUser,
+    index: int = PathParam(..., ge=0),
+    x_chunk_sha256: str = Header(..., description="Hex SHA-256 of the chunk"),
+) -> Any:
+    """
+    Upload chunk number index of a file as the raw request body. It covers
+    bytes index * chunk_size up to the next chunk or the end of the file.
+    The chunk is only stored when its size and X-Chunk-SHA256 match and
+    the upload is still open once it has arrived.
+    """
+    session = await get_upload_session(db, thesis_id, upload_id, current_user)
+    if index >= chunk_count(session):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Chunk index out of range. This upload has {chunk_count(session)} chunks",
+        )
+    # Release the database connection while the chunk streams in
+    await db.commit()
+
+    incoming = await receive_chunk(session, index, request.stream(), x_chunk_sha256)
+    try:
+        # The upload may have been completed or aborted while the chunk
+        # streamed in; the lock keeps both out until the chunk is stored
+        session = await get_upload_session(db, thesis_id, upload_id, current_user, for_update=True)
+        keep_chunk(session.id, index, incoming)
+    finally:
+        incoming.unlink(missing_ok=True)
+
+    session.expires_at = next_expiry()
+    await db.commit()
+
+    return to_upload_schema(session)
+
+
+@router.post("/{thesis_id}/uploads/{upload_id}/complete", response_model=AttachmentSchema)
+async def complete_upload(
+    thesis_id: str,
+    upload_id: str,
+    db: DB,
+    current_user: CurrentActiveUser,
+) -> Any:
+    """
+    Join the uploaded chunks into a new attachment and end the session.
+    """
+    await get_thesis_for_upload(db, thesis_id, current_user)
+    # Locked, so a second completion waits and then finds the session gone
+    session = await get_upload_session(db, thesis_id, upload_id, current_user, for_update=True)
+
+    missing = sorted(set(range(chunk_count(session))) - set(received_chunks(session.id)))
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload incomplete. Missing chunks: {missing[:20]}",
+        )
+
+    staged = staging_path()
+    digest = await assemble(session, staged)
+    if session.sha256 and digest != session.sha256:
+        staged.unlink()
+        raise HTTPException(
+            status_code=400,
+            detail="Checksum mismatch for the assembled file",
+        )
+    file_path = await store_staged_blob(db, staged, session.file_size, digest)
+
+    # Create the attachment record
+    db_attachment = ThesisAttachment(
+        id=str(uuid.uuid4()),
+        filename=session.filename,
+        file_path=file_path,
+        file_type=guess_mimetype(session.filename),
+        file_size=session.file_size,
+        blob_sha256=digest,
+        description=session.description,
+        thesis_id=thesis_id,
+        uploaded_by=current_user.id,
+        created_at=datetime.utcnow(),
+        updated_at=datetime.utcnow(),
+    )
+    db.add(db_attachment)
+    await db.delete(session)
+    # Extract text and render the preview in the background
+    await queue_processing(db, db_attachment.id)
+
+    # Update thesis updated_at time
+    await db.execute(update(Thesis).where(Thesis.id == thesis_id).values(updated_at=datetime.utcnow()))
+    await db.commit()
+    notify_processing()
+
+    await run_in_threadpool(remove_session_files, upload_id)
+
+    return db_attachment
+
+
+@router.delete("/{thesis_id}/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_upload(
+    thesis_id: str,
+    upload_id: str,
+    db: DB,
+    current_user: CurrentActiveUser,
+) -> None:
+    """
+    Abandon an upload and discard its chunks.
+    """
+    # Locked, so an upload being completed or a chunk being stored finishes first
+    session = await get_upload_session(db, thesis_id, upload_id, current_user, for_update=True)
+    await db.delete(session)
+    await db.commit()
+
+    await run_in_threadpool(remove_session_files, upload_id)
+
+    return None
@@ -1,21 +1,69 @@
-from typing import Any, List, Optional
-from sqlalchemy import func
+from typing import Any, List, Optional, Union
+from sqlalchemy import case, func, or_, select
 
-from fastapi import APIRouter, HTTPException, status, Query, UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, status, Query, Response, UploadFile, File
 from pathlib import Path
 
-from app.core.deps import DB, CurrentUser, CurrentActiveUser
-from app.core.file_utils import save_profile_picture, validate_image_type, delete_file, UPLOAD_DIR
+from app.core.deps import DB, CurrentActiveUser, CurrentUserRecord
+from app.core.file_utils import save_profile_picture, validate_image_type, delete_file, guess_mimetype
+from app.core.storage import get_storage
+from app.core.pagination import paginate, set_next_cursor
 from app.models.user import User, UserRole
 from app.models.thesis import Thesis
-from app.schemas.user import User as UserSchema, UserUpdate
+from app.schemas.user import User as UserSchema, UserSummary, UserUpdate
 
 router = APIRouter()
 
+# Columns returned by the lean directory view
+SUMMARY_COLUMNS = (User.id, User.email, User.full_name, User.role, User.profile_picture, User.created_at)
+
+# Columns returned by the typeahead search
+SEARCH_COLUMNS = (User.id, User.email, User.full_name, User.role, User.profile_picture)
+
+# The trigram indexes only narrow a substring search down once it has three
+# characters; shorter input would scan the whole index
+MIN_SEARCH_LENGTH = 3
+MAX_SEARCH_RESULTS = 20
+
+# Largest page of the user directory one request may ask for; callers
+# follow X-Next-Cursor for the rest
+MAX_PAGE_SIZE = 200
+
+# How long browsers may reuse a search result, e.g. while the user types a
+# character and deletes it again
+SEARCH_CACHE_SECONDS = 60
+
+
+def with_student_count(*columns):
+    """
+    Select the given columns plus each graduation assistant's student count,
+    taken from one grouped subquery over theses instead of a count per user.
+    """
+    counts = (
+        select(Thesis.supervisor_id, func.count(Thesis.id).label("student_count"))
+        .group_by(Thesis.supervisor_id)
+        .subquery("student_counts")
+    )
+    student_count = case(
+        (User.role == UserRole.graduation_assistant, func.coalesce(counts.c.student_count, 0)),
+        else_=None,
+    ).label("student_count")
+    return (
+        select(*columns, student_count)
+        .select_from(User)
+        .outerjoin(counts, counts.c.supervisor_id == User.id)
+    )
+
+
+def like_pattern(text: str) -> str:
+    """
+    Escape LIKE wildcards in user input, with backslash as the escape character.
+    """
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
 @router.get("/me", response_model=UserSchema)
 async def read_current_user(
-    current_user: CurrentUser,
+    current_user: CurrentUserRecord,
 ) -> Any:
     """
     Get current user.
@@ -25,7 +73,7 @@ async def read_current_user(
 @router.put("/me", response_model=UserSchema)
 async def update_user_me(
     user_in: UserUpdate,
-    current_user: CurrentActiveUser,
+    current_user: CurrentUserRecord,
     db: DB,
 ) -> Any:
     """
@@ -38,15 +86,15 @@ async def update_user_me(
         setattr(current_user, field, value)
     
     db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
     
     return current_user
 
 @router.post("/me/profile-picture", response_model=UserSchema)
 async def upload_profile_picture(
     file: UploadFile = File(...),
-    current_user: CurrentActiveUser = CurrentActiveUser,
+    current_user: CurrentUserRecord = CurrentUserRecord,
     db: DB = DB,
 ) -> Any:
     """
@@ -59,32 +107,23 @@ async def upload_profile_picture(
             detail="Invalid file type. Only JPG, PNG, GIF, and WebP images are allowed.",
         )
     
-    # Validate file size (max 5MB)
-    file_content = await file.read()
-    if len(file_content) > 5 * 1024 * 1024:  # 5MB
-        raise HTTPException(
-            status_code=400,
-            detail="File size too large. Maximum size is 5MB.",
-        )
-    
-    # Reset file pointer
-    await file.seek(0)
-    
-    # Delete old profile picture if it exists
-    if current_user.profile_picture:
-        delete_file(current_user.profile_picture)
-    
-    # Save new profile picture
+    # Save new profile picture (size is enforced while it streams to disk)
     try:
-        file_path, mimetype, file_size = await save_profile_picture(file, current_user.id)
+        file_path, mimetype, file_size, _ = await save_profile_picture(file, current_user.id)
+        
+        # Delete old profile picture if it exists
+        if current_user.profile_picture:
+            await delete_file(current_user.profile_picture)
         
         # Update user profile picture path
         current_user.profile_picture = file_path
         db.add(current_user)
-        db.commit()
-        db.refresh(current_user)
+        await db.commit()
+        await db.refresh(current_user)
         
         return current_user
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -93,7 +132,7 @@ async def upload_profile_picture(
 
 @router.delete("/me/profile-picture", response_model=UserSchema)
 async def delete_profile_picture(
-    current_user: CurrentActiveUser = CurrentActiveUser,
+    current_user: CurrentUserRecord = CurrentUserRecord,
     db: DB = DB,
 ) -> Any:
     """
@@ -101,43 +140,72 @@ async def delete_profile_picture(
     """
     if current_user.profile_picture:
         # Delete file from filesystem
-        delete_file(current_user.profile_picture)
+        await delete_file(current_user.profile_picture)
         
         # Update user profile picture path
         current_user.profile_picture = None
         db.add(current_user)
-        db.commit()
-        db.refresh(current_user)
+        await db.commit()
+        await db.refresh(current_user)
     
     return current_user
 
 @router.get("/profile-picture/{file_path:path}")
-async def serve_profile_picture(file_path: str) -> FileResponse:
+async def serve_profile_picture(file_path: str) -> Response:
     """
     Serve profile picture files.
     """
-    # Construct the full file path
-    full_path = UPLOAD_DIR / file_path
+    # Check if it's in the profiles directory (security check)
+    parts = Path(file_path).parts
+    if len(parts) < 2 or parts[0] != "profiles" or ".." in parts:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied",
+        )
+    
+    response = await get_storage().download_response(
+        file_path,
+        media_type=guess_mimetype(file_path),
+        cache_control="public, max-age=3600",  # Cache for 1 hour
+    )
     
     # Check if file exists
-    if not full_path.exists():
+    if response is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Profile picture not found",
         )
     
-    # Check if it's in the profiles directory (security check)
-    if not str(full_path).startswith(str(UPLOAD_DIR / "profiles")):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied",
+    return response
+
+@router.get("/search", response_model=List[UserSummary])
+async def search_users(
+    response: Response,
+    current_user: CurrentActiveUser,
+    db: DB,
+    q: str = Query(..., min_length=MIN_SEARCH_LENGTH, max_length=100),
+    role: List[UserRole] = Query([], description="Only users with one of these roles"),
+    limit: int = Query(10, ge=1, le=MAX_SEARCH_RESULTS),
+) -> Any:
+    """
+    Find active users whose name or email contains q, for typeahead pickers.
+    Names starting with q come first.
+    """
+    pattern = like_pattern(q)
+    query = (
+        select(*SEARCH_COLUMNS)
+        .where(
+            or_(User.full_name.ilike(f"%{pattern}%"), User.email.ilike(f"%{pattern}%")),
+            User.is_active.is_(True),
         )
-    
-    return FileResponse(
-        path=full_path,
-        media_type="image/jpeg",  # Will be auto-detected by browser
-        headers={"Cache-Control": "public, max-age=3600"}  # Cache for 1 hour
+        .order_by(User.full_name.ilike(f"{pattern}%").desc().nulls_last(), User.full_name, User.id)
+        .limit(limit)
     )
+    if role:
+        query = query.where(User.role.in_(role))
+    
+    response.headers["Cache-Control"] = f"private, max-age={SEARCH_CACHE_SECONDS}"
+    return (await db.execute(query)).all()
 
 @router.get("/{user_id}", response_model=UserSchema)
 async def read_user(
@@ -148,44 +216,47 @@ async def read_user(
     """
     Get a specific user by id.
     """
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    row = (await db.execute(with_student_count(User).where(User.id == user_id))).first()
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
     
-    # Add student count for graduation assistants
-    if user.role == UserRole.graduation_assistant:
-        student_count = db.query(func.count(Thesis.id)).filter(
-            Thesis.supervisor_id == user.id
-        ).scalar()
-        user.student_count = student_count
-    
+    user = row.User
+    user.student_count = row.student_count
     return user
 
-@router.get("/", response_model=List[UserSchema])
+@router.get("/", response_model=List[Union[UserSchema, UserSummary]])
 async def read_users(
+    response: Response,
     role: Optional[UserRole] = Query(None, description="Filter users by role"),
+    summary: bool = Query(False, description="Return only id, email, name, role, picture and student count"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     db: DB = DB,
     current_user: CurrentActiveUser = CurrentActiveUser,
 ) -> Any:
     """
-    Get all users with optional role filtering.
+    Get users with optional role filtering.
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the next page.
     """
-    query = db.query(User)
+    query = with_student_count(*SUMMARY_COLUMNS) if summary else with_student_count(User)
     
     if role:
-        query = query.filter(User.role == role)
+        query = query.where(User.role == role)
     
-    users = query.all()
+    query = paginate(query, User.created_at, User.id, cursor, skip, limit)
+    rows = (await db.execute(query)).all()
     
-    # Add student count for graduation assistants
-    for user in users:
-        if user.role == UserRole.graduation_assistant:
-            student_count = db.query(func.count(Thesis.id)).filter(
-                Thesis.supervisor_id == user.id
-            ).scalar()
-            user.student_count = student_count
+    if summary:
+        users = rows
+    else:
+        users = []
+        for row in rows:
+            row.User.student_count = row.student_count
+            users.append(row.User)
     
+    set_next_cursor(response, users, "created_at", limit)
     return users 
\ No newline at end of file
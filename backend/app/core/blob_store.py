@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+from fastapi import UploadFile
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core import file_utils
+from app.core.config import settings
+from app.core.file_utils import stream_to_file
+from app.core.preview_cache import discard_previews
+from app.core.storage import get_storage
+from app.db.session import SessionLocal
+from app.models.blob import FileBlob
+
+logger = logging.getLogger(__name__)
+
+# Blobs are stored under blobs/<first two hex digits>/<sha256>
+BLOB_DIR = "blobs"
+# Uploads land here, under UPLOAD_DIR, until their digest is known
+INCOMING_DIR = f"{BLOB_DIR}/incoming"
+
+
+def blob_path(digest: str) -> str:
+    """
+    Relative path of the blob holding the content with this digest.
+    """
+    return f"{BLOB_DIR}/{digest[:2]}/{digest}"
+
+
+def staging_path() -> Path:
+    """
+    A fresh path for a file on its way into the blob store.
+    """
+    incoming = file_utils.UPLOAD_DIR / INCOMING_DIR
+    incoming.mkdir(parents=True, exist_ok=True)
+    return incoming / uuid.uuid4().hex
+
+
+async def store_blob(db: AsyncSession, upload_file: UploadFile, max_size: int) -> Tuple[str, int, str]:
+    """
+    Stream an upload into the blob store and take a reference on its blob.
+    Content that is already stored is not kept a second time.
+    Returns the blob path, size, and SHA-256 digest.
+
+    The reference is part of the caller's transaction and must be committed
+    together with the row that points at the blob.
+    """
+    staged = staging_path()
+    file_size, digest = await stream_to_file(upload_file, staged, max_size)
+    path = await store_staged_blob(db, staged, file_size, digest)
+    return path, file_size, digest
+
+
+async def _register_blob(digest: str, path: str, file_size: int) -> None:
+    """
+    Commit a row for a blob, without references, unless it exists already.
+    """
+    async with SessionLocal() as db:
+        await db.execute(
+            insert(FileBlob)
+            .values(sha256=digest, file_path=path, file_size=file_size, ref_count=0,
+                    created_at=datetime.utcnow())
+            .on_conflict_do_nothing(index_elements=[FileBlob.sha256])
+        )
+        await db.commit()
+
+
+async def store_staged_blob(db: AsyncSession, staged: Path, file_size: int, digest: str) -> str:
+    """
+    Take a reference on the blob for a complete file at a staging path, and
+    move the file into storage unless that content is already stored.
+    Returns the blob path. The staged file is gone afterwards either way.
+
+    A new blob's row is committed before its file is put, so every file in
+    storage has a row: when the caller rolls back, the row is left without
+    references and collect_blobs removes it together with the file.
+    """
+    path = blob_path(digest)
+    try:
+        while True:
+            # Taking the reference locks the blob row, so a concurrent
+            # collect_blobs of the same blob has either finished (and removed
+            # the row and file) or skips it
+            taken = await db.scalar(
+                update(FileBlob)
+                .where(FileBlob.sha256 == digest)
+                .values(ref_count=FileBlob.ref_count + 1)
+                .returning(FileBlob.sha256),
+                execution_options={"synchronize_session": False},
+            )
+            if taken is not None:
+                break
+            await _register_blob(digest, path, file_size)
+        storage = get_storage()
+        if await storage.exists(path):
+            staged.unlink()
+        else:
+            await storage.put(staged, path)
+    except BaseException:
+        staged.unlink(missing_ok=True)
+        raise
+    return path
+
+
+async def release_blob(db: AsyncSession, digest: str) -> Optional[str]:
+    """
+    Drop one reference on a blob. Returns the digest when no reference is
+    left, for collect_blobs once the caller has committed.
+
+    The blob row and its file stay until then: if the caller's transaction
+    rolls back, the references it dropped come back and must still find the
+    file. Flushes first, so rows deleted or repointed by the caller no
+    longer reference the blob.
+    """
+    await db.flush()
+    remaining = await db.scalar(
+        update(FileBlob)
+        .where(FileBlob.sha256 == digest)
+        .values(ref_count=FileBlob.ref_count - 1)
+        .returning(FileBlob.ref_count),
+        execution_options={"synchronize_session": False},
+    )
+    if remaining is None or remaining > 0:
+        return None
+    return digest
+
+
+async def collect_blobs(digests: Optional[Iterable[str]] = None) -> int:
+    """
+    Remove blobs without references, with their files and cached previews:
+    the given ones, or every such blob when called without digests. Runs in
+    its own transaction. Returns the number of blobs removed.
+    """
+    query = select(FileBlob.sha256).where(FileBlob.ref_count <= 0)
+    if digests is not None:
+        digests = list(digests)
+        if not digests:
+            return 0
+        query = query.where(FileBlob.sha256.in_(digests))
+    async with SessionLocal() as db:
+        # Blobs an upload is taking a reference on are skipped; the rest stay
+        # locked, so an upload of the same content waits, then finds the row
+        # and the file gone and puts its own copy in place
+        unreferenced = (await db.scalars(query.with_for_update(skip_locked=True))).all()
+        storage = get_storage()
+        for digest in unreferenced:
+            await storage.delete(blob_path(digest))
+            await run_in_threadpool(discard_previews, digest)
+        if unreferenced:
+            await db.execute(
+                delete(FileBlob).where(FileBlob.sha256.in_(unreferenced)),
+                execution_options={"synchronize_session": False},
+            )
+            await db.commit()
+    return len(unreferenced)
+
+
+async def collect_unreferenced_blobs() -> None:
+    """
+    Background task: remove blobs without references every
+    BLOB_GC_INTERVAL_SECONDS until cancelled.
+    """
+    while True:
+        try:
+            removed = await collect_blobs()
+            if removed:
+                logger.info("Removed %d unreferenced blob(s)", removed)
+        except Exception:
+            logger.exception("Removing unreferenced blobs failed")
+        await asyncio.sleep(settings.BLOB_GC_INTERVAL_SECONDS)
@@ -0,0 +1,72 @@
+from collections import defaultdict
+from typing import List, Optional
+
+from sqlalchemy import literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, joinedload, raiseload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.pagination import paginate
+from app.models.comment import ThesisComment
+
+
+async def load_comment_threads(
+    db: AsyncSession,
+    thesis_id: str,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    max_depth: Optional[int] = None,
+) -> List[ThesisComment]:
+    """
+    Load a page of root comments for a thesis together with all of their
+    replies and authors in a single query.
+
+    Pagination applies to root threads. A recursive CTE walks down from the
+    selected roots, stopping after max_depth levels of replies when given
+    (0 returns the roots alone). The tree is then assembled in memory and
+    attached to each comment's `replies` so serialization needs no further
+    queries.
+    """
+    roots = paginate(
+        select(ThesisComment.id).where(
+            ThesisComment.thesis_id == thesis_id,
+            ThesisComment.parent_id == None
+        ),
+        ThesisComment.created_at,
+        ThesisComment.id,
+        cursor,
+        skip,
+        limit,
+    ).subquery("roots")
+
+    thread = (
+        select(ThesisComment.id, literal(0).label("depth"))
+        .where(ThesisComment.id.in_(select(roots.c.id)))
+        .cte("thread", recursive=True)
+    )
+    child = aliased(ThesisComment)
+    step = select(child.id, thread.c.depth + 1).where(child.parent_id == thread.c.id)
+    if max_depth is not None:
+        step = step.where(thread.c.depth < max_depth)
+    thread = thread.union_all(step)
+
+    rows = (await db.execute(
+        select(ThesisComment, thread.c.depth)
+        .join(thread, thread.c.id == ThesisComment.id)
+        .options(joinedload(ThesisComment.user), raiseload("*"))
+        .order_by(ThesisComment.created_at, ThesisComment.id)
+    )).all()
+
+    roots_page: List[ThesisComment] = []
+    children = defaultdict(list)
+    for comment, depth in rows:
+        if depth == 0:
+            roots_page.append(comment)
+        else:
+            children[comment.parent_id].append(comment)
+
+    for comment, _ in rows:
+        set_committed_value(comment, "replies", children.get(comment.id, []))
+
+    return roots_page
@@ -27,7 +27,100 @@ class Settings(BaseSettings):
             return v
         
         return f"postgresql://{values.get('POSTGRES_USER')}:{values.get('POSTGRES_PASSWORD')}@{values.get('POSTGRES_SERVER')}/{values.get('POSTGRES_DB')}"
+
+    # Async driver URL used by the application; Alembic keeps using DATABASE_URI
+    ASYNC_DATABASE_URI: Optional[str] = None
+
+    @validator("ASYNC_DATABASE_URI", pre=True)
+    def assemble_async_db_connection(cls, v: Optional[str], values: dict) -> str:
+        if isinstance(v, str):
+            return v
+
+        return values["DATABASE_URI"].replace("postgresql://", "postgresql+asyncpg://", 1)
+
+    # Connection pool, per engine and per process: size it so that
+    # pods * workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays below max_connections
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    # Connect through PgBouncer in transaction mode: no application-side pool
+    # and no cached server-side prepared statements
+    DB_PGBOUNCER: bool = False
+    # Bearer token scrapers send to GET /api/v1/metrics/pool; without one
+    # the endpoint is disabled
+    METRICS_TOKEN: Optional[str] = None
+
+    # Optional streaming replica; GET requests read from it when configured
+    REPLICA_DATABASE_URI: Optional[str] = None
+    ASYNC_REPLICA_DATABASE_URI: Optional[str] = None
+    # Seconds a user's reads stay on the primary after they commit a write
+    REPLICA_STICKY_SECONDS: float = 5.0
+
+    @validator("ASYNC_REPLICA_DATABASE_URI", pre=True)
+    def assemble_async_replica_connection(cls, v: Optional[str], values: dict) -> Optional[str]:
+        if isinstance(v, str) or not values.get("REPLICA_DATABASE_URI"):
+            return v
+
+        return values["REPLICA_DATABASE_URI"].replace("postgresql://", "postgresql+asyncpg://", 1)
     
+    # Authenticated-user cache: how long (seconds) a change to a user's role or
+    # active flag made by another process can go unnoticed; 0 disables it
+    USER_CACHE_TTL_SECONDS: float = 30.0
+    USER_CACHE_MAX_ENTRIES: int = 10000
+
+    # Password hashing pool: bcrypt calls run on this many threads, and a
+    # sign-in waiting longer than the timeout for a free one gets a 503
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_TIMEOUT: float = 5.0
+
+    # Upload limits in bytes, enforced while the body streams in
+    MAX_UPLOAD_SIZE: int = 250 * 1024 * 1024
+    MAX_PROFILE_PICTURE_SIZE: int = 5 * 1024 * 1024
+
+    # Blobs are removed right after the commit that drops their last
+    # reference. A sweep this often removes every other blob without
+    # references: those a crash kept from being removed, and the ones an
+    # upload stored before its transaction rolled back
+    BLOB_GC_INTERVAL_SECONDS: int = 3600
+
+    # Resumable uploads: chunk size handed to clients, how long a session
+    # lives after its last chunk, and how often expired sessions are swept.
+    # Chunks wait under UPLOAD_DIR/sessions on local disk, so several backend
+    # instances need UPLOAD_DIR on a shared volume or sticky routing
+    UPLOAD_SESSION_CHUNK_SIZE: int = 8 * 1024 * 1024
+    UPLOAD_SESSION_TTL_SECONDS: int = 24 * 3600
+    UPLOAD_SESSION_GC_INTERVAL_SECONDS: int = 600
+
+    # Attachment previews are rendered once per content and file type and
+    # kept under UPLOAD_DIR/previews, least recently used evicted past this
+    PREVIEW_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024
+
+    # Text extraction and HTML conversion run on a pool of worker processes.
+    # Uploads queue a job that is polled for every few seconds; a job still
+    # running after the timeout (its worker died) is run again
+    PROCESSING_WORKERS: int = 2
+    PROCESSING_POLL_INTERVAL_SECONDS: float = 5.0
+    PROCESSING_JOB_TIMEOUT_SECONDS: int = 600
+    PROCESSING_MAX_ATTEMPTS: int = 3
+    # PDF text is extracted in batches of at most this many pages, spread
+    # over the processing pool; a worker holds one batch of parsed pages
+    PDF_EXTRACT_BATCH_PAGES: int = 32
+
+    # File storage: "local" keeps files under UPLOAD_DIR; "s3" keeps them in
+    # an S3-compatible bucket (AWS, MinIO, ...) and serves downloads through
+    # presigned URLs, with UPLOAD_DIR only holding uploads in progress
+    STORAGE_BACKEND: str = "local"
+    UPLOAD_DIR: str = "/app/uploads"
+    S3_BUCKET: Optional[str] = None
+    # Set for MinIO or another S3-compatible service; unset for AWS
+    S3_ENDPOINT_URL: Optional[str] = None
+    S3_REGION: Optional[str] = None
+    # Unset to use the default AWS credential chain (env, IRSA, instance role)
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    S3_PRESIGNED_URL_EXPIRES_SECONDS: int = 300
+
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:5173", "https://thesistrack.dev"]
 
@@ -42,6 +135,8 @@ class Settings(BaseSettings):
     # Google OAuth
     GOOGLE_CLIENT_ID: Optional[str] = None
     GOOGLE_CLIENT_SECRET: Optional[str] = None
+    # Google's ID-token signing keys; point at a local stand-in for testing
+    GOOGLE_JWKS_URL: str = "https://www.googleapis.com/oauth2/v3/certs"
 
     class Config:
         # Look for .env file in the project root (parent of backend)
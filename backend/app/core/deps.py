@@ -1,27 +1,31 @@
-from typing import Generator, Annotated
+import secrets
+from typing import Generator, Annotated, Optional
 
 from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer, OAuth2PasswordBearer
 from jose import jwt, JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import ValidationError
 
 from app.db.session import get_db
 from app.core.config import settings
+from app.core.user_cache import Principal, get_principal
 from app.models.user import User, UserRole
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login"
 )
 
+metrics_scheme = HTTPBearer(auto_error=False)
+
 # Database dependency
-DB = Annotated[Session, Depends(get_db)]
+DB = Annotated[AsyncSession, Depends(get_db)]
 
 async def get_current_user(
     db: DB, token: Annotated[str, Depends(oauth2_scheme)]
-) -> User:
+) -> Principal:
     """
-    Validate token and return current user.
+    Validate token and return the current user's id, role and active flag.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -36,7 +40,9 @@ async def get_current_user(
     except (JWTError, ValidationError):
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
+    # Lets the session keep this user's reads on the primary after a write
+    db.info["user_id"] = user_id
+    user = await get_principal(db, user_id)
     if user is None:
         raise credentials_exception
     if not user.is_active:
@@ -44,17 +50,26 @@ async def get_current_user(
     return user
 
 # User role dependencies
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
 
-async def get_current_active_user(current_user: CurrentUser) -> User:
+async def get_current_active_user(current_user: CurrentUser) -> Principal:
     """Get the current active user."""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
-CurrentActiveUser = Annotated[User, Depends(get_current_active_user)]
+CurrentActiveUser = Annotated[Principal, Depends(get_current_active_user)]
+
+async def get_current_user_record(db: DB, current_user: CurrentActiveUser) -> User:
+    """Load the full row of the current user, for endpoints that show or edit the profile."""
+    user = await db.get(User, current_user.id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+CurrentUserRecord = Annotated[User, Depends(get_current_user_record)]
 
-async def get_current_student(current_user: CurrentActiveUser) -> User:
+async def get_current_student(current_user: CurrentActiveUser) -> Principal:
     """Get the current student user."""
     if current_user.role != UserRole.student:
         raise HTTPException(
@@ -62,7 +77,7 @@ async def get_current_student(current_user: CurrentActiveUser) -> User:
         )
     return current_user
 
-async def get_current_professor(current_user: CurrentActiveUser) -> User:
+async def get_current_professor(current_user: CurrentActiveUser) -> Principal:
     """Get the current professor user."""
     if current_user.role != UserRole.professor:
         raise HTTPException(
@@ -70,7 +85,7 @@ async def get_current_professor(current_user: CurrentActiveUser) -> User:
         )
     return current_user
 
-async def get_current_graduation_assistant(current_user: CurrentActiveUser) -> User:
+async def get_current_graduation_assistant(current_user: CurrentActiveUser) -> Principal:
     """Get the current graduation assistant user."""
     if current_user.role != UserRole.graduation_assistant:
         raise HTTPException(
@@ -78,10 +93,28 @@ async def get_current_graduation_assistant(current_user: CurrentActiveUser) -> U
         )
     return current_user
 
-async def get_current_reviewer(current_user: CurrentActiveUser) -> User:
+async def get_current_reviewer(current_user: CurrentActiveUser) -> Principal:
     """Get the current reviewer user (professor or graduation assistant)."""
     if current_user.role not in [UserRole.professor, UserRole.graduation_assistant]:
         raise HTTPException(
             status_code=403, detail="The user doesn't have enough privileges"
         )
-    return current_user 
\ No newline at end of file
+    return current_user
+
+async def verify_metrics_token(
+    credentials: Annotated[Optional[HTTPAuthorizationCredentials], Depends(metrics_scheme)]
+) -> None:
+    """
+    Admit internal scrapers that present METRICS_TOKEN. Metrics are not
+    served at all when no token is configured.
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
@@ -0,0 +1,200 @@
+import hashlib
+import os
+import secrets
+from email.utils import formatdate, parsedate_to_datetime
+from typing import List, Mapping, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# More ranges than this in one request are answered with the whole file
+MAX_RANGES = 32
+
+# Headers that describe the body and are left out of 304 and 416 responses
+_BODY_HEADERS = ("content-type", "content-length", "content-disposition")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Parse a Range header into sorted, merged (start, end) byte ranges with an
+    exclusive end. Returns None for a header to ignore (malformed, another
+    unit, too many ranges) and raises RangeNotSatisfiable when no range
+    overlaps the file.
+    """
+    unit, _, specs = header.partition("=")
+    if unit.strip().lower() != "bytes":
+        return None
+    ranges = []
+    for spec in specs.split(","):
+        first, dash, last = spec.strip().partition("-")
+        if not dash:
+            return None
+        try:
+            if first:
+                start = int(first)
+                end = int(last) + 1 if last else size
+                if last and end <= start:
+                    return None
+            else:
+                # Suffix range: the last N bytes
+                suffix = int(last)
+                if suffix < 0:
+                    return None
+                start, end = max(size - suffix, 0), size
+                if suffix == 0:
+                    continue
+        except ValueError:
+            return None
+        if start < size:
+            ranges.append((start, min(end, size)))
+    if not ranges:
+        raise RangeNotSatisfiable()
+    if len(ranges) > MAX_RANGES:
+        return None
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        if start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # Weak comparison, as If-None-Match requires
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def _not_modified(headers: Headers, etag: str, mtime: float) -> bool:
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class RangedFileResponse(Response):
+    """
+    A file response with validators and byte ranges, served by the API.
+
+    Sends a strong ETag (the content hash when known, else derived from
+    mtime and size) and Last-Modified, answers If-None-Match and
+    If-Modified-Since with 304, and serves Range requests as 206 with one
+    range or multipart/byteranges with several. If-Range falls back to the
+    whole file when the client's copy is stale.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        path: "os.PathLike[str] | str",
+        media_type: str,
+        headers: Optional[Mapping[str, str]] = None,
+        etag: Optional[str] = None,
+    ):
+        self.path = path
+        self.status_code = 200
+        self.media_type = media_type
+        self.background = None
+        self.etag = etag
+        self.init_headers(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        stat = await anyio.to_thread.run_sync(os.stat, self.path)
+        size = stat.st_size
+        etag = self.etag or hashlib.md5(f"{stat.st_mtime}-{size}".encode()).hexdigest()
+        etag = f'"{etag}"'
+        last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.headers.setdefault("etag", etag)
+        self.headers.setdefault("last-modified", last_modified)
+        self.headers["accept-ranges"] = "bytes"
+
+        request_headers = Headers(scope=scope)
+        send_body = scope["method"].upper() != "HEAD"
+
+        if _not_modified(request_headers, etag, stat.st_mtime):
+            await self._send_empty(send, 304)
+            return
+
+        ranges = None
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if range_header and (if_range is None or if_range in (etag, last_modified)):
+            try:
+                ranges = parse_range(range_header, size)
+            except RangeNotSatisfiable:
+                await self._send_empty(send, 416, {"content-range": f"bytes */{size}"})
+                return
+
+        if not ranges:
+            parts = [(0, size, b"")]
+            self.headers["content-length"] = str(size)
+            status = 200
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            parts = [(start, end, b"")]
+            self.headers["content-length"] = str(end - start)
+            self.headers["content-range"] = f"bytes {start}-{end - 1}/{size}"
+            status = 206
+        else:
+            boundary = secrets.token_hex(16)
+            content_type = self.headers.get("content-type", "application/octet-stream")
+            parts = [
+                (start, end, (
+                    f"--{boundary}\r\nContent-Type: {content_type}\r\n"
+                    f"Content-Range: bytes {start}-{end - 1}/{size}\r\n\r\n"
+                ).encode("latin-1"))
+                for start, end in ranges
+            ]
+            trailer = f"--{boundary}--\r\n".encode("latin-1")
+            length = sum(len(head) + (end - start) + 2 for start, end, head in parts) + len(trailer)
+            self.headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+            self.headers["content-length"] = str(length)
+            status = 206
+
+        await send({"type": "http.response.start", "status": status, "headers": self.raw_headers})
+        if not send_body:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            for start, end, head in parts:
+                if head:
+                    await send({"type": "http.response.body", "body": head, "more_body": True})
+                await file.seek(start)
+                remaining = end - start
+                while remaining:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                if head:
+                    await send({"type": "http.response.body", "body": b"\r\n", "more_body": True})
+        await send({"type": "http.response.body", "body": trailer if len(parts) > 1 else b""})
+
+    async def _send_empty(self, send: Send, status: int, extra: Optional[Mapping[str, str]] = None) -> None:
+        headers = [
+            (name, value) for name, value in self.raw_headers
+            if name.decode("latin-1") not in _BODY_HEADERS
+        ]
+        headers += [(name.encode("latin-1"), value.encode("latin-1")) for name, value in (extra or {}).items()]
+        if status == 416:
+            headers.append((b"content-length", b"0"))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
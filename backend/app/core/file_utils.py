@@ -1,15 +1,19 @@
 import os
 import shutil
-from typing import Tuple, List, Optional
-from fastapi import UploadFile
+import hashlib
+import tempfile
+from typing import AsyncIterator, Dict, Tuple, List, Optional
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
 import uuid
 from datetime import datetime
 import mimetypes
 from pathlib import Path
 import io
-import base64
 
 from app.core.config import settings
+from app.core.process_pool import run_in_process
+from app.core.storage import get_storage
 
 # Define allowed file extensions
 ALLOWED_EXTENSIONS = {
@@ -28,39 +32,62 @@ ALLOWED_IMAGE_EXTENSIONS = {
     'webp': 'image/webp',
 }
 
-# Base upload directory
-UPLOAD_DIR = Path('/app/uploads')
+# Base upload directory; uploads are written here before they go to storage
+UPLOAD_DIR = Path(settings.UPLOAD_DIR)
 
-async def save_upload_file(upload_file: UploadFile, thesis_id: str) -> Tuple[str, str, int]:
+# Uploads are copied to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+def _write_chunk(buffer, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    buffer.write(chunk)
+
+async def write_stream(chunks: AsyncIterator[bytes], file_path: Path, max_size: int) -> Tuple[int, str]:
     """
-    Save an uploaded file to the appropriate directory.
-    Returns the file path, mimetype, and size.
+    Write a stream of byte chunks to file_path, so memory use does not depend
+    on the file size. The bytes go to a temporary file in the same directory
+    that is renamed into place once complete, so readers never see a partial
+    file. Streams larger than max_size are rejected with 413.
+    Returns the size and the SHA-256 hex digest of the content.
+    """
+    digest = hashlib.sha256()
+    file_size = 0
+    fd, tmp_name = tempfile.mkstemp(dir=file_path.parent, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            async for chunk in chunks:
+                file_size += len(chunk)
+                if file_size > max_size:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File size too large. Maximum size is {round(max_size / (1024 * 1024), 1):g}MB.",
+                    )
+                await run_in_threadpool(_write_chunk, buffer, digest, chunk)
+        os.replace(tmp_name, file_path)
+    except BaseException:
+        # Gone already if the directory was removed meanwhile
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return file_size, digest.hexdigest()
+
+async def _read_chunks(upload_file: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+        yield chunk
+
+async def stream_to_file(upload_file: UploadFile, file_path: Path, max_size: int) -> Tuple[int, str]:
+    """
+    Copy an upload to file_path chunk by chunk, see write_stream.
+    Returns the size and the SHA-256 hex digest of the content.
+    """
+    return await write_stream(_read_chunks(upload_file), file_path, max_size)
+
+def guess_mimetype(filename: str) -> str:
+    """
+    Determine the mimetype of a file from its name.
     """
-    # Create directory structure if it doesn't exist
-    thesis_dir = UPLOAD_DIR / thesis_id
-    thesis_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Generate a unique filename to prevent collisions
-    filename = upload_file.filename
-    base_name, extension = os.path.splitext(filename)
-    unique_filename = f"{base_name}_{uuid.uuid4().hex}{extension}"
-    file_path = thesis_dir / unique_filename
-    
-    # Save the file
-    with open(file_path, "wb") as buffer:
-        content = await upload_file.read()
-        buffer.write(content)
-        file_size = len(content)
-    
-    # Determine mimetype
     mimetype, _ = mimetypes.guess_type(filename)
-    if not mimetype:
-        # Default to binary if type can't be determined
-        mimetype = "application/octet-stream"
-    
-    # Return the relative path from the upload directory
-    relative_path = str(file_path.relative_to(UPLOAD_DIR))
-    return relative_path, mimetype, file_size
+    # Default to binary if type can't be determined
+    return mimetype or "application/octet-stream"
 
 def validate_file_type(filename: str) -> bool:
     """
@@ -76,10 +103,10 @@ def validate_image_type(filename: str) -> bool:
     ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
     return ext in ALLOWED_IMAGE_EXTENSIONS
 
-async def save_profile_picture(upload_file: UploadFile, user_id: str) -> Tuple[str, str, int]:
+async def save_profile_picture(upload_file: UploadFile, user_id: str) -> Tuple[str, str, int, str]:
     """
     Save a profile picture to the appropriate directory.
-    Returns the file path, mimetype, and size.
+    Returns the file path, mimetype, size, and SHA-256 digest.
     """
     # Create directory structure if it doesn't exist
     profile_dir = UPLOAD_DIR / 'profiles'
@@ -91,51 +118,30 @@ async def save_profile_picture(upload_file: UploadFile, user_id: str) -> Tuple[s
     unique_filename = f"{user_id}_profile_{uuid.uuid4().hex}{extension}"
     file_path = profile_dir / unique_filename
     
-    # Save the file
-    with open(file_path, "wb") as buffer:
-        content = await upload_file.read()
-        buffer.write(content)
-        file_size = len(content)
-    
-    # Determine mimetype
-    mimetype, _ = mimetypes.guess_type(filename)
-    if not mimetype:
-        # Default to binary if type can't be determined
-        mimetype = "application/octet-stream"
-    
-    # Return the relative path from the upload directory
+    # Stream the file to disk, then hand it to storage under the same relative path
+    file_size, digest = await stream_to_file(upload_file, file_path, settings.MAX_PROFILE_PICTURE_SIZE)
     relative_path = str(file_path.relative_to(UPLOAD_DIR))
-    return relative_path, mimetype, file_size
+    await get_storage().put(file_path, relative_path)
+    
+    return relative_path, guess_mimetype(filename), file_size, digest
 
-def delete_file(file_path: str) -> bool:
+async def delete_file(file_path: str) -> bool:
     """
-    Delete a file from the filesystem.
+    Delete a file from storage.
     """
     try:
-        full_path = UPLOAD_DIR / file_path
-        if full_path.exists():
-            full_path.unlink()
-            # Check if the directory is empty, and remove it if it is
-            if not any(full_path.parent.iterdir()):
-                full_path.parent.rmdir()
-            return True
-        return False
+        return await get_storage().delete(file_path)
     except Exception:
         return False
 
-def get_file_path(file_path: str) -> Path:
-    """
-    Get the full file path.
-    """
-    return UPLOAD_DIR / file_path
-
-async def extract_text_from_file(file_path: Path) -> Optional[str]:
+def extract_text(file_path: Path, filename: Optional[str] = None) -> Optional[str]:
     """
     Extract text content from a file based on its type.
+    The type comes from filename when given, otherwise from file_path.
     Returns the text content if possible, None otherwise.
     """
     try:
-        ext = file_path.suffix.lower()[1:]  # Remove the leading dot
+        ext = Path(filename or file_path.name).suffix.lower()[1:]  # Remove the leading dot
         
         # For text files, simply read the content
         if ext == 'txt':
@@ -173,7 +179,7 @@ async def extract_text_from_file(file_path: Path) -> Optional[str]:
     except Exception as e:
         return f"Error extracting text: {str(e)}"
 
-async def convert_to_html(file_path: Path) -> Optional[str]:
+def render_html(file_path: Path) -> Optional[str]:
     """
     Convert document to HTML for browser rendering.
     Returns HTML content if possible, None otherwise.
@@ -214,13 +220,37 @@ async def convert_to_html(file_path: Path) -> Optional[str]:
     except Exception as e:
         return f"<p>Error converting to HTML: {str(e)}</p>"
 
-async def get_file_preview(file_path: Path) -> dict:
+def pdf_page_count(file_path: Path) -> Optional[int]:
+    """
+    Number of pages in a PDF, without extracting any text.
+    Returns None if the file cannot be read as a PDF.
+    """
+    try:
+        import PyPDF2
+        with open(file_path, 'rb') as f:
+            return len(PyPDF2.PdfReader(f).pages)
+    except Exception:
+        return None
+
+def extract_pdf_pages(file_path: Path, numbers: List[int]) -> Dict[int, str]:
+    """
+    Extract the text of the given pages (numbered from 1) of a PDF.
+    Only those pages are parsed; the rest of the document is not touched.
+    """
+    import PyPDF2
+    with open(file_path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        return {number: reader.pages[number - 1].extract_text() or "" for number in numbers}
+
+def render_preview(file_path: Path, filename: Optional[str] = None) -> dict:
     """
     Generate preview data for a file based on its type.
+    The type comes from filename when given, otherwise from file_path.
     Returns a dictionary with preview information.
     """
-    ext = file_path.suffix.lower()[1:]
-    mimetype, _ = mimetypes.guess_type(str(file_path))
+    filename = filename or file_path.name
+    ext = Path(filename).suffix.lower()[1:]
+    mimetype, _ = mimetypes.guess_type(filename)
     
     result = {
         "type": ext,
@@ -237,25 +267,18 @@ async def get_file_preview(file_path: Path) -> dict:
             result["content"] = content
             result["html"] = f'<pre style="white-space: pre-wrap;">{content}</pre>'
     
-    # PDF files - base64 encode for data URI
+    # PDF files - the viewer loads the file itself from the download URL,
+    # and text comes page by page from the paged preview
     elif ext == 'pdf':
         result["content_type"] = "pdf"
-        # Object tag for PDF rendering
-        result["html"] = f'<object data="data:{mimetype};base64,CONTENT_PLACEHOLDER" type="application/pdf" width="100%" height="600px"></object>'
-        
-        # Only read the file if needed
-        with open(file_path, 'rb') as f:
-            file_content = f.read()
-            base64_pdf = base64.b64encode(file_content).decode('utf-8')
-            # We'll replace CONTENT_PLACEHOLDER with the actual base64 data
-            result["html"] = result["html"].replace("CONTENT_PLACEHOLDER", base64_pdf)
+        result["page_count"] = pdf_page_count(file_path)
     
     # Word documents - extract text and convert to HTML if possible
     elif ext in ['docx', 'doc']:
         result["content_type"] = "document"
         
         # Extract text (simpler fallback)
-        result["content"] = await extract_text_from_file(file_path)
+        result["content"] = extract_text(file_path, filename)
         
         # Try to convert to HTML (better rendering)
         try:
@@ -271,4 +294,29 @@ async def get_file_preview(file_path: Path) -> dict:
         except Exception as e:
             result["html"] = f"<p>Error generating preview: {str(e)}</p>"
     
-    return result 
\ No newline at end of file
+    return result
+
+# The functions above are CPU-bound and blocking; the async versions below
+# run them on the processing pool so the event loop stays free
+
+async def extract_text_from_file(file_path: Path, filename: Optional[str] = None) -> Optional[str]:
+    if Path(filename or file_path.name).suffix.lower() == '.pdf':
+        # Pages are extracted in batches across the pool
+        from app.core.pdf_extract import extract_pdf_text
+        try:
+            return await extract_pdf_text(file_path)
+        except Exception as e:
+            return f"Error extracting text: {str(e)}"
+    return await run_in_process(extract_text, file_path, filename)
+
+async def convert_to_html(file_path: Path) -> Optional[str]:
+    return await run_in_process(render_html, file_path)
+
+async def get_file_preview(file_path: Path, filename: Optional[str] = None) -> dict:
+    return await run_in_process(render_preview, file_path, filename)
+
+async def get_pdf_page_count(file_path: Path) -> Optional[int]:
+    return await run_in_process(pdf_page_count, file_path)
+
+async def get_pdf_pages(file_path: Path, numbers: List[int]) -> Dict[int, str]:
+    return await run_in_process(extract_pdf_pages, file_path, numbers)
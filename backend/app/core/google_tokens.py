@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Dict, Optional
+
+from authlib.jose import JsonWebKey, JsonWebToken, KeySet
+from authlib.jose.errors import JoseError
+
+from app.core.config import settings
+from app.core.http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_ISSUERS = ["accounts.google.com", "https://accounts.google.com"]
+# Google signs ID tokens with RS256 only; refuse anything else
+google_jwt = JsonWebToken(["RS256"])
+
+# Fetch a fresh key set this long before the cached one expires
+REFRESH_AHEAD_SECONDS = 60
+# Lifetime for a key set served without a max-age
+DEFAULT_MAX_AGE_SECONDS = 300
+# Unknown key ids force a refetch at most this often
+MIN_REFETCH_INTERVAL_SECONDS = 30
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class InvalidIdToken(Exception):
+    pass
+
+
+class CachedKeySet:
+    """
+    A JSON Web Key Set cached for as long as its Cache-Control max-age allows.
+
+    Shortly before expiry a refresh starts in the background while requests
+    keep using the current keys. Concurrent callers share a single fetch.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.fetches = 0
+        self._keys: Optional[KeySet] = None
+        self._expires = 0.0
+        self._fetched = 0.0
+        self._refresh: Optional[asyncio.Task] = None
+
+    async def _fetch(self) -> KeySet:
+        response = await get_http_client().get(self.url)
+        response.raise_for_status()
+        match = _MAX_AGE.search(response.headers.get("cache-control", ""))
+        max_age = int(match.group(1)) if match else DEFAULT_MAX_AGE_SECONDS
+        self._keys = JsonWebKey.import_key_set(response.json())
+        self._fetched = time.monotonic()
+        self._expires = self._fetched + max_age
+        self.fetches += 1
+        return self._keys
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.create_task(self._fetch())
+            self._refresh.add_done_callback(self._log_failure)
+        return self._refresh
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Refreshing JWKS failed: %s", task.exception())
+
+    async def get(self) -> KeySet:
+        remaining = self._expires - time.monotonic()
+        if self._keys is None or remaining <= 0:
+            # shield: a cancelled request must not cancel the shared fetch
+            return await asyncio.shield(self._start_refresh())
+        if remaining < REFRESH_AHEAD_SECONDS:
+            self._start_refresh()
+        return self._keys
+
+    async def refetch(self) -> KeySet:
+        """
+        Fetch again after an unknown key id, e.g. right after Google rotated
+        its keys, unless the current set is itself brand new.
+        """
+        if time.monotonic() - self._fetched < MIN_REFETCH_INTERVAL_SECONDS:
+            return self._keys
+        return await asyncio.shield(self._start_refresh())
+
+
+google_keys = CachedKeySet(settings.GOOGLE_JWKS_URL)
+
+
+async def verify_google_id_token(token: str) -> Dict[str, Any]:
+    """
+    Verify a Google ID token locally against Google's signing keys and
+    return its claims. Raises InvalidIdToken when it does not check out.
+    """
+    claims_options = {
+        "iss": {"essential": True, "values": GOOGLE_ISSUERS},
+        "aud": {"essential": True, "value": settings.GOOGLE_CLIENT_ID},
+        "exp": {"essential": True},
+        "sub": {"essential": True},
+    }
+    keys = await google_keys.get()
+    try:
+        try:
+            claims = google_jwt.decode(token, keys, claims_options=claims_options)
+        except ValueError:
+            # Key id not in the cached set
+            claims = google_jwt.decode(token, await google_keys.refetch(), claims_options=claims_options)
+        claims.validate()
+    except (JoseError, ValueError) as e:
+        raise InvalidIdToken(str(e))
+    return dict(claims)
@@ -0,0 +1,48 @@
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class BodySizeLimitMiddleware:
+    """
+    Reject request bodies larger than max_size while they arrive.
+
+    A declared Content-Length over the limit is answered with 413 before
+    anything is read; otherwise the bytes are counted as they stream in and
+    the request fails with 413 as soon as the limit is crossed, before the
+    multipart parser has spooled the rest to disk.
+    """
+
+    def __init__(self, app: ASGIApp, max_size: int):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        declared = dict(scope["headers"]).get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > self.max_size:
+            response = JSONResponse(
+                {"detail": "Request body too large"},
+                status_code=413,
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_size:
+                    raise HTTPException(
+                        status_code=413,
+                        detail="Request body too large",
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,212 @@
+import hashlib
+import re
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+# Documents are compared as sets of overlapping SHINGLE_WORDS-word phrases.
+# Each set is summarised by a signature of NUM_PERM values; two documents
+# agree on a value with probability equal to the Jaccard similarity of
+# their sets.
+SHINGLE_WORDS = 5
+NUM_PERM = 256
+# The signature is cut into bands of BAND_ROWS values and each band hashed
+# to a bucket; documents sharing any bucket are compared. With 128 bands of
+# two values a pair with Jaccard similarity 0.2 (a third of one thesis
+# copied into another) is a candidate 99% of the time, one with 0.1 72% of
+# the time, while unrelated theses (below 0.01) rarely collide.
+BAND_ROWS = 2
+BANDS = NUM_PERM // BAND_ROWS
+
+# Matching passages shorter than this are left out as common phrasing
+MIN_PASSAGE_WORDS = 15
+
+_BIN_BITS = 57  # Bits of a shingle hash left once its bin is taken off
+# Largest distance to the next filled bin the signature records; farther
+# ones are rare (a handful of shingles) and are stored as this, so every
+# value stays within 64 bits
+_MAX_DISTANCE = (1 << (64 - _BIN_BITS)) - 1
+
+_WORD = re.compile(r"\w+")
+
+
+def _shingle_hash(words: Sequence[str]) -> int:
+    digest = hashlib.blake2b(" ".join(words).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def shingle_hashes(texts: Iterable[str]) -> Set[int]:
+    """
+    64-bit hashes of every SHINGLE_WORDS-word phrase of the text given in
+    parts, e.g. one page at a time. Words are compared case-insensitively
+    and phrases run on across parts.
+    """
+    hashes: Set[int] = set()
+    window: List[str] = []
+    for text in texts:
+        for match in _WORD.finditer(text):
+            window.append(match.group().lower())
+            if len(window) > SHINGLE_WORDS:
+                del window[0]
+            if len(window) == SHINGLE_WORDS:
+                hashes.add(_shingle_hash(window))
+    return hashes
+
+
+def signature(hashes: Set[int]) -> List[int]:
+    """
+    MinHash signature of a set of shingle hashes, by one-permutation
+    hashing: the hashes are split into NUM_PERM bins by their low bits and
+    each bin keeps its smallest value. One pass over the set instead of
+    one per hash function, which pure Python could not afford for a whole
+    thesis. A bin left empty (only in short texts) takes the value of the
+    next filled bin, marked with the distance, so that two texts still
+    agree on it with the right probability.
+    """
+    bins: List[Optional[int]] = [None] * NUM_PERM
+    for value in hashes:
+        index, rest = value % NUM_PERM, value // NUM_PERM
+        current = bins[index]
+        if current is None or rest < current:
+            bins[index] = rest
+    if not hashes:
+        return [0] * NUM_PERM
+    values = []
+    for index in range(NUM_PERM):
+        distance = 0
+        while bins[(index + distance) % NUM_PERM] is None:
+            distance += 1
+        values.append(bins[(index + distance) % NUM_PERM] | min(distance, _MAX_DISTANCE) << _BIN_BITS)
+    return values
+
+
+def pack_signature(values: List[int]) -> bytes:
+    return struct.pack(f"<{len(values)}Q", *values)
+
+
+def unpack_signature(data: bytes) -> List[int]:
+    return list(struct.unpack(f"<{len(data) // 8}Q", data))
+
+
+def band_buckets(values: List[int]) -> List[int]:
+    """
+    One bucket per band of the signature, as signed 64-bit integers. The
+    band number is hashed in, so buckets of different bands never meet.
+    """
+    buckets = []
+    for band in range(BANDS):
+        rows = values[band * BAND_ROWS:(band + 1) * BAND_ROWS]
+        digest = hashlib.blake2b(struct.pack(f"<H{BAND_ROWS}Q", band, *rows), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, "little", signed=True))
+    return buckets
+
+
+def estimate_similarity(a: List[int], b: List[int]) -> float:
+    """
+    Estimated Jaccard similarity of the shingle sets behind two signatures.
+    """
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def estimate_overlap(similarity: float, count: int, other_count: int) -> float:
+    """
+    Estimated share of a document's count shingles that also occur in a
+    document with other_count shingles, from their Jaccard similarity.
+    """
+    if not count:
+        return 0.0
+    shared = similarity * (count + other_count) / (1 + similarity)
+    return min(shared / count, 1.0)
+
+
+def _read_parts(paths: Iterable[Path]) -> Iterator[str]:
+    for path in paths:
+        yield path.read_text(encoding="utf-8")
+
+
+@dataclass
+class Fingerprint:
+    signature: bytes
+    shingle_count: int
+    buckets: List[int]
+
+
+def fingerprint_files(paths: List[Path]) -> Fingerprint:
+    """
+    Signature, shingle count and LSH buckets of the text stored in paths,
+    read one file at a time. A text too short for a single shingle gets no
+    buckets, so it never matches anything.
+    """
+    hashes = shingle_hashes(_read_parts(paths))
+    values = signature(hashes)
+    return Fingerprint(
+        signature=pack_signature(values),
+        shingle_count=len(hashes),
+        buckets=band_buckets(values) if hashes else [],
+    )
+
+
+def _words(text: str) -> List[Tuple[int, int, str]]:
+    return [(m.start(), m.end(), m.group().lower()) for m in _WORD.finditer(text)]
+
+
+def _excerpt(text: str, words: List[Tuple[int, int, str]], first: int, last: int, max_chars: int) -> str:
+    excerpt = text[words[first][0]:words[last][1]]
+    if len(excerpt) > max_chars:
+        excerpt = excerpt[:max_chars].rstrip() + "…"
+    return " ".join(excerpt.split())
+
+
+def find_passages(
+    paths: List[Path], other_paths: List[Path], max_passages: int, max_chars: int
+) -> Tuple[float, List[Dict]]:
+    """
+    Compare the text stored in paths with the text in other_paths, phrase
+    by phrase. Returns the share of the first text's shingles found in the
+    other, and its longest passages (at least MIN_PASSAGE_WORDS words) that
+    also occur there, in document order, each with the matching text of
+    the other document. Passage text is cut to max_chars.
+    """
+    text = "\n".join(_read_parts(paths))
+    other_text = "\n".join(_read_parts(other_paths))
+    words, other_words = _words(text), _words(other_text)
+
+    # First position of each phrase in the other document
+    other_positions: Dict[int, int] = {}
+    for i in range(len(other_words) - SHINGLE_WORDS + 1):
+        key = _shingle_hash([w for _, _, w in other_words[i:i + SHINGLE_WORDS]])
+        other_positions.setdefault(key, i)
+
+    shingles: Set[int] = set()
+    shared: Set[int] = set()
+    # Runs of matching phrases as [first word, last word, position in other]
+    runs: List[List[int]] = []
+    for i in range(len(words) - SHINGLE_WORDS + 1):
+        key = _shingle_hash([w for _, _, w in words[i:i + SHINGLE_WORDS]])
+        shingles.add(key)
+        if key not in other_positions:
+            continue
+        shared.add(key)
+        last = i + SHINGLE_WORDS - 1
+        # A changed word or two does not split a passage
+        if runs and i <= runs[-1][1] + SHINGLE_WORDS:
+            runs[-1][1] = last
+        else:
+            runs.append([i, last, other_positions[key]])
+
+    passages = []
+    for first, last, other_first in runs:
+        length = last - first + 1
+        if length < MIN_PASSAGE_WORDS:
+            continue
+        other_last = min(other_first + length, len(other_words)) - 1
+        passages.append({
+            "text": _excerpt(text, words, first, last, max_chars),
+            "source_text": _excerpt(other_text, other_words, other_first, other_last, max_chars),
+            "word_count": length,
+        })
+    longest = sorted(range(len(passages)), key=lambda n: passages[n]["word_count"], reverse=True)
+    passages = [passages[n] for n in sorted(longest[:max_passages])]
+    overlap = len(shared) / len(shingles) if shingles else 0.0
+    return overlap, passages
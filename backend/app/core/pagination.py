@@ -0,0 +1,76 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import DateTime, Select, tuple_
+
+# Response header carrying the cursor for the page after the current one
+CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: Any, row_id: str) -> str:
+    """
+    Build an opaque cursor token from the last row's sort key and id.
+    """
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_column) -> Tuple[Any, str]:
+    """
+    Decode a cursor token back into a (sort value, id) pair.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if isinstance(sort_column.type, DateTime):
+            sort_value = datetime.fromisoformat(sort_value)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return sort_value, row_id
+
+
+def paginate(
+    query: Select,
+    sort_column,
+    id_column,
+    cursor: Optional[str],
+    skip: int,
+    limit: int,
+    descending: bool = False,
+) -> Select:
+    """
+    Order a query by (sort_column, id_column) and restrict it to one page.
+
+    With a cursor the page starts right after the row the cursor points at
+    (keyset pagination); without one the classic skip offset is applied.
+    """
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor, sort_column)
+        key = tuple_(sort_column, id_column)
+        bound = tuple_(sort_value, row_id)
+        query = query.where(key < bound if descending else key > bound)
+    else:
+        query = query.offset(skip)
+
+    return query.limit(limit)
+
+
+def set_next_cursor(
+    response: Response, items: Sequence[Any], sort_attr: str, limit: int
+) -> None:
+    """
+    Expose the cursor for the following page when this page is full.
+    """
+    if items and len(items) == limit:
+        last = items[-1]
+        response.headers[CURSOR_HEADER] = encode_cursor(getattr(last, sort_attr), last.id)
@@ -0,0 +1,76 @@
+import asyncio
+import math
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from app.core.config import settings
+from app.core.file_utils import get_pdf_page_count, get_pdf_pages
+
+
+def page_batches(numbers: Iterable[int], batch_size: int) -> List[List[int]]:
+    """
+    Split sorted page numbers into batches of at most batch_size pages,
+    each a run of consecutive pages so a worker reads one region of the file.
+    """
+    batches: List[List[int]] = []
+    for number in sorted(set(numbers)):
+        if batches and len(batches[-1]) < batch_size and batches[-1][-1] == number - 1:
+            batches[-1].append(number)
+        else:
+            batches.append([number])
+    return batches
+
+
+async def extract_pages(
+    file_path: Path,
+    numbers: Iterable[int],
+    sink: Callable[[Dict[int, str]], Awaitable[None]],
+) -> None:
+    """
+    Extract the text of the given PDF pages (numbered from 1) on the
+    processing pool and hand each batch to sink as soon as it is done, in
+    whatever order batches finish.
+
+    Pages are split evenly over the workers, in batches of at most
+    PDF_EXTRACT_BATCH_PAGES. Every batch opens the file afresh (about 0.1 s
+    for a 2 MB thesis), so a worker never holds more than one batch of
+    parsed pages. At most two batches per worker are queued or waiting for
+    sink at a time, which bounds the text held here too.
+    """
+    numbers = sorted(set(numbers))
+    batch_size = min(settings.PDF_EXTRACT_BATCH_PAGES, math.ceil(len(numbers) / settings.PROCESSING_WORKERS))
+    batches = page_batches(numbers, max(batch_size, 1))
+    slots = asyncio.Semaphore(settings.PROCESSING_WORKERS * 2)
+
+    async def run(batch: List[int]) -> None:
+        async with slots:
+            pages = await get_pdf_pages(file_path, batch)
+            await sink(pages)
+
+    tasks = [asyncio.create_task(run(batch)) for batch in batches]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        # One failed batch fails the extraction; stop the rest
+        for task in tasks:
+            task.cancel()
+
+
+async def extract_pdf_text(file_path: Path) -> Optional[str]:
+    """
+    The whole text of a PDF, extracted in parallel batches and joined in
+    page order. Returns None if the file cannot be read as a PDF.
+
+    This holds the full text; to go through a large document with bounded
+    memory, use preview_cache.cache_all_pages and iter_cached_text instead.
+    """
+    page_count = await get_pdf_page_count(file_path)
+    if page_count is None:
+        return None
+    pages: Dict[int, str] = {}
+
+    async def collect(extracted: Dict[int, str]) -> None:
+        pages.update(extracted)
+
+    await extract_pages(file_path, range(1, page_count + 1), collect)
+    return "\n".join(pages[number] for number in range(1, page_count + 1))
@@ -0,0 +1,286 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core import file_utils
+from app.core.config import settings
+from app.core.file_utils import get_file_preview
+from app.core.pdf_extract import extract_pages
+from app.core.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+# Previews of blob <sha256> are kept in UPLOAD_DIR/previews/<aa>/<sha256>/<kind>,
+# one entry per file type the content was uploaded as
+PREVIEW_DIR = "previews"
+# Bump when get_file_preview output changes, so older entries are not served
+PREVIEW_VERSION = 2
+# Entries used this recently are never evicted, so a response can still
+# read the entry it was just handed
+EVICTION_GRACE_SECONDS = 60
+
+META_FILE = "meta.json"
+TEXT_FILE = "content.txt"
+HTML_FILE = "preview.html"
+# Text of PDF page <n>, extracted on first request, is kept in pages/<n>.txt
+PAGES_DIR = "pages"
+
+_builds: Dict[Path, "asyncio.Future[Path]"] = {}
+_eviction_lock = asyncio.Lock()
+_eviction_tasks: Set["asyncio.Task[int]"] = set()
+
+
+def preview_root() -> Path:
+    return file_utils.UPLOAD_DIR / PREVIEW_DIR
+
+
+def entry_dir(digest: str, filename: str) -> Path:
+    kind = Path(filename).suffix.lower()[1:] or "none"
+    return preview_root() / digest[:2] / digest / f"{kind}-v{PREVIEW_VERSION}"
+
+
+def preview_etag(entry: Path) -> str:
+    """
+    Validator for a cached preview: it only changes with the content, the
+    file type and PREVIEW_VERSION.
+    """
+    return f"{entry.parent.name}-{entry.name}"
+
+
+def _write_entry(entry: Path, preview: dict) -> None:
+    entry.parent.mkdir(parents=True, exist_ok=True)
+    # Build next to the entry and rename into place, so readers never see a
+    # partial entry
+    staging = Path(tempfile.mkdtemp(dir=entry.parent, prefix=".build-"))
+    try:
+        if preview.get("content") is not None:
+            (staging / TEXT_FILE).write_text(preview["content"], encoding="utf-8")
+        if preview.get("html") is not None:
+            (staging / HTML_FILE).write_text(preview["html"], encoding="utf-8")
+        meta = {key: value for key, value in preview.items() if key not in ("content", "html")}
+        # Written last: an entry counts as complete once its meta file exists
+        (staging / META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+        os.rename(staging, entry)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+        # Another worker renamed its copy into place first
+        if not (entry / META_FILE).is_file():
+            raise
+
+
+def _touch(entry: Path) -> bool:
+    # The meta file's mtime records the last use, for eviction
+    try:
+        os.utime(entry / META_FILE)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+async def _build(entry: Path, file_path: str, filename: str) -> Path:
+    async with get_storage().local_copy(file_path) as local_path:
+        preview = await get_file_preview(local_path, filename)
+    await run_in_threadpool(_write_entry, entry, preview)
+    # Keep a reference so the task is not garbage-collected while running
+    task = asyncio.create_task(evict())
+    _eviction_tasks.add(task)
+    task.add_done_callback(_eviction_tasks.discard)
+    return entry
+
+
+async def get_cached_preview(digest: str, file_path: str, filename: str) -> Path:
+    """
+    Directory holding the preview of the blob with this digest, previewed as
+    the type of filename. Built from the stored file at file_path on first
+    use; concurrent requests for the same entry wait for a single build.
+    Raises FileNotFoundError when the stored file is missing.
+    """
+    entry = entry_dir(digest, filename)
+    if await run_in_threadpool(_touch, entry):
+        return entry
+    build = _builds.get(entry)
+    if build is None:
+        build = asyncio.ensure_future(_build(entry, file_path, filename))
+        _builds[entry] = build
+        build.add_done_callback(lambda _: _builds.pop(entry, None))
+    return await asyncio.shield(build)
+
+
+def read_text(entry: Path) -> Optional[str]:
+    path = entry / TEXT_FILE
+    return path.read_text(encoding="utf-8") if path.is_file() else None
+
+
+def html_path(entry: Path) -> Optional[Path]:
+    path = entry / HTML_FILE
+    return path if path.is_file() else None
+
+
+def read_meta(entry: Path) -> dict:
+    """
+    The preview without its text and HTML: type, mimetype, content_type and,
+    for PDFs, page_count.
+    """
+    return json.loads((entry / META_FILE).read_text(encoding="utf-8"))
+
+
+def read_preview(entry: Path) -> dict:
+    """
+    The preview in the shape returned by get_file_preview.
+    """
+    preview = read_meta(entry)
+    preview["content"] = read_text(entry)
+    html = html_path(entry)
+    preview["html"] = html.read_text(encoding="utf-8") if html else None
+    return preview
+
+
+def _read_pages(entry: Path, numbers: Iterable[int]) -> Dict[int, str]:
+    pages = {}
+    for number in numbers:
+        path = entry / PAGES_DIR / f"{number}.txt"
+        if path.is_file():
+            pages[number] = path.read_text(encoding="utf-8")
+    return pages
+
+
+def _write_pages(entry: Path, pages: Dict[int, str]) -> None:
+    directory = entry / PAGES_DIR
+    directory.mkdir(exist_ok=True)
+    for number, text in pages.items():
+        fd, tmp_name = tempfile.mkstemp(dir=directory, prefix=".page-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_name, directory / f"{number}.txt")
+
+
+async def get_cached_pages(entry: Path, file_path: str, numbers: Iterable[int]) -> Dict[int, str]:
+    """
+    Text of the given pages (numbered from 1) of the PDF previewed in entry.
+    Pages not extracted before are extracted from the stored file at
+    file_path, on the processing pool, and added to the entry.
+    """
+    numbers = list(numbers)
+    pages = await run_in_threadpool(_read_pages, entry, numbers)
+    missing = [number for number in numbers if number not in pages]
+    if missing:
+        async def store(extracted: Dict[int, str]) -> None:
+            await run_in_threadpool(_write_pages, entry, extracted)
+            pages.update(extracted)
+
+        async with get_storage().local_copy(file_path) as local_path:
+            await extract_pages(local_path, missing, store)
+    return pages
+
+
+def _cached_page_numbers(entry: Path) -> Set[int]:
+    directory = entry / PAGES_DIR
+    if not directory.is_dir():
+        return set()
+    return {int(path.stem) for path in directory.glob("*.txt")}
+
+
+async def cache_all_pages(entry: Path, file_path: str) -> int:
+    """
+    Extract every page of the PDF previewed in entry that is not cached yet,
+    writing each batch out as it arrives rather than keeping the text.
+    Returns the number of pages extracted.
+    """
+    page_count = (await run_in_threadpool(read_meta, entry)).get("page_count") or 0
+    missing = set(range(1, page_count + 1)) - await run_in_threadpool(_cached_page_numbers, entry)
+    if missing:
+        async def store(extracted: Dict[int, str]) -> None:
+            await run_in_threadpool(_write_pages, entry, extracted)
+
+        async with get_storage().local_copy(file_path) as local_path:
+            await extract_pages(local_path, missing, store)
+    return len(missing)
+
+
+def iter_cached_text(entry: Path) -> Iterator[str]:
+    """
+    The text of a PDF previewed in entry, one page at a time, after
+    cache_all_pages. Only one page is read into memory at a time.
+    """
+    page_count = read_meta(entry).get("page_count") or 0
+    for number in range(1, page_count + 1):
+        yield (entry / PAGES_DIR / f"{number}.txt").read_text(encoding="utf-8")
+
+
+def text_files(entry: Path) -> List[Path]:
+    """
+    Files holding the extracted text of the preview in entry, in order: the
+    pages of a PDF (after cache_all_pages), otherwise the text file if the
+    preview has one.
+    """
+    meta = read_meta(entry)
+    if meta.get("content_type") == "pdf":
+        return [entry / PAGES_DIR / f"{number}.txt" for number in range(1, (meta.get("page_count") or 0) + 1)]
+    path = entry / TEXT_FILE
+    return [path] if path.is_file() else []
+
+
+def discard_previews(digest: str) -> None:
+    """
+    Remove every cached preview of a blob, e.g. once the blob is deleted.
+    """
+    shutil.rmtree(preview_root() / digest[:2] / digest, ignore_errors=True)
+
+
+def _evict(max_bytes: int) -> int:
+    entries = []
+    total = 0
+    for meta in preview_root().glob(f"*/*/*/{META_FILE}"):
+        entry = meta.parent
+        try:
+            size = sum(path.stat().st_size for path in entry.rglob("*") if path.is_file())
+            entries.append((meta.stat().st_mtime, size, entry))
+        except FileNotFoundError:
+            continue
+        total += size
+    if total <= max_bytes:
+        return 0
+
+    # Least recently used first, down to 90% of the limit so the next few
+    # builds do not each trigger another pass
+    target = max_bytes * 0.9
+    cutoff = time.time() - EVICTION_GRACE_SECONDS
+    removed = 0
+    for used, size, entry in sorted(entries, key=lambda item: item[0]):
+        if total <= target or used > cutoff:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        try:
+            entry.parent.rmdir()
+        except OSError:
+            pass
+        total -= size
+        removed += 1
+    return removed
+
+
+async def evict() -> int:
+    """
+    Remove least recently used previews until the cache is back under
+    PREVIEW_CACHE_MAX_BYTES. Returns the number of entries removed.
+    """
+    if _eviction_lock.locked():
+        # One pass at a time; the next build starts another
+        return 0
+    async with _eviction_lock:
+        try:
+            removed = await run_in_threadpool(_evict, settings.PREVIEW_CACHE_MAX_BYTES)
+        except Exception:
+            logger.exception("Evicting cached previews failed")
+            return 0
+    if removed:
+        logger.info("Evicted %d cached preview(s)", removed)
+    return removed
@@ -0,0 +1,47 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from app.core.config import settings
+
+# PyPDF2, python-docx and mammoth are pure Python and hold the GIL, so
+# document processing runs in worker processes rather than threads. Workers
+# are spawned rather than forked from the running server, and started on
+# first use.
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.PROCESSING_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+async def run_in_process(func: Callable, *args: Any) -> Any:
+    """
+    Run a picklable function on the processing pool without blocking the
+    event loop. A pool broken by a crashed worker is replaced for the next
+    call, and the call that saw it fails.
+    """
+    global _executor
+    executor = get_executor()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+    except BrokenProcessPool:
+        if _executor is executor:
+            _executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+        raise
+
+
+def shutdown_process_pool() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Set, Tuple
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.search import read_indexed_text, store_attachment_text
+from app.core.similarity import attachment_text_files, fingerprint_text, store_fingerprint
+from app.db.session import SessionLocal
+from app.models.attachment import ThesisAttachment
+from app.models.processing_job import JobStatus, ProcessingJob
+
+logger = logging.getLogger(__name__)
+
+# Set when a job is queued in this process, so the worker does not wait for
+# its next poll. Jobs queued by other processes are found by polling.
+_wakeup = asyncio.Event()
+
+
+async def queue_processing(db: AsyncSession, attachment_id: str) -> None:
+    """
+    Queue text extraction and HTML conversion of an attachment's file,
+    restarting any earlier job for it. Part of the caller's transaction;
+    call notify_processing() once it is committed.
+    """
+    # The attachment row must exist before the job can reference it
+    await db.flush()
+    now = datetime.utcnow()
+    await db.execute(
+        insert(ProcessingJob)
+        .values(id=str(uuid.uuid4()), attachment_id=attachment_id, status=JobStatus.pending,
+                attempts=0, created_at=now)
+        .on_conflict_do_update(
+            index_elements=[ProcessingJob.attachment_id],
+            set_={"status": JobStatus.pending, "attempts": 0, "error": None,
+                  "created_at": now, "started_at": None, "finished_at": None},
+        )
+    )
+
+
+def notify_processing() -> None:
+    _wakeup.set()
+
+
+async def claim_job() -> Optional[Tuple[str, str, datetime]]:
+    """
+    Take the oldest pending job, or a running one whose worker has not
+    finished it within PROCESSING_JOB_TIMEOUT_SECONDS. Workers in other
+    processes skip the locked row, so each job is claimed once.
+    Returns the job id, attachment id and claim time.
+    """
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=settings.PROCESSING_JOB_TIMEOUT_SECONDS)
+    next_job = (
+        select(ProcessingJob.id)
+        .where(or_(
+            ProcessingJob.status == JobStatus.pending,
+            and_(ProcessingJob.status == JobStatus.running, ProcessingJob.started_at < stale),
+        ))
+        .order_by(ProcessingJob.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    async with SessionLocal() as db:
+        claimed = (await db.execute(
+            update(ProcessingJob)
+            .where(ProcessingJob.id == next_job)
+            .values(status=JobStatus.running, attempts=ProcessingJob.attempts + 1, started_at=now)
+            .returning(ProcessingJob.id, ProcessingJob.attachment_id),
+            execution_options={"synchronize_session": False},
+        )).first()
+        await db.commit()
+    if claimed is None:
+        return None
+    return claimed.id, claimed.attachment_id, now
+
+
+async def run_job(job_id: str, attachment_id: str, claimed_at: datetime) -> None:
+    """
+    Render the preview of an attachment into the preview cache, and for a
+    PDF the text of every page, on the processing pool, then add its text to
+    the similarity and search indexes. Record the outcome; failed jobs go
+    back to the queue until they have used PROCESSING_MAX_ATTEMPTS attempts.
+    """
+    async with SessionLocal() as db:
+        attachment = await db.get(ThesisAttachment, attachment_id)
+        # Rows without a blob have no cache entry to fill
+        if attachment is not None and attachment.blob_sha256:
+            digest, file_path, filename = attachment.blob_sha256, attachment.file_path, attachment.filename
+        else:
+            digest = None
+        await db.commit()
+
+    status, error, fingerprint, content = JobStatus.done, None, None, None
+    try:
+        if digest:
+            # Paged previews and text consumers then never wait on a page
+            paths = await attachment_text_files(digest, file_path, filename)
+            fingerprint = await fingerprint_text(paths)
+            content = await run_in_threadpool(read_indexed_text, paths)
+    except Exception as e:
+        logger.warning("Processing attachment %s failed: %s", attachment_id, e)
+        status, error = JobStatus.failed, f"{type(e).__name__}: {e}"
+
+    async with SessionLocal() as db:
+        # Matching the claim leaves a job restarted in the meantime, e.g. by
+        # a replaced file, to its new run
+        query = (
+            update(ProcessingJob)
+            .where(
+                ProcessingJob.id == job_id,
+                ProcessingJob.status == JobStatus.running,
+                ProcessingJob.started_at == claimed_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if status == JobStatus.failed:
+            # Retry while attempts are left
+            await db.execute(
+                query.where(ProcessingJob.attempts < settings.PROCESSING_MAX_ATTEMPTS)
+                .values(status=JobStatus.pending, error=error)
+            )
+            query = query.where(ProcessingJob.attempts >= settings.PROCESSING_MAX_ATTEMPTS)
+        result = await db.execute(query.values(status=status, error=error, finished_at=datetime.utcnow()))
+        # Only the current run indexes the file, in the same transaction
+        if fingerprint is not None and result.rowcount:
+            await store_fingerprint(db, attachment_id, fingerprint)
+            await store_attachment_text(db, attachment_id, content)
+        await db.commit()
+
+
+async def process_jobs() -> None:
+    """
+    Background task: run queued processing jobs, PROCESSING_WORKERS at a
+    time, until cancelled. Checks the queue every
+    PROCESSING_POLL_INTERVAL_SECONDS and whenever this process queues a job.
+    """
+    slots = asyncio.Semaphore(settings.PROCESSING_WORKERS)
+    running: Set[asyncio.Task] = set()
+
+    def finished(task: asyncio.Task) -> None:
+        running.discard(task)
+        slots.release()
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Processing job failed", exc_info=task.exception())
+
+    try:
+        while True:
+            await slots.acquire()
+            # Cleared before looking, so a job queued meanwhile is not missed
+            _wakeup.clear()
+            try:
+                claimed = await claim_job()
+            except Exception:
+                logger.exception("Claiming a processing job failed")
+                claimed = None
+            if claimed is None:
+                slots.release()
+                try:
+                    await asyncio.wait_for(_wakeup.wait(), settings.PROCESSING_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            task = asyncio.create_task(run_job(*claimed))
+            running.add(task)
+            task.add_done_callback(finished)
+    finally:
+        # Interrupted jobs are picked up again once their claim times out
+        for task in running:
+            task.cancel()
@@ -0,0 +1,84 @@
+import html
+from pathlib import Path
+from typing import List, Optional
+
+from sqlalchemy import cast, delete, func, insert, literal
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.attachment_text import AttachmentText
+
+# Text search configuration of the search_vector columns and queries. Theses
+# are mostly Bulgarian, which Postgres has no stemmer for: 'simple' only
+# lowercases, so words match in the form they were written. Changing it
+# means rebuilding the generated columns (see migration 007).
+SEARCH_CONFIG = "simple"
+
+# Text beyond this is left out of the search index; a tsvector is limited
+# to 1 MB
+MAX_INDEXED_CHARS = 500_000
+
+# ts_headline marks matches with these, so the rest can be escaped as HTML
+# before they become <mark> tags. It gets the text with '<' swapped for
+# _LT, which the parser cannot take for the start of an HTML tag (see the
+# search_vector columns)
+_START, _STOP, _LT = "\ue000", "\ue001", "\ue002"
+_MARKERS = f'StartSel="{_START}", StopSel="{_STOP}"'
+
+
+def search_config():
+    return cast(literal(SEARCH_CONFIG), REGCONFIG)
+
+
+def search_query(q: str):
+    """
+    Query from user input in web search syntax: words, "quoted phrases",
+    OR and -excluded words.
+    """
+    return func.websearch_to_tsquery(search_config(), q)
+
+
+def rank(vector, query):
+    # Normalised by the log of the document length, so a long thesis does
+    # not outrank a short one for mentioning a word more often
+    return func.ts_rank(vector, query, 1)
+
+
+def headline(text, query, options: str):
+    # Text extracted from symbol fonts can hold the markers themselves
+    text = func.replace(func.translate(text, _START + _STOP + _LT, ""), "<", _LT)
+    return func.ts_headline(search_config(), text, query, f"{options}, {_MARKERS}")
+
+
+def render_highlight(value: Optional[str]) -> Optional[str]:
+    """
+    HTML for a ts_headline result: the text escaped, matches in <mark>.
+    """
+    if value is None:
+        return None
+    value = html.escape(value.replace(_LT, "<"))
+    return value.replace(_START, "<mark>").replace(_STOP, "</mark>")
+
+
+def read_indexed_text(paths: List[Path]) -> str:
+    """
+    Text of the files in order, up to MAX_INDEXED_CHARS.
+    """
+    parts, size = [], 0
+    for path in paths:
+        part = path.read_text(encoding="utf-8")[:MAX_INDEXED_CHARS - size]
+        parts.append(part)
+        size += len(part) + 1
+        if size >= MAX_INDEXED_CHARS:
+            break
+    # Postgres text cannot hold NUL, which some PDFs extract to
+    return "\n".join(parts).replace("\x00", "")
+
+
+async def store_attachment_text(db: AsyncSession, attachment_id: str, content: str) -> None:
+    """
+    Replace the indexed text of an attachment. Part of the caller's
+    transaction.
+    """
+    await db.execute(delete(AttachmentText).where(AttachmentText.attachment_id == attachment_id))
+    await db.execute(insert(AttachmentText).values(attachment_id=attachment_id, content=content))
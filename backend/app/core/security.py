@@ -1,12 +1,38 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from fastapi import HTTPException, status
 from jose import jwt
 from passlib.context import CryptContext
-from typing import Any, Union, Optional
+from typing import Any, Callable, Union, Optional
 
 from app.core.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt releases the GIL, so hashing on a small thread pool keeps the event
+# loop free while still using several cores. The semaphore caps the hashes
+# in flight; callers that cannot get a slot in time are turned away.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_hash_slots = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS)
+
+
+async def _run_hash(func: Callable, *args: Any) -> Any:
+    try:
+        await asyncio.wait_for(_hash_slots.acquire(), settings.PASSWORD_HASH_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-ins in progress, please try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_slots.release()
+
 
 def create_access_token(
     subject: Union[str, Any], expires_delta: Optional[timedelta] = None
@@ -25,15 +51,15 @@ def create_access_token(
     return encoded_jwt
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
-    Verify a password against a hash.
+    Verify a password against a hash on the password hashing pool.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return await _run_hash(pwd_context.verify, plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
+async def get_password_hash(password: str) -> str:
     """
-    Hash a password for storing.
+    Hash a password for storing on the password hashing pool.
     """
-    return pwd_context.hash(password) 
\ No newline at end of file
+    return await _run_hash(pwd_context.hash, password) 
\ No newline at end of file
@@ -0,0 +1,132 @@
+import asyncio
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core import minhash
+from app.core.preview_cache import cache_all_pages, get_cached_preview, read_meta, text_files
+from app.core.process_pool import run_in_process
+from app.models.attachment import ThesisAttachment
+from app.models.similarity import SimilarityBucket, SimilaritySignature
+from app.models.thesis import Thesis
+
+# File types whose extracted text is compared; for .doc files the preview
+# only holds a placeholder message
+INDEXED_TYPES = {"pdf", "docx", "txt"}
+
+# Most candidates taken from the index, those sharing the most buckets
+# first; they are ranked by estimated overlap before any text is compared
+MAX_CANDIDATES = 200
+
+
+async def attachment_text_files(digest: str, file_path: str, filename: str) -> List[Path]:
+    """
+    Files holding the extracted text of an attachment's blob, from the
+    preview cache (built, and for a PDF every page extracted, if need be).
+    Empty for file types that are not compared.
+    """
+    entry = await get_cached_preview(digest, file_path, filename)
+    meta = await run_in_threadpool(read_meta, entry)
+    if meta.get("type") not in INDEXED_TYPES:
+        return []
+    if meta.get("content_type") == "pdf":
+        await cache_all_pages(entry, file_path)
+    return await run_in_threadpool(text_files, entry)
+
+
+async def fingerprint_text(paths: List[Path]) -> minhash.Fingerprint:
+    return await run_in_process(minhash.fingerprint_files, paths)
+
+
+async def store_fingerprint(db: AsyncSession, attachment_id: str, fingerprint: minhash.Fingerprint) -> None:
+    """
+    Replace the attachment's signature and its rows in the LSH index.
+    Part of the caller's transaction.
+    """
+    # Removes the old buckets too
+    await db.execute(delete(SimilaritySignature).where(SimilaritySignature.attachment_id == attachment_id))
+    await db.execute(insert(SimilaritySignature).values(
+        attachment_id=attachment_id,
+        signature=fingerprint.signature,
+        shingle_count=fingerprint.shingle_count,
+    ))
+    if fingerprint.buckets:
+        await db.execute(insert(SimilarityBucket), [
+            {"bucket": bucket, "attachment_id": attachment_id} for bucket in fingerprint.buckets
+        ])
+
+
+async def find_similar(db: AsyncSession, attachment: ThesisAttachment, limit: int) -> Optional[List[Dict]]:
+    """
+    Attachments of other theses whose text likely overlaps the attachment's,
+    found through the LSH index without scanning the corpus. Returns up to
+    limit matches, most overlapping first, each with the attachment, its
+    thesis title, and the estimated similarity and overlap; None if the
+    attachment has not been indexed yet.
+    """
+    own = await db.get(SimilaritySignature, attachment.id)
+    if own is None:
+        return None
+
+    # The attachment's own buckets first, so finding the others is an index
+    # scan of the primary key, even when the table's statistics are stale
+    buckets = (await db.scalars(
+        select(SimilarityBucket.bucket).where(SimilarityBucket.attachment_id == attachment.id)
+    )).all()
+    hits = (await db.execute(
+        select(SimilarityBucket.attachment_id, func.count())
+        .where(SimilarityBucket.bucket.in_(buckets), SimilarityBucket.attachment_id != attachment.id)
+        .group_by(SimilarityBucket.attachment_id)
+        .order_by(func.count().desc())
+        .limit(MAX_CANDIDATES)
+    )).all()
+    rows = (await db.execute(
+        select(ThesisAttachment, Thesis.title, SimilaritySignature.signature, SimilaritySignature.shingle_count)
+        .join(SimilaritySignature, SimilaritySignature.attachment_id == ThesisAttachment.id)
+        .join(Thesis, Thesis.id == ThesisAttachment.thesis_id)
+        .where(
+            ThesisAttachment.id.in_([attachment_id for attachment_id, _ in hits]),
+            # Earlier versions of the same thesis are not plagiarism
+            ThesisAttachment.thesis_id != attachment.thesis_id,
+        )
+    )).all() if hits else []
+
+    values = minhash.unpack_signature(own.signature)
+    matches = []
+    for other, title, signature, shingle_count in rows:
+        similarity = minhash.estimate_similarity(values, minhash.unpack_signature(signature))
+        matches.append({
+            "attachment": other,
+            "thesis_title": title,
+            "similarity": similarity,
+            "overlap": minhash.estimate_overlap(similarity, own.shingle_count, shingle_count),
+        })
+    matches.sort(key=lambda match: match["overlap"], reverse=True)
+    return matches[:limit]
+
+
+async def compare_texts(
+    attachment: ThesisAttachment, others: List[ThesisAttachment], max_passages: int, max_chars: int
+) -> List[Optional[Dict]]:
+    """
+    Compare the attachment's text with each of the others on the processing
+    pool. Returns, for each, the exact share of the attachment's text found
+    in the other and the passages they share (see minhash.find_passages),
+    or None if the other's file is missing.
+    """
+    paths = await attachment_text_files(attachment.blob_sha256, attachment.file_path, attachment.filename)
+
+    async def compare(other: ThesisAttachment) -> Optional[Dict]:
+        try:
+            other_paths = await attachment_text_files(other.blob_sha256, other.file_path, other.filename)
+        except FileNotFoundError:
+            return None
+        overlap, passages = await run_in_process(
+            minhash.find_passages, paths, other_paths, max_passages, max_chars
+        )
+        return {"overlap": overlap, "passages": passages}
+
+    return list(await asyncio.gather(*(compare(other) for other in others)))
@@ -0,0 +1,214 @@
+import os
+import shutil
+import tempfile
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from fastapi import Response
+from fastapi.responses import RedirectResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.file_response import RangedFileResponse
+
+
+def content_disposition(filename: Optional[str], inline: bool) -> Optional[str]:
+    if filename is None:
+        return None
+    return f"{'inline' if inline else 'attachment'}; filename={filename}"
+
+
+class StorageBackend:
+    """
+    Where uploaded files live. Files are addressed by keys, the relative
+    paths stored on the rows (e.g. "blobs/ab/ab12..." or "profiles/x.png").
+    """
+
+    async def put(self, source: Path, key: str) -> None:
+        """
+        Move a finished local file into storage under key.
+        """
+        raise NotImplementedError
+
+    async def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> bool:
+        """
+        Remove a stored file. Returns whether the key was found.
+        """
+        raise NotImplementedError
+
+    def local_copy(self, key: str):
+        """
+        Async context manager yielding a readable local path for key, for
+        processing such as previews. Raises FileNotFoundError when missing.
+        """
+        raise NotImplementedError
+
+    async def download_response(
+        self,
+        key: str,
+        media_type: str,
+        filename: Optional[str] = None,
+        inline: bool = False,
+        cache_control: Optional[str] = None,
+        etag: Optional[str] = None,
+    ) -> Optional[Response]:
+        """
+        Response that gets the file to the client, or None when the backend
+        can tell the file is missing. etag is a strong validator for the
+        content, such as its hash.
+        """
+        raise NotImplementedError
+
+
+class LocalStorage(StorageBackend):
+    """
+    Files on a local or mounted filesystem, streamed by the API itself with
+    ETags, conditional GET and byte ranges.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path(self, key: str) -> Path:
+        return self.root / key
+
+    async def put(self, source: Path, key: str) -> None:
+        target = self.path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(source, target)
+
+    async def exists(self, key: str) -> bool:
+        return self.path(key).is_file()
+
+    async def delete(self, key: str) -> bool:
+        try:
+            self.path(key).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    @asynccontextmanager
+    async def local_copy(self, key: str) -> AsyncIterator[Path]:
+        path = self.path(key)
+        if not path.is_file():
+            raise FileNotFoundError(key)
+        yield path
+
+    async def download_response(self, key, media_type, filename=None, inline=False, cache_control=None, etag=None):
+        path = self.path(key)
+        if not path.is_file():
+            return None
+        headers = {}
+        disposition = content_disposition(filename, inline)
+        if disposition:
+            headers["Content-Disposition"] = disposition
+        if cache_control:
+            headers["Cache-Control"] = cache_control
+        return RangedFileResponse(path, media_type=media_type, headers=headers, etag=etag)
+
+
+class S3Storage(StorageBackend):
+    """
+    Files in an S3-compatible bucket. Downloads redirect to presigned URLs,
+    so the bytes go straight from the bucket to the client.
+
+    boto3 is blocking, so every call runs on the thread pool; its client is
+    thread-safe and shared.
+    """
+
+    def __init__(self, bucket: str, expires: int, **client_options):
+        # Only needed with this backend
+        import boto3
+        from botocore.config import Config
+
+        self.bucket = bucket
+        self.expires = expires
+        self.client = boto3.client(
+            "s3",
+            config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+            **client_options,
+        )
+
+    async def put(self, source: Path, key: str) -> None:
+        # upload_file switches to multipart for large files
+        await run_in_threadpool(self.client.upload_file, str(source), self.bucket, key)
+        source.unlink()
+
+    async def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            await run_in_threadpool(self.client.head_object, Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    async def delete(self, key: str) -> bool:
+        # S3 deletes are idempotent and do not report whether the key existed
+        await run_in_threadpool(self.client.delete_object, Bucket=self.bucket, Key=key)
+        return True
+
+    @asynccontextmanager
+    async def local_copy(self, key: str) -> AsyncIterator[Path]:
+        from botocore.exceptions import ClientError
+
+        workdir = tempfile.mkdtemp()
+        path = Path(workdir) / Path(key).name
+        try:
+            try:
+                await run_in_threadpool(self.client.download_file, self.bucket, key, str(path))
+            except ClientError as e:
+                if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                    raise FileNotFoundError(key)
+                raise
+            yield path
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    async def download_response(self, key, media_type, filename=None, inline=False, cache_control=None, etag=None):
+        # The bucket serves ranges, ETags and conditional requests itself
+        params = {"Bucket": self.bucket, "Key": key, "ResponseContentType": media_type}
+        disposition = content_disposition(filename, inline)
+        if disposition:
+            params["ResponseContentDisposition"] = disposition
+        if cache_control:
+            params["ResponseCacheControl"] = cache_control
+        # Signing is local, no request to the bucket
+        url = self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=self.expires)
+        return RedirectResponse(url, status_code=307)
+
+
+_storage: Optional[StorageBackend] = None
+
+
+def create_storage() -> StorageBackend:
+    if settings.STORAGE_BACKEND == "s3":
+        if not settings.S3_BUCKET:
+            raise RuntimeError("STORAGE_BACKEND=s3 needs S3_BUCKET")
+        return S3Storage(
+            settings.S3_BUCKET,
+            settings.S3_PRESIGNED_URL_EXPIRES_SECONDS,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region_name=settings.S3_REGION,
+            aws_access_key_id=settings.S3_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+        )
+    if settings.STORAGE_BACKEND != "local":
+        raise RuntimeError(f"Unknown STORAGE_BACKEND {settings.STORAGE_BACKEND!r}")
+    return LocalStorage(Path(settings.UPLOAD_DIR))
+
+
+def get_storage() -> StorageBackend:
+    """
+    The configured storage backend, created on first use.
+    """
+    global _storage
+    if _storage is None:
+        _storage = create_storage()
+    return _storage
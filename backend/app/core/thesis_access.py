@@ -0,0 +1,98 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import ColumnElement, event, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.user_cache import Principal
+from app.models.thesis import Thesis, ThesisStatus
+from app.models.user import UserRole
+
+# Key of the per-session memo of access projections in Session.info
+_MEMO_KEY = "thesis_access"
+
+
+@dataclass(frozen=True)
+class ThesisAccess:
+    """
+    The fields of a thesis that authorization checks look at.
+    """
+    id: str
+    student_id: str
+    supervisor_id: Optional[str]
+    status: ThesisStatus
+
+    def is_owner(self, user: Principal) -> bool:
+        return user.id == self.student_id
+
+    def is_supervisor(self, user: Principal) -> bool:
+        return user.id == self.supervisor_id
+
+    def can_view(self, user: Principal) -> bool:
+        """
+        Students can view their own theses, professors and assistants any.
+        Same rule as viewable_by.
+        """
+        return user.role != UserRole.student or self.is_owner(user)
+
+
+async def get_thesis_access(db: AsyncSession, thesis_id: str) -> Optional[ThesisAccess]:
+    """
+    Return the access fields of a thesis, or None if it does not exist.
+
+    Reads four columns by primary key instead of the whole row, and
+    remembers the answer for the rest of the session, which is the request.
+    """
+    memo = db.info.setdefault(_MEMO_KEY, {})
+    access = memo.get(thesis_id)
+    if access is None:
+        row = (await db.execute(
+            select(Thesis.id, Thesis.student_id, Thesis.supervisor_id, Thesis.status).where(Thesis.id == thesis_id)
+        )).first()
+        if row is None:
+            return None
+        access = memo[thesis_id] = ThesisAccess(*row)
+    return access
+
+
+async def thesis_access_or_404(db: AsyncSession, thesis_id: str) -> ThesisAccess:
+    access = await get_thesis_access(db, thesis_id)
+    if access is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Thesis not found",
+        )
+    return access
+
+
+def viewable_by(user: Principal) -> ColumnElement[bool]:
+    """
+    SQL form of ThesisAccess.can_view, for filtering queries over Thesis.
+    """
+    if user.role == UserRole.student:
+        return Thesis.student_id == user.id
+    return true()
+
+
+def listed_for(user: Principal, supervisor_id: Optional[str] = None) -> ColumnElement[bool]:
+    """
+    The theses GET /theses/ lists for the user: a student's own, the ones a
+    professor supervises, and for assistants all of them, optionally only
+    those of one supervisor.
+    """
+    if user.role == UserRole.professor:
+        return Thesis.supervisor_id == user.id
+    if user.role != UserRole.student and supervisor_id is not None:
+        return Thesis.supervisor_id == supervisor_id
+    return viewable_by(user)
+
+
+@event.listens_for(Session, "after_flush")
+def _forget_changed_theses(session, flush_context):
+    memo = session.info.get(_MEMO_KEY)
+    if memo:
+        for obj in (*session.dirty, *session.deleted):
+            if isinstance(obj, Thesis):
+                memo.pop(obj.id, None)
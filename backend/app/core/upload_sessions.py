@@ -0,0 +1,167 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator, Dict, List
+
+from fastapi import HTTPException
+from sqlalchemy import delete, select
+from starlette.concurrency import run_in_threadpool
+
+from app.core import file_utils
+from app.core.config import settings
+from app.core.file_utils import UPLOAD_CHUNK_SIZE, write_stream
+from app.db.session import SessionLocal
+from app.models.upload_session import UploadSession
+
+logger = logging.getLogger(__name__)
+
+# Chunks of session <id> are kept in UPLOAD_DIR/sessions/<id>/<index>. This
+# is local disk whatever STORAGE_BACKEND is, so with several backend
+# instances UPLOAD_DIR has to be a volume they share, or every request of an
+# upload has to reach the same instance.
+SESSION_DIR = "sessions"
+
+
+def session_dir(session_id: str) -> Path:
+    return file_utils.UPLOAD_DIR / SESSION_DIR / session_id
+
+
+def chunk_count(session: UploadSession) -> int:
+    return math.ceil(session.file_size / session.chunk_size)
+
+
+def expected_chunk_size(session: UploadSession, index: int) -> int:
+    return min(session.chunk_size, session.file_size - index * session.chunk_size)
+
+
+def next_expiry() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=settings.UPLOAD_SESSION_TTL_SECONDS)
+
+
+def received_chunks(session_id: str) -> Dict[int, int]:
+    """
+    Sizes of the chunks stored for a session so far, by index.
+    """
+    directory = session_dir(session_id)
+    if not directory.is_dir():
+        return {}
+    return {
+        int(entry.name): entry.stat().st_size
+        for entry in os.scandir(directory)
+        if entry.name.isdigit()
+    }
+
+
+async def receive_chunk(session: UploadSession, index: int, chunks: AsyncIterator[bytes], sha256: str) -> Path:
+    """
+    Write chunk index of a session from a byte stream to a temporary file
+    next to its chunks, checking its size and SHA-256 digest. Returns the
+    file for keep_chunk; the caller removes it if the chunk is not kept.
+    """
+    expected = expected_chunk_size(session, index)
+    directory = session_dir(session.id)
+    directory.mkdir(parents=True, exist_ok=True)
+    # Not a digit-only name, so it is not counted until kept
+    incoming = directory / f"{index}.{uuid.uuid4().hex}"
+    try:
+        size, digest = await write_stream(chunks, incoming, expected)
+    except FileNotFoundError:
+        # The upload was completed or aborted and its directory removed
+        raise HTTPException(
+            status_code=404,
+            detail="Upload session not found or expired",
+        )
+    if size != expected or digest != sha256.lower():
+        incoming.unlink()
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Chunk {index} must be {expected} bytes, got {size}" if size != expected
+                else f"Checksum mismatch for chunk {index}"
+            ),
+        )
+    return incoming
+
+
+def keep_chunk(session_id: str, index: int, incoming: Path) -> None:
+    """
+    Store a received chunk under its index. Sending a chunk again replaces it.
+    """
+    os.replace(incoming, session_dir(session_id) / str(index))
+
+
+def _concatenate(paths: List[Path], target: Path) -> str:
+    digest = hashlib.sha256()
+    with open(target, "wb") as out:
+        for path in paths:
+            with open(path, "rb") as chunk:
+                while block := chunk.read(UPLOAD_CHUNK_SIZE):
+                    digest.update(block)
+                    out.write(block)
+    return digest.hexdigest()
+
+
+async def assemble(session: UploadSession, target: Path) -> str:
+    """
+    Join the chunks of a complete session into target, in order.
+    Returns the SHA-256 hex digest of the result.
+    """
+    directory = session_dir(session.id)
+    paths = [directory / str(index) for index in range(chunk_count(session))]
+    try:
+        return await run_in_threadpool(_concatenate, paths, target)
+    except BaseException:
+        target.unlink(missing_ok=True)
+        raise
+
+
+def remove_session_files(session_id: str) -> None:
+    shutil.rmtree(session_dir(session_id), ignore_errors=True)
+
+
+async def purge_expired_sessions() -> int:
+    """
+    Delete expired upload sessions with their chunks, and chunk directories
+    left without a session (completed or aborted elsewhere, or the thesis
+    was deleted). Returns the number of sessions removed.
+    """
+    async with SessionLocal() as db:
+        expired = (await db.scalars(
+            delete(UploadSession)
+            .where(UploadSession.expires_at < datetime.utcnow())
+            .returning(UploadSession.id),
+            execution_options={"synchronize_session": False},
+        )).all()
+        await db.commit()
+
+        root = file_utils.UPLOAD_DIR / SESSION_DIR
+        on_disk = [entry.name for entry in os.scandir(root) if entry.is_dir()] if root.is_dir() else []
+        live = set()
+        if on_disk:
+            live = set((await db.scalars(
+                select(UploadSession.id).where(UploadSession.id.in_(on_disk))
+            )).all())
+    for session_id in set(expired) | (set(on_disk) - live):
+        await run_in_threadpool(remove_session_files, session_id)
+    return len(expired)
+
+
+async def collect_upload_sessions() -> None:
+    """
+    Background task: purge expired upload sessions every
+    UPLOAD_SESSION_GC_INTERVAL_SECONDS until cancelled.
+    """
+    while True:
+        try:
+            removed = await purge_expired_sessions()
+            if removed:
+                logger.info("Removed %d expired upload session(s)", removed)
+        except Exception:
+            logger.exception("Purging expired upload sessions failed")
+        await asyncio.sleep(settings.UPLOAD_SESSION_GC_INTERVAL_SECONDS)
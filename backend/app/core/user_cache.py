@@ -0,0 +1,98 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.user import User, UserRole
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    The authenticated user as seen by authorization checks.
+    """
+    id: str
+    role: UserRole
+    is_active: bool
+
+
+class UserCache:
+    """
+    Bounded LRU cache of principals with a time-to-live.
+
+    Changes made through this process are invalidated on commit. Changes
+    made elsewhere (another worker or pod) are picked up once the entry
+    expires, so the TTL bounds how long a stale role or active flag lasts.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+
+    def get(self, user_id: str) -> Optional[Principal]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires, principal = entry
+        if expires <= time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return principal
+
+    def put(self, principal: Principal) -> None:
+        if self.ttl <= 0:
+            return
+        self._entries[principal.id] = (time.monotonic() + self.ttl, principal)
+        self._entries.move_to_end(principal.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+user_cache = UserCache(settings.USER_CACHE_TTL_SECONDS, settings.USER_CACHE_MAX_ENTRIES)
+
+
+async def get_principal(db: AsyncSession, user_id: str) -> Optional[Principal]:
+    """
+    Return the principal for a user id, from the cache when possible.
+    """
+    principal = user_cache.get(user_id)
+    if principal is None:
+        row = (await db.execute(
+            select(User.id, User.role, User.is_active).where(User.id == user_id)
+        )).first()
+        if row is None:
+            return None
+        principal = Principal(*row)
+        user_cache.put(principal)
+    return principal
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    changed = {obj.id for obj in (*session.dirty, *session.deleted) if isinstance(obj, User)}
+    if changed:
+        session.info.setdefault("changed_users", set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop("changed_users", ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_changed_users(session, previous_transaction):
+    session.info.pop("changed_users", None)
@@ -5,6 +5,11 @@ from app.models.user import User  # noqa
 from app.models.thesis import Thesis  # noqa
 from app.models.comment import ThesisComment  # noqa
 from app.models.attachment import ThesisAttachment  # noqa
+from app.models.attachment_text import AttachmentText  # noqa
+from app.models.blob import FileBlob  # noqa
+from app.models.upload_session import UploadSession  # noqa
+from app.models.processing_job import ProcessingJob  # noqa
+from app.models.similarity import SimilaritySignature, SimilarityBucket  # noqa
 from app.models.committee import ThesisCommitteeMember  # noqa
 from app.models.event import Event  # noqa
 from app.models.deadline import Deadline  # noqa 
\ No newline at end of file
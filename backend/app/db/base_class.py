@@ -1,4 +1,6 @@
-from typing import Any
+from datetime import datetime, timezone
+from typing import Any, Optional
+from sqlalchemy import DateTime, event
 from sqlalchemy.ext.declarative import as_declarative, declared_attr
 
 
@@ -10,4 +12,31 @@ class Base:
     # Generate __tablename__ automatically based on class name
     @declared_attr
     def __tablename__(cls) -> str:
-        return cls.__name__.lower() 
\ No newline at end of file
+        return cls.__name__.lower()
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Convert an aware datetime to the naive UTC form the columns store.
+    """
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+@event.listens_for(Base, "before_insert", propagate=True)
+@event.listens_for(Base, "before_update", propagate=True)
+def normalize_datetimes(mapper, connection, target) -> None:
+    """
+    Store timezone-aware datetimes as naive UTC.
+
+    Columns are TIMESTAMP WITHOUT TIME ZONE holding UTC values, and asyncpg
+    refuses aware datetimes for them instead of silently dropping the offset.
+    """
+    for attr in mapper.column_attrs:
+        column = attr.columns[0]
+        if not isinstance(column.type, DateTime) or column.type.timezone:
+            continue
+        value = getattr(target, attr.key, None)
+        if value is not None and value.tzinfo is not None:
+            setattr(target, attr.key, naive_utc(value))
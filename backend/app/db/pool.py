@@ -0,0 +1,107 @@
+import time
+from typing import Any, Dict
+from uuid import uuid4
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.core.config import settings
+
+
+class CheckoutTimer:
+    """
+    Pool mixin that measures how long callers wait for a connection.
+
+    The wait covers queueing for a free connection as well as opening a new
+    one, which is what a request actually experiences at checkout.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.checkout_timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.checkouts += 1
+            self.checkout_wait_total += waited
+            self.checkout_wait_max = max(self.checkout_wait_max, waited)
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool; keep the counters monotonic
+        pool = super().recreate()
+        pool.checkouts = self.checkouts
+        pool.checkout_timeouts = self.checkout_timeouts
+        pool.checkout_wait_total = self.checkout_wait_total
+        pool.checkout_wait_max = self.checkout_wait_max
+        return pool
+
+
+class TimedQueuePool(CheckoutTimer, AsyncAdaptedQueuePool):
+    pass
+
+
+class TimedNullPool(CheckoutTimer, NullPool):
+    pass
+
+
+def engine_options() -> Dict[str, Any]:
+    """
+    Keyword arguments for create_async_engine derived from Settings.
+
+    In PgBouncer mode connections are not pooled in the application (PgBouncer
+    does that) and asyncpg's statement caches are disabled, with unique names
+    for the statements it still prepares, so transaction pooling never sees a
+    statement prepared on another client's server connection.
+    """
+    if settings.DB_PGBOUNCER:
+        return {
+            "poolclass": TimedNullPool,
+            "connect_args": {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            },
+        }
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_pre_ping": True,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+
+def pool_metrics(engine: AsyncEngine) -> Dict[str, Any]:
+    """
+    Current occupancy and cumulative checkout statistics for an engine's pool.
+    """
+    pool = engine.pool
+    metrics: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        metrics.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+        )
+    if isinstance(pool, CheckoutTimer):
+        metrics.update(
+            checkouts=pool.checkouts,
+            checkout_timeouts=pool.checkout_timeouts,
+            checkout_wait_seconds_total=round(pool.checkout_wait_total, 6),
+            checkout_wait_seconds_max=round(pool.checkout_wait_max, 6),
+        )
+    return metrics
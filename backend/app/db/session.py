@@ -1,18 +1,103 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import time
+from typing import Dict, Optional
+
+from fastapi import Request
+from sqlalchemy import Delete, Insert, Update, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.db.pool import engine_options
+
+engine = create_async_engine(settings.ASYNC_DATABASE_URI, **engine_options())
+# Optional read replica; without one every statement goes to the primary
+replica_engine = (
+    create_async_engine(settings.ASYNC_REPLICA_DATABASE_URI, **engine_options())
+    if settings.ASYNC_REPLICA_DATABASE_URI
+    else None
+)
+
+# HTTP methods whose handlers only read and may be served from the replica
+READ_ONLY_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class ReadYourWrites:
+    """
+    Remember which users committed a write recently, so their own reads stay
+    on the primary until the replica has had time to catch up.
+
+    The state lives in the process. With several workers the window only
+    covers requests handled by the worker that saw the write.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._until: Dict[str, float] = {}
+
+    def mark(self, user_id: str) -> None:
+        now = time.monotonic()
+        if len(self._until) > 1024:
+            self._until = {k: v for k, v in self._until.items() if v > now}
+        self._until[user_id] = now + self.window
+
+    def is_sticky(self, user_id: Optional[str]) -> bool:
+        return user_id is not None and self._until.get(user_id, 0) > time.monotonic()
+
+
+read_your_writes = ReadYourWrites(settings.REPLICA_STICKY_SECONDS)
+
+
+class RoutingSession(Session):
+    """
+    Session that reads from the replica when the request is read-only and
+    its user has no recent write, and uses the primary for everything else.
+
+    Routing is driven by `info`: get_db sets "read_only" from the HTTP method
+    and the auth dependencies set "user_id" before their first query.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            replica_engine is not None
+            and self.info.get("read_only")
+            and not self._flushing
+            and not isinstance(clause, (Insert, Update, Delete))
+            and not read_your_writes.is_sticky(self.info.get("user_id"))
+        ):
+            return replica_engine.sync_engine
+        return engine.sync_engine
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _flushed(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _executed(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _committed(session):
+    if session.info.pop("wrote", False) and session.info.get("user_id"):
+        read_your_writes.mark(session.info["user_id"])
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _rolled_back(session):
+    session.info.pop("wrote", None)
+
 
-engine = create_engine(
-    settings.DATABASE_URI,
-    pool_pre_ping=True,
+# expire_on_commit is disabled so ORM objects stay readable after commit
+# without triggering implicit (and in async, illegal) lazy refreshes.
+SessionLocal = async_sessionmaker(
+    class_=AsyncSession, sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db(request: Request):
+    async with SessionLocal() as db:
+        db.info["read_only"] = request.method in READ_ONLY_METHODS
         yield db
-    finally:
-        db.close() 
\ No newline at end of file
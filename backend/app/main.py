@@ -1,10 +1,18 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+import asyncio
 
+from app.core.blob_store import collect_unreferenced_blobs
 from app.core.config import settings
+from app.core.http_client import close_http_client
+from app.core.middleware import BodySizeLimitMiddleware
+from app.core.pagination import CURSOR_HEADER
+from app.core.process_pool import shutdown_process_pool
+from app.core.processing import process_jobs
+from app.core.upload_sessions import collect_upload_sessions
 from app.api.v1.api import api_router
-from app.db.session import engine
+from app.db.session import engine, replica_engine
 from app.db.base import Base
 
 @asynccontextmanager
@@ -14,12 +22,31 @@ async def lifespan(app: FastAPI):
     """
     # Create tables on startup (in development, let Alembic handle migrations in production)
     if settings.ENVIRONMENT != "production":
-        Base.metadata.create_all(bind=engine)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    
+    # Remove abandoned resumable uploads and unreferenced blobs, and process
+    # new attachments in the background
+    background = [
+        asyncio.create_task(collect_upload_sessions()),
+        asyncio.create_task(collect_unreferenced_blobs()),
+        asyncio.create_task(process_jobs()),
+    ]
     
     yield
     
-    # Clean up resources on shutdown if needed
-    # Nothing to do for now
+    for task in background:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    shutdown_process_pool()
+    
+    await close_http_client()
+    
+    # Close pooled database connections
+    await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -31,6 +58,9 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Cap request bodies at the largest upload plus room for the multipart framing
+app.add_middleware(BodySizeLimitMiddleware, max_size=settings.MAX_UPLOAD_SIZE + 1024 * 1024)
+
 # Set up CORS
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
@@ -39,6 +69,7 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[CURSOR_HEADER],
     )
 
 # Include the API router
@@ -2,6 +2,11 @@ from app.models.user import User, UserRole
 from app.models.thesis import Thesis, ThesisStatus
 from app.models.comment import ThesisComment
 from app.models.attachment import ThesisAttachment
+from app.models.attachment_text import AttachmentText
+from app.models.blob import FileBlob
+from app.models.upload_session import UploadSession
+from app.models.processing_job import ProcessingJob, JobStatus
+from app.models.similarity import SimilaritySignature, SimilarityBucket
 from app.models.committee import ThesisCommitteeMember, CommitteeMemberRole
 from app.models.event import Event
 from app.models.request import AssistantRequest, RequestStatus
@@ -12,6 +12,8 @@ class ThesisAttachment(Base):
     file_path = Column(String, nullable=False)
     file_type = Column(String, nullable=False)  # MIME type
     file_size = Column(Integer, nullable=False)  # Size in bytes
+    # Content blob; NULL only for files the dedup migration could not find
+    blob_sha256 = Column(String(64), ForeignKey("fileblob.sha256"), nullable=True, index=True)
     
     # Metadata
     description = Column(String, nullable=True)
@@ -19,7 +21,7 @@ class ThesisAttachment(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Foreign keys
-    thesis_id = Column(String, ForeignKey("thesis.id"), nullable=False)
+    thesis_id = Column(String, ForeignKey("thesis.id"), nullable=False, index=True)
     uploaded_by = Column(String, ForeignKey("user.id"), nullable=False)
     
     # Relationships
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Computed, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
+from datetime import datetime
+
+from app.db.base_class import Base
+
+
+class AttachmentText(Base):
+    """
+    Extracted text of an attachment, for full-text search. Written by the
+    attachment's processing job; search_vector is kept up to date by
+    Postgres.
+    """
+    __table_args__ = (
+        Index("ix_attachmenttext_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
+    attachment_id = Column(
+        String, ForeignKey("thesisattachment.id", ondelete="CASCADE"), primary_key=True
+    )
+    content = deferred(Column(Text, nullable=False))
+    search_vector = deferred(Column(
+        TSVECTOR, Computed("setweight(to_tsvector('simple', translate(content, '<', ' ')), 'C')", persisted=True)
+    ))
+    updated_at = Column(DateTime, default=datetime.utcnow)
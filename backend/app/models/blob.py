@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, DateTime, Integer
+from datetime import datetime
+
+from app.db.base_class import Base
+
+
+class FileBlob(Base):
+    """
+    Stored file content, addressed by its SHA-256 digest and shared by every
+    attachment that uploaded the same bytes. ref_count is the number of
+    attachments pointing at it; the file is removed when it drops to zero.
+    """
+    sha256 = Column(String(64), primary_key=True)
+    file_path = Column(String, nullable=False)
+    file_size = Column(Integer, nullable=False)  # Size in bytes
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
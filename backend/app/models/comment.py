@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship, backref
 from datetime import datetime
 import uuid
@@ -7,6 +7,11 @@ from app.db.base_class import Base
 
 
 class ThesisComment(Base):
+    __table_args__ = (
+        # Root-thread listing filters on thesis_id and parent_id IS NULL
+        Index("ix_thesiscomment_thesis_id_parent_id", "thesis_id", "parent_id"),
+    )
+
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     content = Column(Text, nullable=False)
     
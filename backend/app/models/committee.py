@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Enum, Boolean
+from sqlalchemy import Column, String, DateTime, ForeignKey, Enum, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -15,6 +15,10 @@ class CommitteeMemberRole(str, enum.Enum):
 
 
 class ThesisCommitteeMember(Base):
+    __table_args__ = (
+        Index("ix_thesiscommitteemember_thesis_id_user_id", "thesis_id", "user_id"),
+    )
+
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     role = Column(Enum(CommitteeMemberRole), nullable=False)
     
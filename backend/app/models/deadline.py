@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Text, Boolean, Enum
+from sqlalchemy import Column, String, DateTime, Text, Boolean, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -15,6 +15,11 @@ class DeadlineType(str, enum.Enum):
 
 
 class Deadline(Base):
+    __table_args__ = (
+        # Deadline listings filter on the flags and order by date
+        Index("ix_deadline_is_active_is_global_deadline_date", "is_active", "is_global", "deadline_date"),
+    )
+
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -7,6 +7,11 @@ from app.db.base_class import Base
 
 
 class Event(Base):
+    __table_args__ = (
+        # Calendar listing: a user's events ordered by start time
+        Index("ix_event_user_id_start_time", "user_id", "start_time"),
+    )
+
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, String, DateTime, Enum, ForeignKey, Index, Integer
+from datetime import datetime
+import enum
+import uuid
+
+from app.db.base_class import Base
+
+
+class JobStatus(str, enum.Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class ProcessingJob(Base):
+    """
+    Background text extraction and HTML conversion of an attachment's file.
+    One row per attachment, reset whenever its file is replaced.
+    """
+    __table_args__ = (
+        # Queue order for workers claiming the next job
+        Index("ix_processingjob_status_created_at", "status", "created_at"),
+    )
+
+    id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
+    attachment_id = Column(
+        String, ForeignKey("thesisattachment.id", ondelete="CASCADE"), nullable=False, unique=True
+    )
+
+    status = Column(Enum(JobStatus), default=JobStatus.pending, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    error = Column(String, nullable=True)  # Last failure, for the polling client
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
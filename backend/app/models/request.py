@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, String, DateTime, Enum, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -14,6 +14,11 @@ class RequestStatus(str, enum.Enum):
 
 
 class AssistantRequest(Base):
+    __table_args__ = (
+        # Assistant inbox: requests by status, newest first
+        Index("ix_assistantrequest_assistant_id_status_created_at", "assistant_id", "status", "created_at"),
+    )
+
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     
     # Foreign keys
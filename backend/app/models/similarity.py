@@ -0,0 +1,33 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, LargeBinary, BigInteger
+from datetime import datetime
+
+from app.db.base_class import Base
+
+
+class SimilaritySignature(Base):
+    """
+    MinHash signature of an attachment's extracted text, for finding near
+    duplicates across all theses. Written by the attachment's processing
+    job; shingle_count is 0 for files with no text to compare.
+    """
+    attachment_id = Column(
+        String, ForeignKey("thesisattachment.id", ondelete="CASCADE"), primary_key=True
+    )
+    signature = Column(LargeBinary, nullable=False)
+    shingle_count = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class SimilarityBucket(Base):
+    """
+    LSH index over the signatures: one row per band of each signature.
+    Attachments sharing a bucket are candidate near duplicates.
+    """
+    # The primary key serves bucket lookups
+    bucket = Column(BigInteger, primary_key=True)
+    attachment_id = Column(
+        String,
+        ForeignKey("similaritysignature.attachment_id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    )
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, String, DateTime, Enum, Text, ForeignKey, Integer
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, DateTime, Enum, Text, ForeignKey, Integer, Computed, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
 import enum
 import uuid
@@ -18,6 +19,9 @@ class ThesisStatus(str, enum.Enum):
 
 class Thesis(Base):
     __tablename__ = "thesis"
+    __table_args__ = (
+        Index("ix_thesis_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     title = Column(String, nullable=False, index=True)
@@ -34,13 +38,22 @@ class Thesis(Base):
     approval_date = Column(DateTime, nullable=True)
     defense_date = Column(DateTime, nullable=True)
     
+    # Full-text search over title and abstract, maintained by Postgres;
+    # attachment text is indexed in AttachmentText. '<' is blanked out, or
+    # the parser takes the text from it to the next '>' for an HTML tag
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('simple', translate(coalesce(title, ''), '<', ' ')), 'A') || "
+        "setweight(to_tsvector('simple', translate(coalesce(abstract, ''), '<', ' ')), 'B')",
+        persisted=True,
+    )))
+    
     # Tracking
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Foreign keys
-    student_id = Column(String, ForeignKey("user.id"), nullable=False)
-    supervisor_id = Column(String, ForeignKey("user.id"), nullable=True)
+    student_id = Column(String, ForeignKey("user.id"), nullable=False, index=True)
+    supervisor_id = Column(String, ForeignKey("user.id"), nullable=True, index=True)
     
     # Relationships
     student = relationship("User", back_populates="theses", foreign_keys=[student_id])
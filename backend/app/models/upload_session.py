@@ -0,0 +1,27 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer
+from datetime import datetime
+import uuid
+
+from app.db.base_class import Base
+
+
+class UploadSession(Base):
+    """
+    A resumable attachment upload in progress. The chunks received so far
+    are kept on disk until the upload is completed into an attachment, or
+    the session expires and is garbage-collected.
+    """
+    id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
+    filename = Column(String, nullable=False)
+    description = Column(String, nullable=True)
+    file_size = Column(Integer, nullable=False)  # Declared total size in bytes
+    chunk_size = Column(Integer, nullable=False)  # Every chunk but the last has this size
+    sha256 = Column(String(64), nullable=True)  # Optional digest of the whole file
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # Pushed forward by every chunk received
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    # Foreign keys
+    thesis_id = Column(String, ForeignKey("thesis.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(String, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, String, DateTime, Enum, Text
+from sqlalchemy import Boolean, Column, String, DateTime, Enum, Text, DDL, Index, event
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -14,6 +14,13 @@ class UserRole(str, enum.Enum):
 
 class User(Base):
     __tablename__ = "user"
+    __table_args__ = (
+        # Trigram indexes for substring search on name and email (GET /users/search)
+        Index("ix_user_full_name_trgm", "full_name", postgresql_using="gin",
+              postgresql_ops={"full_name": "gin_trgm_ops"}),
+        Index("ix_user_email_trgm", "email", postgresql_using="gin",
+              postgresql_ops={"email": "gin_trgm_ops"}),
+    )
 
     id = Column(String, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
@@ -47,4 +54,8 @@ class User(Base):
 
     # Reviews relationship (for assistants)
     reviews = relationship("Review", back_populates="assistant", 
-                           primaryjoin="and_(User.id==Review.assistant_id, User.role=='graduation_assistant')") 
\ No newline at end of file
+                           primaryjoin="and_(User.id==Review.assistant_id, User.role=='graduation_assistant')") 
+
+
+# The trigram operator classes come from the pg_trgm extension
+event.listen(User.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
@@ -1,7 +1,10 @@
-from app.schemas.user import User, UserCreate, UserUpdate, UserInDB, UserCreateOAuth
-from app.schemas.thesis import Thesis, ThesisCreate, ThesisUpdate, ThesisDetail, UserSimple
+from app.schemas.user import User, UserCreate, UserUpdate, UserInDB, UserCreateOAuth, UserSummary
+from app.schemas.thesis import Thesis, ThesisCreate, ThesisUpdate, ThesisDetail, ThesisSearchResult, UserSimple
 from app.schemas.comment import Comment, CommentCreate, CommentUpdate, CommentDetail, CommentBase
-from app.schemas.attachment import Attachment, AttachmentCreate, AttachmentUpdate, AttachmentDetail, AttachmentBase
+from app.schemas.attachment import Attachment, AttachmentCreate, AttachmentUpdate, AttachmentDetail, AttachmentBase, PreviewPage, PreviewPages
+from app.schemas.upload_session import UploadSession, UploadSessionCreate
+from app.schemas.processing_job import ProcessingJob
+from app.schemas.similarity import SimilarityPassage, SimilarityMatch, SimilarityReport
 from app.schemas.committee import CommitteeMember, CommitteeMemberCreate, CommitteeMemberUpdate, CommitteeMemberDetail, CommitteeMemberSimple, ThesisSimple
 from app.schemas.event import Event, EventCreate, EventUpdate, EventDetail
 from app.schemas.request import Request, RequestCreate, RequestUpdate, RequestDetail
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -44,6 +44,18 @@ class Attachment(AttachmentInDBBase):
     pass
 
 
+# Text of one page of a paged preview
+class PreviewPage(BaseModel):
+    number: int  # From 1
+    text: str
+
+
+# A range of pages of a PDF attachment
+class PreviewPages(BaseModel):
+    page_count: int
+    pages: List[PreviewPage]
+
+
 # Additional properties for attachment detail view
 class AttachmentDetail(Attachment):
     uploader: "UserSimple"
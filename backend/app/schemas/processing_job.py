@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+from app.models.processing_job import JobStatus
+
+
+# Properties to return to client
+class ProcessingJob(BaseModel):
+    attachment_id: str
+    status: JobStatus
+    attempts: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
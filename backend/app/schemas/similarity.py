@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from typing import List
+
+
+# Text of an attachment also found in another one
+class SimilarityPassage(BaseModel):
+    text: str  # In the attachment the report is for
+    source_text: str  # The matching text in the other attachment
+    word_count: int
+
+
+# Another thesis's attachment sharing text with the attachment
+class SimilarityMatch(BaseModel):
+    attachment_id: str
+    filename: str
+    thesis_id: str
+    thesis_title: str
+    similarity: float  # Estimated Jaccard similarity of the two texts' phrases
+    overlap: float  # Share of the attachment's phrases found in the other
+    passages: List[SimilarityPassage]
+
+
+# Near-duplicate report for an attachment
+class SimilarityReport(BaseModel):
+    attachment_id: str
+    shingle_count: int  # Distinct phrases compared; 0 when the file has no text
+    matches: List[SimilarityMatch]
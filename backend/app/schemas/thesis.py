@@ -49,6 +49,17 @@ class Thesis(ThesisInDBBase):
     pass
 
 
+# A thesis found by search. Highlights are HTML: the text escaped, with
+# the matched words in <mark>
+class ThesisSearchResult(Thesis):
+    rank: float
+    title_highlight: str
+    abstract_highlight: Optional[str] = None  # Fragments around matches
+    content_highlight: Optional[str] = None  # Fragments of the best matching attachment
+    attachment_id: Optional[str] = None  # The attachment content_highlight is from
+    attachment_filename: Optional[str] = None
+
+
 # Additional properties for thesis detail view
 class ThesisDetail(Thesis):
     student: "UserSimple"
@@ -0,0 +1,28 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+
+
+# Properties to receive via API on creation
+class UploadSessionCreate(BaseModel):
+    filename: str
+    file_size: int = Field(..., gt=0)
+    description: Optional[str] = None
+    # Hex SHA-256 of the whole file, checked when the upload completes
+    sha256: Optional[str] = Field(None, pattern="^[0-9a-fA-F]{64}$")
+
+
+# Properties to return to client
+class UploadSession(BaseModel):
+    id: str
+    thesis_id: str
+    filename: str
+    description: Optional[str] = None
+    file_size: int
+    chunk_size: int
+    chunk_count: int
+    # Indexes of the chunks stored so far, and their total size
+    received_chunks: List[int]
+    received_bytes: int
+    created_at: datetime
+    expires_at: datetime
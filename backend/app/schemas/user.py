@@ -43,6 +43,19 @@ class User(UserInDBBase):
     student_count: Optional[int] = None
 
 
+# Lean directory entry for pickers and lists
+class UserSummary(BaseModel):
+    id: str
+    email: str
+    full_name: Optional[str] = None
+    role: UserRole
+    profile_picture: Optional[str] = None
+    student_count: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
 # Properties stored in DB
 class UserInDB(UserInDBBase):
     hashed_password: str
@@ -0,0 +1,183 @@
+"""
+Query-plan benchmark for the list endpoint access patterns.
+
+Optionally seeds the configured database with synthetic data, then runs
+EXPLAIN ANALYZE for the queries behind the list endpoints and prints the
+scan types and execution times. Run it before and after
+`alembic upgrade 002` to see sequential scans turn into index scans:
+
+    python -m scripts.bench_indexes --seed --students 20000
+    alembic upgrade head
+    python -m scripts.bench_indexes
+
+Only point this at a development database: --seed inserts rows.
+"""
+import argparse
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select, text
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.models import (
+    AssistantRequest,
+    Event,
+    RequestStatus,
+    Thesis,
+    ThesisAttachment,
+    ThesisComment,
+    ThesisCommitteeMember,
+    ThesisStatus,
+    User,
+    UserRole,
+)
+from app.models.deadline import Deadline, DeadlineType
+
+BATCH_SIZE = 5000
+
+
+def _uid() -> str:
+    return str(uuid.uuid4())
+
+
+def _insert_batched(conn, model, rows) -> None:
+    for start in range(0, len(rows), BATCH_SIZE):
+        conn.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+
+def seed(conn, students: int) -> None:
+    """Insert a realistic mix of users, theses and their child rows."""
+    now = datetime.utcnow()
+    professors = [
+        {"id": _uid(), "email": f"prof{i}-{_uid()}@example.com", "full_name": f"Professor {i}",
+         "role": UserRole.professor, "is_active": True, "created_at": now}
+        for i in range(max(10, students // 50))
+    ]
+    assistants = [
+        {"id": _uid(), "email": f"assistant{i}-{_uid()}@example.com", "full_name": f"Assistant {i}",
+         "role": UserRole.graduation_assistant, "is_active": True, "created_at": now}
+        for i in range(max(10, students // 50))
+    ]
+    student_rows = [
+        {"id": _uid(), "email": f"student{i}-{_uid()}@example.com", "full_name": f"Student {i}",
+         "role": UserRole.student, "is_active": True, "created_at": now}
+        for i in range(students)
+    ]
+    _insert_batched(conn, User, professors + assistants + student_rows)
+
+    theses, comments, attachments, committee, events, requests = [], [], [], [], [], []
+    for student in student_rows:
+        supervisor = random.choice(professors)
+        thesis_id = _uid()
+        created = now - timedelta(days=random.randint(0, 720))
+        theses.append({
+            "id": thesis_id, "title": f"Thesis of {student['full_name']}", "abstract": "Lorem ipsum " * 40,
+            "status": random.choice(list(ThesisStatus)), "student_id": student["id"],
+            "supervisor_id": supervisor["id"], "created_at": created, "updated_at": created,
+        })
+        for _ in range(random.randint(2, 8)):
+            root_id = _uid()
+            comments.append({"id": root_id, "content": "Please revise.", "thesis_id": thesis_id,
+                             "user_id": supervisor["id"], "parent_id": None, "is_resolved": False,
+                             "created_at": created, "updated_at": created})
+            comments.append({"id": _uid(), "content": "Done.", "thesis_id": thesis_id,
+                             "user_id": student["id"], "parent_id": root_id, "is_resolved": False,
+                             "created_at": created, "updated_at": created})
+        for n in range(random.randint(1, 3)):
+            attachments.append({"id": _uid(), "filename": f"draft{n}.pdf", "file_path": f"{thesis_id}/draft{n}.pdf",
+                                "file_type": "application/pdf", "file_size": 1024, "thesis_id": thesis_id,
+                                "uploaded_by": student["id"], "created_at": created, "updated_at": created})
+        committee.append({"id": _uid(), "role": "chair", "thesis_id": thesis_id, "user_id": supervisor["id"],
+                          "has_approved": False, "created_at": created, "updated_at": created})
+        for n in range(random.randint(1, 5)):
+            start = created + timedelta(days=n * 7)
+            events.append({"id": _uid(), "title": "Consultation", "start_time": start,
+                           "end_time": start + timedelta(hours=1), "is_all_day": False,
+                           "user_id": student["id"], "thesis_id": thesis_id, "created_at": created})
+        requests.append({"id": _uid(), "student_id": student["id"], "assistant_id": random.choice(assistants)["id"],
+                         "thesis_id": thesis_id, "status": random.choice(list(RequestStatus)),
+                         "created_at": created, "updated_at": created})
+
+    _insert_batched(conn, Thesis, theses)
+    # Roots before replies so the self-referencing foreign key is satisfied
+    _insert_batched(conn, ThesisComment, comments)
+    _insert_batched(conn, ThesisAttachment, attachments)
+    _insert_batched(conn, ThesisCommitteeMember, committee)
+    _insert_batched(conn, Event, events)
+    _insert_batched(conn, AssistantRequest, requests)
+    _insert_batched(conn, Deadline, [
+        {"id": _uid(), "title": f"Deadline {i}", "deadline_date": now + timedelta(days=i - 500),
+         "deadline_type": random.choice(list(DeadlineType)), "is_active": i % 3 != 0,
+         "is_global": i % 2 == 0, "created_at": now, "updated_at": now}
+        for i in range(students // 2)
+    ])
+    conn.execute(text("ANALYZE"))
+
+
+def list_queries(conn) -> dict:
+    """The statements issued by the list endpoints, bound to real ids."""
+    student_id, supervisor_id, thesis_id = conn.execute(
+        select(Thesis.student_id, Thesis.supervisor_id, Thesis.id).limit(1)
+    ).one()
+    assistant_id = conn.execute(select(AssistantRequest.assistant_id).limit(1)).scalar_one()
+    return {
+        "read_theses (student)": select(Thesis).where(Thesis.student_id == student_id).limit(100),
+        "read_theses (professor)": select(Thesis).where(Thesis.supervisor_id == supervisor_id).limit(100),
+        "read_thesis_comments": select(ThesisComment).where(
+            ThesisComment.thesis_id == thesis_id, ThesisComment.parent_id.is_(None)
+        ).limit(100),
+        "read_attachments": select(ThesisAttachment).where(ThesisAttachment.thesis_id == thesis_id).limit(100),
+        "read_thesis_committee": select(ThesisCommitteeMember).where(ThesisCommitteeMember.thesis_id == thesis_id),
+        "read_events": select(Event).where(Event.user_id == student_id).order_by(Event.start_time).limit(100),
+        "read_deadlines (student)": select(Deadline).where(
+            Deadline.is_active == True, Deadline.is_global == True  # noqa: E712
+        ).order_by(Deadline.deadline_date.asc()).limit(100),
+        "list_requests (assistant)": select(AssistantRequest).where(
+            AssistantRequest.assistant_id == assistant_id,
+            AssistantRequest.status == RequestStatus.requested,
+        ).order_by(AssistantRequest.created_at.desc()).limit(100),
+    }
+
+
+def scan_nodes(plan: dict) -> list:
+    """Collect a readable label for every scan node in a plan tree."""
+    nodes = []
+    if "Scan" in plan["Node Type"]:
+        label = plan["Node Type"]
+        if "Index Name" in plan:
+            label += f" using {plan['Index Name']}"
+        if "Relation Name" in plan:
+            label += f" on {plan['Relation Name']}"
+        nodes.append(label)
+    for child in plan.get("Plans", []):
+        nodes.extend(scan_nodes(child))
+    return nodes
+
+
+def explain(conn, statement) -> tuple:
+    sql = str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    result = conn.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}")).scalar_one()[0]
+    return scan_nodes(result["Plan"]), result["Execution Time"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seed", action="store_true", help="insert synthetic rows first")
+    parser.add_argument("--students", type=int, default=20000)
+    args = parser.parse_args()
+
+    engine = create_engine(settings.DATABASE_URI)
+    if args.seed:
+        with engine.begin() as conn:
+            seed(conn, args.students)
+
+    with engine.connect() as conn:
+        for name, statement in list_queries(conn).items():
+            nodes, elapsed = explain(conn, statement)
+            print(f"{name:<28} {elapsed:>9.3f} ms  {', '.join(nodes)}")
+
+
+if __name__ == "__main__":
+    main()
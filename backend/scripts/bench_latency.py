@@ -0,0 +1,89 @@
+"""
+Concurrent latency benchmark for a running Thesis Tracker API.
+
+Fires REQUESTS GET requests at the given path with CONCURRENCY requests in
+flight and reports throughput and latency percentiles. Run it once against
+a build and once against the build you want to compare with, e.g.:
+
+    python scripts/bench_latency.py --url http://localhost:8000 \
+        --email prof@example.com --password secret \
+        --path /api/v1/theses/all --concurrency 50 --requests 2000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    response = await client.post(
+        "/api/v1/auth/login", data={"username": email, "password": password}
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run(args) -> None:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        headers = {}
+        if args.email:
+            token = await login(client, args.email, args.password)
+            headers["Authorization"] = f"Bearer {token}"
+
+        latencies = []
+        errors = 0
+        remaining = iter(range(args.requests))
+
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(args.path, headers=headers)
+                except httpx.TransportError:
+                    # A server that stops answering under load is a result too
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    print(f"path         {args.path}")
+    print(f"requests     {len(latencies)} answered ({errors} errors)")
+    print(f"concurrency  {args.concurrency}")
+    if not latencies:
+        return
+    print(f"throughput   {len(latencies) / elapsed:.1f} req/s")
+    print(f"mean         {statistics.mean(latencies):.1f} ms")
+    for pct in (50, 95, 99):
+        print(f"p{pct:<11} {percentile(latencies, pct):.1f} ms")
+    print(f"max          {max(latencies):.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/api/v1/theses/all")
+    parser.add_argument("--email")
+    parser.add_argument("--password")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--timeout", type=float, default=60, help="seconds before a request counts as an error")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Login-storm benchmark: event-loop responsiveness while passwords are hashed.
+
+Seeds one user with a known password, then runs the app in-process and
+fires LOGINS logins (CONCURRENCY in flight) while a probe task repeatedly
+sleeps for a few milliseconds and records how late it wakes up. That delay
+is what every other request on the event loop waits. Reports login
+throughput and latency, and the loop delay when idle and during the storm.
+When bcrypt runs on the loop the delay grows to a full hash (or more); off
+the loop it stays flat.
+
+    python -m scripts.bench_login_storm --logins 200 --concurrency 50
+
+Run it on two builds to compare. The seeded user is removed afterwards.
+Only point this at a development database.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+from passlib.context import CryptContext
+from sqlalchemy import delete
+
+from app.db.session import SessionLocal, engine
+from app.main import app as fastapi_app
+from app.models import User, UserRole
+
+PASSWORD = "storm-password"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(name, samples):
+    print(f"{name:<14} p50 {percentile(samples, 50):8.1f} ms   p95 {percentile(samples, 95):8.1f} ms   "
+          f"p99 {percentile(samples, 99):8.1f} ms   max {max(samples):8.1f} ms")
+
+
+async def run(args) -> None:
+    user = User(id=str(uuid.uuid4()), email=f"storm-{uuid.uuid4()}@example.com",
+                full_name="Storm User", role=UserRole.student, is_active=True,
+                hashed_password=CryptContext(schemes=["bcrypt"]).hash(PASSWORD))
+    async with SessionLocal() as db:
+        db.add(user)
+        await db.commit()
+
+    login_latencies, probe_latencies, statuses = [], [], {}
+    storm_over = asyncio.Event()
+    transport = httpx.ASGITransport(app=fastapi_app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+            remaining = iter(range(args.logins))
+
+            async def login_worker():
+                for _ in remaining:
+                    start = time.perf_counter()
+                    response = await client.post(
+                        "/api/v1/auth/login", data={"username": user.email, "password": PASSWORD}
+                    )
+                    login_latencies.append((time.perf_counter() - start) * 1000)
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+            async def probe():
+                while not storm_over.is_set():
+                    start = time.perf_counter()
+                    await asyncio.sleep(args.probe_interval)
+                    late = time.perf_counter() - start - args.probe_interval
+                    probe_latencies.append(late * 1000)
+
+            # Baseline loop delay with no logins in flight
+            probe_task = asyncio.create_task(probe())
+            await asyncio.sleep(1)
+            idle = list(probe_latencies)
+            probe_latencies.clear()
+
+            started = time.perf_counter()
+            await asyncio.gather(*(login_worker() for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+            storm_over.set()
+            await probe_task
+    finally:
+        async with SessionLocal() as db:
+            await db.execute(delete(User).where(User.id == user.id))
+            await db.commit()
+        await engine.dispose()
+
+    print(f"logins        {len(login_latencies)} in {elapsed:.1f} s ({len(login_latencies) / elapsed:.1f}/s), "
+          f"concurrency {args.concurrency}, statuses {statuses}")
+    report("login", login_latencies)
+    report("loop idle", idle)
+    report("loop storm", probe_latencies)
+    print(f"loop mean     idle {statistics.mean(idle):.1f} ms, storm {statistics.mean(probe_latencies):.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--probe-interval", type=float, default=0.01,
+                        help="seconds the probe sleeps between wake-ups")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+PDF text extraction benchmark on the bundled corpus (../pdfs).
+
+Each mode runs in a fresh subprocess over every PDF in the corpus, repeated
+--repeat times:
+
+- serial: the old path, walking reader.pages in one process and joining
+  the text of every page into one string
+- pool N: the extraction engine with N processing workers, streaming each
+  batch of pages into a per-page store on disk as it arrives
+
+Reports pages per second and the peak RSS of the main process and of the
+largest worker. Pool start-up is left out of the timings, as a running
+server keeps its pool.
+
+    python -m scripts.bench_pdf_extract --workers 1 2 4 --repeat 3
+"""
+import argparse
+import asyncio
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PDF_DIR = Path(__file__).resolve().parents[2] / "pdfs"
+
+
+def peak_rss_mb(who: int = resource.RUSAGE_SELF) -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def corpus(repeat: int):
+    return sorted(PDF_DIR.glob("*.pdf")) * repeat
+
+
+def run_serial(repeat: int) -> None:
+    from app.core.file_utils import extract_text, pdf_page_count
+
+    pages = 0
+    started = time.perf_counter()
+    for pdf in corpus(repeat):
+        text = extract_text(pdf, pdf.name)
+        pages += pdf_page_count(pdf)
+        del text
+    elapsed = time.perf_counter() - started
+    print(f"{pages} {elapsed:.3f} {peak_rss_mb():.1f} 0")
+
+
+async def run_pool(workers: int, repeat: int) -> None:
+    from app.core import process_pool
+    from app.core.config import settings
+    from app.core.file_utils import get_pdf_page_count
+    from app.core.pdf_extract import extract_pages
+    from app.core.preview_cache import _write_pages
+
+    settings.PROCESSING_WORKERS = workers
+    pdfs = corpus(repeat)
+    # Start every worker before timing
+    await asyncio.gather(*(get_pdf_page_count(pdfs[0]) for _ in range(workers * 2)))
+
+    pages = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        started = time.perf_counter()
+        for index, pdf in enumerate(pdfs):
+            entry = Path(workdir) / str(index)
+            entry.mkdir()
+            page_count = await get_pdf_page_count(pdf)
+
+            async def store(extracted, entry=entry):
+                await asyncio.to_thread(_write_pages, entry, extracted)
+
+            await extract_pages(pdf, range(1, page_count + 1), store)
+            pages += page_count
+        elapsed = time.perf_counter() - started
+
+    process_pool.get_executor().shutdown(wait=True)
+    print(f"{pages} {elapsed:.3f} {peak_rss_mb():.1f} {peak_rss_mb(resource.RUSAGE_CHILDREN):.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4],
+                        help="pool sizes to run")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the corpus")
+    parser.add_argument("--one", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.one == "serial":
+        run_serial(args.repeat)
+        return
+    if args.one is not None:
+        asyncio.run(run_pool(int(args.one), args.repeat))
+        return
+
+    pdfs = sorted(PDF_DIR.glob("*.pdf"))
+    size = sum(pdf.stat().st_size for pdf in pdfs) / (1024 * 1024)
+    print(f"corpus: {len(pdfs)} PDF(s), {size:.1f} MB, {args.repeat} pass(es)")
+    print(f"{'mode':>8} {'pages':>6} {'time':>8} {'pages/s':>8} {'main RSS':>9} {'worker RSS':>11}")
+    for mode in ["serial"] + [str(workers) for workers in args.workers]:
+        output = subprocess.run(
+            [sys.executable, "-m", "scripts.bench_pdf_extract", "--one", mode, "--repeat", str(args.repeat)],
+            capture_output=True, text=True, check=True,
+        ).stdout.split()
+        pages, elapsed, main_rss, worker_rss = output[-4:]
+        label = mode if mode == "serial" else f"pool {mode}"
+        rate = int(pages) / float(elapsed)
+        worker = f"{worker_rss} MB" if mode != "serial" else "-"
+        print(f"{label:>8} {pages:>6} {float(elapsed):>7.2f}s {rate:>8.1f} {main_rss:>6} MB {worker:>11}")
+
+
+if __name__ == "__main__":
+    main()
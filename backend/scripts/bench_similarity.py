@@ -0,0 +1,264 @@
+"""
+Similarity index benchmark on a synthetic corpus.
+
+Builds thousands of synthetic theses from the sample texts in ../pdfs: each
+is a random walk through the words of the samples, so it reads like the
+samples but shares almost no five-word phrases with any other. Some of
+them copy a block of another thesis, from 5% of their text up to all of it.
+Every thesis is fingerprinted and added to the index in the configured
+database, growing the corpus in steps. At each step, prints the time of a
+lookup through the LSH index against a linear scan over every signature,
+how many candidates a lookup compares, and for how many of the sampled
+theses that copy text the lookup finds the scan's best match. At the end, prints for each
+copied share how often the source thesis is among the top 5 matches, and
+the query plan of the index lookup.
+
+    python -m scripts.bench_similarity --theses 4000
+
+Rows created by the benchmark are removed again afterwards. Only point
+this at a development database.
+"""
+import argparse
+import asyncio
+import random
+import re
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from sqlalchemy import delete, insert, select, text
+
+from app.core import minhash
+from app.core.similarity import find_similar, store_fingerprint
+from app.db.session import SessionLocal, engine
+from app.models import SimilarityBucket, SimilaritySignature, Thesis, ThesisAttachment, ThesisStatus, User, UserRole
+
+PDF_DIR = Path(__file__).resolve().parents[2] / "pdfs"
+
+# Share of a thesis copied from another, for the planted copies
+COPY_SHARES = [0.05, 0.1, 0.2, 0.3, 0.5, 1.0]
+TOP_MATCHES = 5
+
+
+class TextGenerator:
+    """
+    Random text from the words of the sample theses: each word is followed
+    by one that follows it somewhere in the samples, with an occasional jump
+    to a random word.
+    """
+
+    def __init__(self, seed: int = 1):
+        words: List[str] = []
+        for path in sorted(PDF_DIR.glob("*")):
+            if path.suffix in (".txt", ".md"):
+                words += re.findall(r"\w+|[.,;:!?]", path.read_text(encoding="utf-8"))
+        self.following: Dict[str, List[str]] = {}
+        for word, after in zip(words, words[1:]):
+            self.following.setdefault(word, []).append(after)
+        self.words = list(self.following)
+        self.random = random.Random(seed)
+
+    def words_of(self, count: int) -> List[str]:
+        if count <= 0:
+            return []
+        out = [self.random.choice(self.words)]
+        while len(out) < count:
+            following = self.following.get(out[-1])
+            if not following or self.random.random() < 0.05:
+                out.append(self.random.choice(self.words))
+            else:
+                out.append(self.random.choice(following))
+        return out
+
+    def text(self, count: int) -> str:
+        return " ".join(self.words_of(count))
+
+    def copy_of(self, source: str, share: float, count: int) -> str:
+        """
+        A text of count words whose middle is a block of share of the
+        source's words.
+        """
+        source_words = source.split()
+        block = int(len(source_words) * share)
+        start = self.random.randrange(len(source_words) - block + 1)
+        before = int((count - block) * self.random.random())
+        return " ".join(
+            self.words_of(before) + source_words[start:start + block] + self.words_of(count - block - before)
+        )
+
+
+def _uid() -> str:
+    return str(uuid.uuid4())
+
+
+async def linear_scan(attachment: ThesisAttachment, limit: int) -> List[Tuple[str, float]]:
+    """
+    The index lookup's answer without the index: estimate the overlap with
+    every signature in the corpus. Returns attachment ids with their
+    estimated overlap.
+    """
+    async with SessionLocal() as db:
+        own = await db.get(SimilaritySignature, attachment.id)
+        rows = (await db.execute(
+            select(SimilaritySignature.attachment_id, SimilaritySignature.signature, SimilaritySignature.shingle_count)
+            .join(ThesisAttachment, ThesisAttachment.id == SimilaritySignature.attachment_id)
+            .where(ThesisAttachment.thesis_id != attachment.thesis_id)
+        )).all()
+    values = minhash.unpack_signature(own.signature)
+    scored = []
+    for attachment_id, signature, shingle_count in rows:
+        similarity = minhash.estimate_similarity(values, minhash.unpack_signature(signature))
+        scored.append((minhash.estimate_overlap(similarity, own.shingle_count, shingle_count), attachment_id))
+    scored.sort(reverse=True)
+    return [(attachment_id, overlap) for overlap, attachment_id in scored[:limit]]
+
+
+async def lookup(attachment: ThesisAttachment, limit: int) -> List[str]:
+    async with SessionLocal() as db:
+        matches = await find_similar(db, attachment, limit)
+    return [match["attachment"].id for match in matches]
+
+
+async def candidate_count(attachment_id: str) -> int:
+    async with SessionLocal() as db:
+        return await db.scalar(text(
+            "SELECT count(DISTINCT attachment_id) FROM similaritybucket WHERE attachment_id != :id "
+            "AND bucket IN (SELECT bucket FROM similaritybucket WHERE attachment_id = :id)"
+        ), {"id": attachment_id})
+
+
+async def run(theses: int, words: int, copies: int, queries: int, steps: int) -> None:
+    generator = TextGenerator()
+    workdir = Path(tempfile.mkdtemp())
+    now = datetime.utcnow()
+    student = User(id=_uid(), email=f"similarity-{_uid()}@example.com", full_name="Similarity Bench",
+                   role=UserRole.student, is_active=True)
+    async with SessionLocal() as db:
+        db.add(student)
+        await db.commit()
+
+    # Copies are spread over the corpus, each of an earlier thesis
+    chosen = random.Random(7).sample(range(theses // 10, theses), copies * len(COPY_SHARES))
+    planted = {index: COPY_SHARES[n % len(COPY_SHARES)] for n, index in enumerate(chosen)}
+    texts: List[str] = []
+    attachments: List[ThesisAttachment] = []
+    sources: Dict[str, str] = {}
+    fingerprint_seconds = 0.0
+    step_sizes = sorted({theses * (step + 1) // steps for step in range(steps)})
+
+    print(f"{'theses':>7} {'fingerprint/s':>14} {'index p50':>10} {'index p95':>10} "
+          f"{'scan p50':>9} {'scan p95':>9} {'candidates':>11} {'same best':>9}")
+    try:
+        for size in step_sizes:
+            async with SessionLocal() as db:
+                thesis_rows, attachment_rows, prints = [], [], []
+                for index in range(len(texts), size):
+                    if index in planted:
+                        source = generator.random.randrange(index)
+                        texts.append(generator.copy_of(texts[source], planted[index], words))
+                    else:
+                        texts.append(generator.text(words))
+                    path = workdir / f"{index}.txt"
+                    path.write_text(texts[-1], encoding="utf-8")
+                    started = time.perf_counter()
+                    prints.append(minhash.fingerprint_files([path]))
+                    fingerprint_seconds += time.perf_counter() - started
+                    path.unlink()
+
+                    thesis_id, attachment_id = _uid(), _uid()
+                    thesis_rows.append({"id": thesis_id, "title": f"Synthetic thesis {index}",
+                                        "status": ThesisStatus.submitted, "student_id": student.id,
+                                        "created_at": now, "updated_at": now})
+                    attachment_rows.append({"id": attachment_id, "filename": f"thesis-{index}.txt",
+                                            "file_path": f"bench/{index}.txt", "file_type": "text/plain",
+                                            "file_size": len(texts[-1]), "thesis_id": thesis_id,
+                                            "uploaded_by": student.id, "created_at": now, "updated_at": now})
+                    attachments.append(ThesisAttachment(id=attachment_id, thesis_id=thesis_id))
+                    if index in planted:
+                        sources[attachment_id] = attachments[source].id
+                await db.execute(insert(Thesis), thesis_rows)
+                await db.execute(insert(ThesisAttachment), attachment_rows)
+                for row, fingerprint in zip(attachment_rows, prints):
+                    await store_fingerprint(db, row["id"], fingerprint)
+                await db.commit()
+            async with engine.begin() as connection:
+                await connection.execute(text("ANALYZE similaritybucket"))
+                await connection.execute(text("ANALYZE similaritysignature"))
+
+            sample = random.Random(size).sample(attachments, min(queries, len(attachments)))
+            index_times, scan_times, candidates, copied, agree = [], [], [], 0, 0
+            for attachment in sample:
+                started = time.perf_counter()
+                found = await lookup(attachment, TOP_MATCHES)
+                index_times.append(time.perf_counter() - started)
+                started = time.perf_counter()
+                scanned = await linear_scan(attachment, TOP_MATCHES)
+                scan_times.append(time.perf_counter() - started)
+                candidates.append(await candidate_count(attachment.id))
+                # Below this, the scan's best match is chance agreement of a few values
+                if scanned and scanned[0][1] >= COPY_SHARES[0]:
+                    copied += 1
+                    agree += found[:1] == [scanned[0][0]]
+            index_times.sort()
+            scan_times.sort()
+            print(f"{size:>7} {size / fingerprint_seconds:>14.0f} "
+                  f"{statistics.median(index_times) * 1000:>8.1f}ms "
+                  f"{index_times[int(len(index_times) * 0.95)] * 1000:>8.1f}ms "
+                  f"{statistics.median(scan_times) * 1000:>7.1f}ms "
+                  f"{scan_times[int(len(scan_times) * 0.95)] * 1000:>7.1f}ms "
+                  f"{statistics.mean(candidates):>11.1f} {agree:>3}/{copied:<3}")
+
+        print()
+        print(f"{'copied':>7} {'copies':>7} {'found in top ' + str(TOP_MATCHES):>16} {'est. overlap':>13}")
+        by_share: Dict[float, List] = {}
+        for attachment in attachments:
+            if attachment.id not in sources:
+                continue
+            async with SessionLocal() as db:
+                matches = await find_similar(db, attachment, TOP_MATCHES)
+            hit = next((m for m in matches if m["attachment"].id == sources[attachment.id]), None)
+            share = planted[attachments.index(attachment)]
+            by_share.setdefault(share, []).append(hit["overlap"] if hit else None)
+        for share in COPY_SHARES:
+            results = by_share.get(share, [])
+            found = [overlap for overlap in results if overlap is not None]
+            print(f"{share:>7.0%} {len(results):>7} {len(found) / max(len(results), 1):>16.0%} "
+                  f"{statistics.mean(found) if found else 0:>13.2f}")
+
+        async with engine.connect() as connection:
+            buckets = (await connection.execute(
+                select(SimilarityBucket.bucket).where(SimilarityBucket.attachment_id == attachments[-1].id)
+            )).scalars().all()
+            plan = (await connection.execute(text(
+                "EXPLAIN ANALYZE SELECT attachment_id, count(*) FROM similaritybucket "
+                f"WHERE bucket IN ({', '.join(map(str, buckets))}) GROUP BY attachment_id"
+            ))).scalars().all()
+        print()
+        print("\n".join(line[:120] for line in plan))
+    finally:
+        async with SessionLocal() as db:
+            thesis_ids = select(Thesis.id).where(Thesis.student_id == student.id)
+            await db.execute(delete(ThesisAttachment).where(ThesisAttachment.thesis_id.in_(thesis_ids)))
+            await db.execute(delete(Thesis).where(Thesis.student_id == student.id))
+            await db.execute(delete(User).where(User.id == student.id))
+            await db.commit()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--theses", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=4000, help="words per thesis")
+    parser.add_argument("--copies", type=int, default=20, help="planted copies per copied share")
+    parser.add_argument("--queries", type=int, default=50, help="lookups timed per step")
+    parser.add_argument("--steps", type=int, default=4, help="corpus sizes measured")
+    args = parser.parse_args()
+    asyncio.run(run(args.theses, args.words, args.copies, args.queries, args.steps))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Memory benchmark for saving uploads.
+
+For each size, a fresh subprocess writes a source file of that many MB,
+wraps it in an UploadFile the way the multipart parser hands it over
+(already spooled to disk) and streams it with stream_to_file into a
+temporary directory. The subprocess reports how far its peak RSS
+rose above the baseline taken right before the save; streaming keeps that
+flat regardless of the file size.
+
+    python -m scripts.bench_upload_memory --sizes 10 50 200
+
+Run it on two builds to compare.
+"""
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+CHUNK = 1024 * 1024
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def save_once(size_mb: int) -> None:
+    from fastapi import UploadFile
+
+    from app.core import file_utils
+
+    with tempfile.TemporaryDirectory() as workdir:
+        source = Path(workdir) / "source.pdf"
+        block = os.urandom(CHUNK)
+        with open(source, "wb") as f:
+            for _ in range(size_mb):
+                f.write(block)
+
+        baseline = peak_rss_mb()
+        started = time.perf_counter()
+        with open(source, "rb") as f:
+            await file_utils.stream_to_file(
+                UploadFile(file=f, filename="source.pdf"), Path(workdir) / "saved.pdf", size_mb * CHUNK
+            )
+        elapsed = time.perf_counter() - started
+        print(f"{size_mb} {peak_rss_mb() - baseline:.1f} {elapsed:.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200],
+                        help="file sizes in MB")
+    parser.add_argument("--one", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.one is not None:
+        asyncio.run(save_once(args.one))
+        return
+
+    print(f"{'size':>8} {'peak RSS growth':>16} {'time':>8}")
+    for size in args.sizes:
+        output = subprocess.run(
+            [sys.executable, "-m", "scripts.bench_upload_memory", "--one", str(size)],
+            capture_output=True, text=True, check=True,
+        ).stdout.split()
+        _, growth, elapsed = output[-3:]
+        print(f"{size:>5} MB {growth:>13} MB {elapsed:>7}s")
+
+
+if __name__ == "__main__":
+    main()
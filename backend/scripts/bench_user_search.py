@@ -0,0 +1,124 @@
+"""
+User search latency benchmark.
+
+Adds synthetic users with Bulgarian names to the configured database, then
+times GET /users/search for typical typeahead input through the app, and
+prints the query plan of each lookup. Without the trigram indexes of
+migration 008 (or the pg_trgm extension) the plans show sequential scans:
+
+    python -m scripts.bench_user_search --users 50000
+
+Rows created by the benchmark are removed again afterwards. Only point
+this at a development database.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime
+
+import httpx
+from sqlalchemy import delete, insert, text
+
+from app.api.v1.endpoints.users import SEARCH_COLUMNS
+from app.core.security import create_access_token
+from app.db.session import SessionLocal, engine
+from app.main import app as fastapi_app
+from app.models import User, UserRole
+
+BATCH_SIZE = 5000
+
+FIRST_NAMES = [
+    "Александър", "Анна", "Борислав", "Валентина", "Георги", "Гергана", "Димитър", "Десислава", "Евгени",
+    "Елена", "Иван", "Ивана", "Калоян", "Катерина", "Любомир", "Мария", "Мартин", "Николай", "Петя",
+    "Петър", "Радослав", "Росица", "Стефан", "Светлана", "Теодор", "Цветелина", "Христо", "Яна",
+]
+LAST_NAMES = [
+    "Иванов", "Петров", "Георгиев", "Димитров", "Николов", "Стоянов", "Христов", "Тодоров", "Илиев",
+    "Ангелов", "Атанасов", "Василев", "Костадинов", "Маринов", "Колев", "Павлов", "Стефанов", "Йорданов",
+    "Михайлов", "Янков", "Цветков", "Радев", "Попов", "Кирилов", "Славов", "Лазаров", "Найденов",
+]
+# Typeahead input: a common first name, a rare surname stem, an email
+# fragment, a full name and something that matches nobody
+QUERIES = ["Иван", "Найд", "user123", "Мария Петрова", "xyzzy"]
+ROLES = [UserRole.student] * 90 + [UserRole.professor] * 7 + [UserRole.graduation_assistant] * 3
+
+
+def _uid() -> str:
+    return str(uuid.uuid4())
+
+
+def _feminine(surname: str, first_name: str) -> str:
+    return surname + "а" if first_name[-1] in "аяи" and first_name != "Николай" else surname
+
+
+async def run(users: int, queries: int) -> None:
+    rng = random.Random(1)
+    now = datetime.utcnow()
+    tag = uuid.uuid4().hex[:8]
+    rows = []
+    for n in range(users):
+        first = rng.choice(FIRST_NAMES)
+        rows.append({"id": _uid(), "email": f"user{n}-{tag}@example.com",
+                     "full_name": f"{first} {_feminine(rng.choice(LAST_NAMES), first)}",
+                     "role": rng.choice(ROLES), "is_active": rng.random() > 0.02, "created_at": now})
+    async with SessionLocal() as db:
+        for start in range(0, len(rows), BATCH_SIZE):
+            await db.execute(insert(User), rows[start:start + BATCH_SIZE])
+        await db.commit()
+    async with engine.begin() as connection:
+        await connection.execute(text('ANALYZE "user"'))
+        indexes = (await connection.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE tablename = 'user' AND indexname LIKE '%trgm'"
+        ))).scalars().all()
+    print(f"{users} users, trigram indexes: {', '.join(indexes) or 'none'}")
+
+    headers = {"Authorization": f"Bearer {create_access_token(rows[0]['id'])}"}
+    transport = httpx.ASGITransport(app=fastapi_app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            print(f"{'query':<16} {'role':<11} {'results':>7} {'p50':>8} {'p95':>8}")
+            for q in QUERIES:
+                for roles in ([], ["professor", "graduation_assistant"]):
+                    params = {"q": q, "role": roles}
+                    # The first request warms the connection pool and the user cache
+                    await client.get("/api/v1/users/search", headers=headers, params=params)
+                    times = []
+                    for _ in range(queries):
+                        started = time.perf_counter()
+                        response = await client.get("/api/v1/users/search", headers=headers, params=params)
+                        times.append(time.perf_counter() - started)
+                    times.sort()
+                    print(f"{q:<16} {'reviewers' if roles else 'any':<11} {len(response.json()):>7} "
+                          f"{statistics.median(times) * 1000:>6.1f}ms "
+                          f"{times[int(len(times) * 0.95)] * 1000:>6.1f}ms")
+
+        async with engine.connect() as connection:
+            for q in QUERIES[:2]:
+                plan = (await connection.execute(text(
+                    f"EXPLAIN ANALYZE SELECT {', '.join(column.name for column in SEARCH_COLUMNS)} FROM \"user\" "
+                    "WHERE (full_name ILIKE :pattern OR email ILIKE :pattern) AND is_active "
+                    "ORDER BY full_name ILIKE :prefix DESC NULLS LAST, full_name, id LIMIT 10"
+                ), {"pattern": f"%{q}%", "prefix": f"{q}%"})).scalars().all()
+                print()
+                print(f"-- {q}")
+                print("\n".join(line[:120] for line in plan))
+    finally:
+        async with SessionLocal() as db:
+            await db.execute(delete(User).where(User.email.like(f"%-{tag}@example.com")))
+            await db.commit()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=50, help="requests timed per query")
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.queries))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Conditional GET and byte-range check for file downloads.
+
+Uploads an attachment and a profile picture into a temporary local store,
+then downloads them in-process with the headers PDF viewers and download
+managers send: If-None-Match and If-Modified-Since (expecting 304), single,
+suffix, open-ended, overlapping and multiple ranges (206, multipart for
+several), If-Range with a current and a stale validator, and unsatisfiable
+or malformed ranges. Every partial body is compared with the matching
+slice of the uploaded bytes.
+
+    python -m scripts.check_downloads
+"""
+import email
+import os
+import tempfile
+from datetime import datetime
+from email.utils import formatdate
+from pathlib import Path
+
+import httpx
+from sqlalchemy import delete, select
+
+from app.core import file_utils, storage
+from app.core.security import create_access_token
+from app.db.session import SessionLocal, engine
+from app.main import app as fastapi_app
+from app.models import FileBlob, Thesis, ThesisAttachment, ThesisStatus, User, UserRole
+from scripts.checks import Checks, exit_with, uid
+
+
+def multipart_parts(response: httpx.Response):
+    """
+    (Content-Range, body) for each part of a multipart/byteranges response.
+    """
+    message = email.message_from_bytes(
+        b"Content-Type: " + response.headers["content-type"].encode() + b"\r\n\r\n" + response.content
+    )
+    return [(part["Content-Range"], part.get_payload(decode=True)) for part in message.get_payload()]
+
+
+async def run() -> int:
+    workdir = Path(tempfile.mkdtemp())
+    file_utils.UPLOAD_DIR = workdir
+    storage._storage = storage.LocalStorage(workdir)
+
+    now = datetime.utcnow()
+    student = User(id=uid(), email=f"downloads-{uid()}@example.com", full_name="Download Check",
+                   role=UserRole.student, is_active=True)
+    thesis = Thesis(id=uid(), title="Download check", abstract="Downloads", status=ThesisStatus.draft,
+                    student_id=student.id, created_at=now, updated_at=now)
+    async with SessionLocal() as db:
+        db.add_all([student, thesis])
+        await db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(student.id)}"}
+
+    check = Checks()
+
+    data = os.urandom(1024 * 1024 + 123)
+    size = len(data)
+    transport = httpx.ASGITransport(app=fastapi_app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+            attachment = (await client.post(
+                f"/api/v1/theses/{thesis.id}/attachments", headers=headers,
+                files={"file": ("thesis.pdf", data, "application/pdf")},
+            )).json()
+            url = f"/api/v1/theses/{thesis.id}/attachments/{attachment['id']}/download"
+
+            async def get(extra=None, target=url):
+                return await client.get(target, headers={**headers, **(extra or {})})
+
+            full = await get()
+            etag, last_modified = full.headers.get("etag"), full.headers.get("last-modified")
+            check("full download carries validators",
+                  full.status_code == 200 and full.content == data and etag == f'"{attachment["file_path"].rsplit("/", 1)[1]}"'
+                  and last_modified and full.headers.get("accept-ranges") == "bytes",
+                  f"HTTP {full.status_code}, ETag {etag[:12] if etag else None}...")
+
+            response = await get({"If-None-Match": etag})
+            check("If-None-Match -> 304", response.status_code == 304 and not response.content
+                  and response.headers.get("etag") == etag, f"HTTP {response.status_code}")
+            response = await get({"If-None-Match": f'"other", W/{etag}'})
+            check("weak and listed ETags match too", response.status_code == 304, f"HTTP {response.status_code}")
+            response = await get({"If-None-Match": '"other"'})
+            check("other ETag -> 200", response.status_code == 200, f"HTTP {response.status_code}")
+            response = await get({"If-Modified-Since": last_modified})
+            check("If-Modified-Since -> 304", response.status_code == 304, f"HTTP {response.status_code}")
+            response = await get({"If-Modified-Since": formatdate(0, usegmt=True)})
+            check("older If-Modified-Since -> 200", response.status_code == 200, f"HTTP {response.status_code}")
+
+            for label, header, start, end in [
+                ("first 100 bytes", "bytes=0-99", 0, 100),
+                ("middle range", "bytes=1000-1999", 1000, 2000),
+                ("open-ended range", f"bytes={size - 50}-", size - 50, size),
+                ("suffix range", "bytes=-500", size - 500, size),
+                ("range past the end is clipped", f"bytes={size - 10}-{size + 1000}", size - 10, size),
+                ("overlapping ranges are merged", "bytes=0-99,50-199", 0, 200),
+            ]:
+                response = await get({"Range": header})
+                check(label, response.status_code == 206 and response.content == data[start:end]
+                      and response.headers.get("content-range") == f"bytes {start}-{end - 1}/{size}"
+                      and response.headers.get("content-length") == str(end - start),
+                      f"HTTP {response.status_code}, {response.headers.get('content-range')}")
+
+            response = await get({"Range": "bytes=0-9,1000-1099,-20"})
+            parts = multipart_parts(response) if response.status_code == 206 else []
+            expected = [(f"bytes 0-9/{size}", data[0:10]), (f"bytes 1000-1099/{size}", data[1000:1100]),
+                        (f"bytes {size - 20}-{size - 1}/{size}", data[size - 20:])]
+            check("multiple ranges -> multipart/byteranges",
+                  response.headers.get("content-type", "").startswith("multipart/byteranges")
+                  and parts == expected and response.headers.get("content-length") == str(len(response.content)),
+                  f"HTTP {response.status_code}, {len(parts)} part(s)")
+
+            response = await get({"Range": "bytes=0-99", "If-Range": etag})
+            check("If-Range with current ETag -> 206", response.status_code == 206, f"HTTP {response.status_code}")
+            response = await get({"Range": "bytes=0-99", "If-Range": '"stale"'})
+            check("If-Range with stale ETag -> 200", response.status_code == 200 and response.content == data,
+                  f"HTTP {response.status_code}")
+            response = await get({"Range": f"bytes={size}-"})
+            check("unsatisfiable range -> 416", response.status_code == 416
+                  and response.headers.get("content-range") == f"bytes */{size}", f"HTTP {response.status_code}")
+            response = await get({"Range": "bytes=abc"})
+            check("malformed range is ignored", response.status_code == 200 and response.content == data,
+                  f"HTTP {response.status_code}")
+
+            picture = os.urandom(4096)
+            user = (await client.post("/api/v1/users/me/profile-picture", headers=headers,
+                                      files={"file": ("me.png", picture, "image/png")})).json()
+            picture_url = f"/api/v1/users/profile-picture/{user['profile_picture']}"
+            response = await get(target=picture_url)
+            check("profile picture carries validators",
+                  response.status_code == 200 and response.content == picture and response.headers.get("etag")
+                  and response.headers.get("cache-control") == "public, max-age=3600",
+                  f"HTTP {response.status_code}")
+            response = await get({"If-None-Match": response.headers.get("etag", "")}, target=picture_url)
+            check("profile picture If-None-Match -> 304", response.status_code == 304, f"HTTP {response.status_code}")
+            response = await get({"Range": "bytes=100-199"}, target=picture_url)
+            check("profile picture range -> 206", response.status_code == 206 and response.content == picture[100:200],
+                  f"HTTP {response.status_code}")
+    finally:
+        async with SessionLocal() as db:
+            digests = (await db.scalars(
+                select(ThesisAttachment.blob_sha256).where(ThesisAttachment.thesis_id == thesis.id)
+            )).all()
+            await db.execute(delete(ThesisAttachment).where(ThesisAttachment.thesis_id == thesis.id))
+            await db.execute(delete(FileBlob).where(FileBlob.sha256.in_(digests)))
+            await db.execute(delete(Thesis).where(Thesis.id == thesis.id))
+            await db.execute(delete(User).where(User.id == student.id))
+            await db.commit()
+        await engine.dispose()
+    return check.failures
+
+
+def main() -> None:
+    exit_with(run())
+
+
+if __name__ == "__main__":
+    main()
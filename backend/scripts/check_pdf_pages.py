@@ -0,0 +1,163 @@
+"""
+Paged PDF preview check.
+
+Uploads a PDF (the first one in ../pdfs, or the file given as argument)
+into a temporary local store and previews it in-process. Checks that the
+preview no longer inlines the file but points at the download URL, which
+answers Range requests, and reports the page count. Then pages through
+the text: requested pages match PyPDF2's own extraction, only those pages
+are extracted and cached, repeated requests are served from the cache,
+and out-of-range or oversized requests and non-PDF files are handled.
+Extracting the remaining pages in parallel batches gives the same text as
+the serial extraction.
+Prints the preview payload against the base64 payload it replaces.
+
+    python -m scripts.check_pdf_pages [file.pdf]
+"""
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+import PyPDF2
+from sqlalchemy import delete, select
+
+from app.core import file_utils, preview_cache, storage
+from app.core.pdf_extract import page_batches
+from app.core.process_pool import shutdown_process_pool
+from app.core.security import create_access_token
+from app.db.session import SessionLocal, engine
+from app.main import app as fastapi_app
+from app.models import FileBlob, Thesis, ThesisAttachment, ThesisStatus, User, UserRole
+from scripts.checks import Checks, exit_with, uid
+
+PDF_DIR = Path(__file__).resolve().parents[2] / "pdfs"
+
+
+async def run(pdf: Path) -> int:
+    workdir = Path(tempfile.mkdtemp())
+    file_utils.UPLOAD_DIR = workdir
+    storage._storage = storage.LocalStorage(workdir)
+
+    data = pdf.read_bytes()
+    reader = PyPDF2.PdfReader(pdf)
+    expected_pages = len(reader.pages)
+
+    now = datetime.utcnow()
+    student = User(id=uid(), email=f"pages-{uid()}@example.com", full_name="Pages Check",
+                   role=UserRole.student, is_active=True)
+    thesis = Thesis(id=uid(), title="Pages check", abstract="Pages", status=ThesisStatus.draft,
+                    student_id=student.id, created_at=now, updated_at=now)
+    async with SessionLocal() as db:
+        db.add_all([student, thesis])
+        await db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(student.id)}"}
+    base = f"/api/v1/theses/{thesis.id}/attachments"
+
+    check = Checks()
+
+    transport = httpx.ASGITransport(app=fastapi_app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+            attachment = (await client.post(base, headers=headers,
+                                            files={"file": ("thesis.pdf", data, "application/pdf")})).json()
+            url = f"{base}/{attachment['id']}"
+
+            response = await client.get(f"{url}/preview", headers=headers)
+            body = response.json()
+            inlined = len(data) * 4 // 3
+            check("preview no longer inlines the PDF",
+                  response.status_code == 200 and "base64" not in response.text and len(response.content) < 2048,
+                  f"{len(response.content)} bytes instead of ~{inlined // 1024} KiB")
+            check("preview reports the page count", body.get("page_count") == expected_pages,
+                  f"{body.get('page_count')} page(s)")
+            download = f"{url}/download?inline=true"
+            check("HTML points at the download URL", f'data="{download}"' in (body.get("html") or ""))
+            response = await client.get(f"{url}/preview", params={"format": "html"}, headers=headers)
+            check("HTML format returns the viewer", response.status_code == 200
+                  and response.headers["content-type"].startswith("text/html") and download in response.text)
+            response = await client.get(download, headers={**headers, "Range": "bytes=0-1023"})
+            check("viewer URL answers Range requests",
+                  response.status_code == 206 and response.content == data[:1024]
+                  and response.headers.get("content-disposition", "").startswith("inline"),
+                  f"HTTP {response.status_code}")
+
+            entry = preview_cache.entry_dir(attachment["file_path"].rsplit("/", 1)[1], "thesis.pdf")
+            pages_dir = entry / preview_cache.PAGES_DIR
+
+            def cached_pages():
+                return sorted(int(path.stem) for path in pages_dir.glob("*.txt")) if pages_dir.is_dir() else []
+
+            started = time.perf_counter()
+            response = await client.get(f"{url}/pages", params={"start": 2, "count": 3}, headers=headers)
+            cold_ms = (time.perf_counter() - started) * 1000
+            body = response.json()
+            check("requested pages match PyPDF2",
+                  body.get("page_count") == expected_pages
+                  and [page["number"] for page in body["pages"]] == [2, 3, 4]
+                  and [page["text"] for page in body["pages"]] == [reader.pages[i].extract_text() for i in (1, 2, 3)],
+                  f"HTTP {response.status_code}")
+            check("only requested pages are extracted", cached_pages() == [2, 3, 4], f"cached {cached_pages()}")
+            started = time.perf_counter()
+            again = await client.get(f"{url}/pages", params={"start": 2, "count": 3}, headers=headers)
+            warm_ms = (time.perf_counter() - started) * 1000
+            check("repeated pages come from the cache", again.json() == body,
+                  f"cold {cold_ms:.0f} ms, warm {warm_ms:.0f} ms")
+            response = await client.get(f"{url}/pages", params={"start": 4, "count": 3}, headers=headers)
+            check("overlapping range extracts only new pages",
+                  [page["number"] for page in response.json()["pages"]] == [4, 5, 6] and cached_pages() == [2, 3, 4, 5, 6],
+                  f"cached {cached_pages()}")
+
+            extracted = await preview_cache.cache_all_pages(entry, attachment["file_path"])
+            serial = file_utils.extract_text(pdf, pdf.name)
+            check("remaining pages are extracted in batches",
+                  extracted == expected_pages - 5 and cached_pages() == list(range(1, expected_pages + 1)),
+                  f"{extracted} extracted")
+            check("cached pages stream the whole text",
+                  "\n".join(preview_cache.iter_cached_text(entry)) == serial)
+            check("parallel extract_text_from_file matches serial",
+                  await file_utils.extract_text_from_file(pdf, pdf.name) == serial)
+            check("batches are runs of consecutive pages",
+                  page_batches([9, 1, 2, 3, 5, 6, 7], 2) == [[1, 2], [3], [5, 6], [7], [9]])
+
+            response = await client.get(f"{url}/pages", params={"start": expected_pages, "count": 10}, headers=headers)
+            check("range is clipped at the last page",
+                  [page["number"] for page in response.json()["pages"]] == [expected_pages])
+            response = await client.get(f"{url}/pages", params={"start": expected_pages + 1}, headers=headers)
+            check("range past the end is empty", response.status_code == 200 and response.json()["pages"] == [],
+                  f"HTTP {response.status_code}")
+            response = await client.get(f"{url}/pages", params={"count": 51}, headers=headers)
+            check("too many pages -> 422", response.status_code == 422, f"HTTP {response.status_code}")
+
+            text = (await client.post(base, headers=headers,
+                                      files={"file": ("notes.txt", b"not a pdf", "text/plain")})).json()
+            response = await client.get(f"{base}/{text['id']}/pages", headers=headers)
+            check("non-PDF -> 400", response.status_code == 400, f"HTTP {response.status_code}")
+            fake = (await client.post(base, headers=headers,
+                                      files={"file": ("fake.pdf", b"not a pdf", "application/pdf")})).json()
+            response = await client.get(f"{base}/{fake['id']}/pages", headers=headers)
+            check("unreadable PDF -> 422", response.status_code == 422, f"HTTP {response.status_code}")
+    finally:
+        shutdown_process_pool()
+        async with SessionLocal() as db:
+            digests = (await db.scalars(
+                select(ThesisAttachment.blob_sha256).where(ThesisAttachment.thesis_id == thesis.id)
+            )).all()
+            await db.execute(delete(ThesisAttachment).where(ThesisAttachment.thesis_id == thesis.id))
+            await db.execute(delete(FileBlob).where(FileBlob.sha256.in_(digests)))
+            await db.execute(delete(Thesis).where(Thesis.id == thesis.id))
+            await db.execute(delete(User).where(User.id == student.id))
+            await db.commit()
+        await engine.dispose()
+    return check.failures
+
+
+def main() -> None:
+    pdf = Path(sys.argv[1]) if len(sys.argv) > 1 else sorted(PDF_DIR.glob("*.pdf"))[0]
+    exit_with(run(pdf))
+
+
+if __name__ == "__main__":
+    main()
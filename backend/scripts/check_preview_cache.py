@@ -0,0 +1,190 @@
+"""
+Preview cache check.
+
+Uploads a DOCX and a text attachment into a temporary local store and
+previews them in-process. Checks that each preview is rendered once and
+then served from the cache (in all three formats, with an ETag answered by
+304), identical content shares one cache entry, concurrent first views
+wait for a single render, replacing an attachment serves the new content
+and drops the old entry, deleting the last reference drops the entry, and
+least recently used entries are evicted past PREVIEW_CACHE_MAX_BYTES.
+Prints cold and warm timings for the DOCX preview.
+
+    python -m scripts.check_preview_cache
+"""
+import asyncio
+import io
+import os
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import docx
+import httpx
+from sqlalchemy import delete, select
+
+from app.core import file_utils, preview_cache, storage
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.session import SessionLocal, engine
+from app.main import app as fastapi_app
+from app.models import FileBlob, Thesis, ThesisAttachment, ThesisStatus, User, UserRole
+from scripts.checks import Checks, exit_with, uid
+
+
+def make_docx(paragraphs: int) -> bytes:
+    document = docx.Document()
+    for index in range(paragraphs):
+        document.add_paragraph(f"Paragraph {index}: " + "thesis text " * 40)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def cache_entries():
+    return sorted(meta.parent for meta in preview_cache.preview_root().glob(f"*/*/*/{preview_cache.META_FILE}"))
+
+
+def entry_size(entry):
+    return sum(item.stat().st_size for item in entry.iterdir())
+
+
+async def run() -> int:
+    workdir = Path(tempfile.mkdtemp())
+    file_utils.UPLOAD_DIR = workdir
+    storage._storage = storage.LocalStorage(workdir)
+
+    renders = 0
+    render = preview_cache.get_file_preview
+
+    async def counting_preview(*args, **kwargs):
+        nonlocal renders
+        renders += 1
+        return await render(*args, **kwargs)
+
+    preview_cache.get_file_preview = counting_preview
+
+    now = datetime.utcnow()
+    student = User(id=uid(), email=f"previews-{uid()}@example.com", full_name="Preview Check",
+                   role=UserRole.student, is_active=True)
+    thesis = Thesis(id=uid(), title="Preview check", abstract="Previews", status=ThesisStatus.draft,
+                    student_id=student.id, created_at=now, updated_at=now)
+    async with SessionLocal() as db:
+        db.add_all([student, thesis])
+        await db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(student.id)}"}
+    base = f"/api/v1/theses/{thesis.id}/attachments"
+
+    check = Checks()
+
+    document = make_docx(2000)
+    transport = httpx.ASGITransport(app=fastapi_app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+            async def upload(name, data, mimetype):
+                return (await client.post(base, headers=headers, files={"file": (name, data, mimetype)})).json()
+
+            async def preview(attachment_id, format="json", extra=None):
+                return await client.get(f"{base}/{attachment_id}/preview", params={"format": format},
+                                        headers={**headers, **(extra or {})})
+
+            first = await upload("thesis.docx", document, "application/octet-stream")
+            started = time.perf_counter()
+            cold = await preview(first["id"])
+            cold_ms = (time.perf_counter() - started) * 1000
+            started = time.perf_counter()
+            warm = await preview(first["id"])
+            warm_ms = (time.perf_counter() - started) * 1000
+            check("first view renders, second is cached",
+                  renders == 1 and cold.json() == warm.json() and "Paragraph 1999" in warm.json()["html"],
+                  f"{renders} render(s), cold {cold_ms:.0f} ms, warm {warm_ms:.0f} ms")
+            body = warm.json()
+            check("JSON keeps the preview shape and metadata",
+                  body["content_type"] == "document" and body["filename"] == "thesis.docx"
+                  and body["file_size"] == len(document) and "Paragraph 0" in body["content"])
+
+            response = await preview(first["id"], "html")
+            etag = response.headers.get("etag")
+            check("HTML format served from the cache",
+                  response.status_code == 200 and response.text == body["html"] and etag
+                  and response.headers.get("content-type", "").startswith("text/html"), f"ETag {etag}")
+            response = await preview(first["id"], "html", {"If-None-Match": etag or ""})
+            check("HTML If-None-Match -> 304", response.status_code == 304, f"HTTP {response.status_code}")
+            response = await preview(first["id"], "text")
+            check("text format served from the cache", response.json() == {"content": body["content"]})
+
+            second = await upload("copy.docx", document, "application/octet-stream")
+            response = await preview(second["id"])
+            check("identical content shares the entry",
+                  renders == 1 and response.json()["filename"] == "copy.docx" and len(cache_entries()) == 1,
+                  f"{renders} render(s), {len(cache_entries())} entr(ies)")
+            as_text = await upload("plain.txt", b"same bytes", "text/plain")
+            as_pdf = await upload("plain.pdf", b"same bytes", "application/pdf")
+            await preview(as_text["id"])
+            check("same bytes as another type get their own entry",
+                  (await preview(as_pdf["id"])).json()["type"] == "pdf" and len(cache_entries()) == 3,
+                  f"{len(cache_entries())} entr(ies)")
+            await client.delete(f"{base}/{as_text['id']}", headers=headers)
+            await client.delete(f"{base}/{as_pdf['id']}", headers=headers)
+
+            fresh = await upload("fresh.docx", make_docx(500), "application/octet-stream")
+            renders = 0
+            responses = await asyncio.gather(*(preview(fresh["id"]) for _ in range(5)))
+            check("concurrent first views render once",
+                  renders == 1 and all(response.status_code == 200 for response in responses),
+                  f"{renders} render(s)")
+
+            notes = await upload("notes.txt", b"first version", "text/plain")
+            await preview(notes["id"])
+            old_entry = preview_cache.entry_dir(notes["file_path"].rsplit("/", 1)[1], "notes.txt")
+            response = await client.post(f"{base}/{notes['id']}/replace", headers=headers,
+                                         files={"file": ("notes.txt", b"second version", "text/plain")})
+            response = await preview(notes["id"], "text")
+            check("replace serves the new content",
+                  response.json() == {"content": "second version"}, f"{response.json()}")
+            check("replace drops the old entry", not old_entry.exists())
+
+            entry = preview_cache.entry_dir(first["file_path"].rsplit("/", 1)[1], "thesis.docx")
+            await client.delete(f"{base}/{first['id']}", headers=headers)
+            check("entry kept while content is referenced", entry.exists())
+            await client.delete(f"{base}/{second['id']}", headers=headers)
+            check("entry dropped with the last reference", not entry.exists())
+
+            # Age every entry past the grace period, most recently used last.
+            # The smallest is the newest, so the others take the cache past a
+            # limit it fits under whatever order the digests sort in
+            entries = sorted(cache_entries(), key=entry_size, reverse=True)
+            for age, path in enumerate(reversed(entries)):
+                stamp = time.time() - preview_cache.EVICTION_GRACE_SECONDS - 10 - age
+                os.utime(path / preview_cache.META_FILE, (stamp, stamp))
+            newest = entries[-1]
+            # Room for the newest entry below the 90% low-water mark only
+            settings.PREVIEW_CACHE_MAX_BYTES = int(entry_size(newest) / 0.9) + 1
+            removed = await preview_cache.evict()
+            check("eviction keeps the most recently used",
+                  cache_entries() == [newest] and removed == len(entries) - 1,
+                  f"{removed} of {len(entries)} evicted")
+            os.utime(newest / preview_cache.META_FILE)
+            settings.PREVIEW_CACHE_MAX_BYTES = 0
+            check("recently used entries are not evicted", await preview_cache.evict() == 0 and cache_entries())
+    finally:
+        async with SessionLocal() as db:
+            digests = (await db.scalars(
+                select(ThesisAttachment.blob_sha256).where(ThesisAttachment.thesis_id == thesis.id)
+            )).all()
+            await db.execute(delete(ThesisAttachment).where(ThesisAttachment.thesis_id == thesis.id))
+            await db.execute(delete(FileBlob).where(FileBlob.sha256.in_(digests)))
+            await db.execute(delete(Thesis).where(Thesis.id == thesis.id))
+            await db.execute(delete(User).where(User.id == student.id))
+            await db.commit()
+        await engine.dispose()
+    return check.failures
+
+
+def main() -> None:
+    exit_with(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Background processing check.
+
+Runs the processing worker in-process against a temporary local store.
+Uploads a large DOCX and checks that the upload returns before anything is
+rendered, the job is polled from pending to done, and the preview is then
+served from the cache. Measures event loop stalls while the DOCX is
+rendered on the processing pool, against rendering it on the loop as
+before. A PDF job extracts the text of every page. Also checks that replacing the file restarts the job, a missing
+file fails the job after PROCESSING_MAX_ATTEMPTS attempts with the error
+recorded, a job whose worker died is claimed again, and deleting the
+attachment removes its job.
+
+    python -m scripts.check_processing_jobs
+"""
+import asyncio
+import io
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import docx
+import httpx
+from sqlalchemy import delete, select, update
+
+from app.core import file_utils, preview_cache, storage
+from app.core.config import settings
+from app.core.process_pool import shutdown_process_pool
+from app.core.processing import claim_job, process_jobs
+from app.core.security import create_access_token
+from app.db.session import SessionLocal, engine
+from app.main import app as fastapi_app
+from app.models import (
+    FileBlob, JobStatus, ProcessingJob, Thesis, ThesisAttachment, ThesisStatus, User, UserRole,
+)
+from scripts.checks import Checks, exit_with, uid
+
+
+PDF_DIR = Path(__file__).resolve().parents[2] / "pdfs"
+
+
+def make_docx(paragraphs: int) -> bytes:
+    document = docx.Document()
+    for index in range(paragraphs):
+        document.add_paragraph(f"Paragraph {index}: " + "thesis text " * 40)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+class LoopLag:
+    """
+    Longest gap between ticks of a 10 ms timer: how long the loop stalled.
+    """
+
+    async def __aenter__(self):
+        self.worst = 0.0
+        self._task = asyncio.create_task(self._tick())
+        return self
+
+    async def _tick(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            self.worst = max(self.worst, time.perf_counter() - started - 0.01)
+
+    async def __aexit__(self, *exc):
+        self._task.cancel()
+
+
+async def run() -> int:
+    workdir = Path(tempfile.mkdtemp())
+    file_utils.UPLOAD_DIR = workdir
+    storage._storage = storage.LocalStorage(workdir)
+    settings.PROCESSING_POLL_INTERVAL_SECONDS = 0.2
+
+    now = datetime.utcnow()
+    student = User(id=uid(), email=f"processing-{uid()}@example.com", full_name="Processing Check",
+                   role=UserRole.student, is_active=True)
+    other = User(id=uid(), email=f"processing-{uid()}@example.com", full_name="Other Student",
+                 role=UserRole.student, is_active=True)
+    thesis = Thesis(id=uid(), title="Processing check", abstract="Processing", status=ThesisStatus.draft,
+                    student_id=student.id, created_at=now, updated_at=now)
+    async with SessionLocal() as db:
+        db.add_all([student, other, thesis])
+        await db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(student.id)}"}
+    base = f"/api/v1/theses/{thesis.id}/attachments"
+
+    check = Checks()
+
+    document = make_docx(4000)
+    # Rendered on the loop, as every preview used to be
+    inline = workdir / "inline.docx"
+    inline.write_bytes(document)
+    async with LoopLag() as before:
+        await asyncio.sleep(0.02)
+        file_utils.render_preview(inline, "inline.docx")
+        await asyncio.sleep(0.02)
+
+    worker = asyncio.create_task(process_jobs())
+    transport = httpx.ASGITransport(app=fastapi_app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+            async def job_status(attachment_id, who=headers):
+                return await client.get(f"{base}/{attachment_id}/processing", headers=who)
+
+            async def wait_for(attachment_id, statuses=("done", "failed"), timeout=60):
+                deadline = time.monotonic() + timeout
+                while time.monotonic() < deadline:
+                    body = (await job_status(attachment_id)).json()
+                    if body.get("status") in statuses:
+                        return body
+                    await asyncio.sleep(0.05)
+                return body
+
+            # Warm the pool up, so spawning workers is not counted below
+            await asyncio.gather(*(
+                file_utils.get_file_preview(inline, "inline.pdf") for _ in range(settings.PROCESSING_WORKERS)
+            ))
+
+            async with LoopLag() as during:
+                started = time.perf_counter()
+                response = await client.post(base, headers=headers,
+                                             files={"file": ("thesis.docx", document, "application/octet-stream")})
+                upload_ms = (time.perf_counter() - started) * 1000
+                attachment = response.json()
+                entry = preview_cache.entry_dir(attachment["file_path"].rsplit("/", 1)[1], "thesis.docx")
+                rendered_on_upload = entry.exists()
+                body = await wait_for(attachment["id"])
+            check("upload returns before processing", response.status_code == 200 and not rendered_on_upload,
+                  f"{upload_ms:.0f} ms")
+            check("job runs to done", body.get("status") == "done" and body.get("attempts") == 1
+                  and body.get("finished_at"), f"{body.get('status')}")
+            check("loop stays responsive while rendering", during.worst < before.worst / 2,
+                  f"worst stall {during.worst * 1000:.0f} ms vs {before.worst * 1000:.0f} ms on the loop")
+            response = await client.get(f"{base}/{attachment['id']}/preview", headers=headers)
+            check("preview served from the processed entry",
+                  entry.exists() and "Paragraph 3999" in response.json().get("html", ""),
+                  f"HTTP {response.status_code}")
+
+            pdf = sorted(PDF_DIR.glob("*.pdf"))[0]
+            thesis_pdf = (await client.post(base, headers=headers,
+                                            files={"file": ("thesis.pdf", pdf.read_bytes(), "application/pdf")})).json()
+            body = await wait_for(thesis_pdf["id"])
+            pdf_entry = preview_cache.entry_dir(thesis_pdf["file_path"].rsplit("/", 1)[1], "thesis.pdf")
+            page_count = preview_cache.read_meta(pdf_entry).get("page_count") if pdf_entry.exists() else 0
+            cached = len(list((pdf_entry / preview_cache.PAGES_DIR).glob("*.txt"))) if pdf_entry.exists() else 0
+            check("PDF job extracts every page", body.get("status") == "done" and page_count and cached == page_count,
+                  f"{cached} of {page_count} page(s) cached")
+
+            response = await job_status(attachment["id"], {"Authorization": f"Bearer {create_access_token(other.id)}"})
+            check("other students cannot poll", response.status_code == 403, f"HTTP {response.status_code}")
+            response = await job_status(uid())
+            check("unknown attachment -> 404", response.status_code == 404, f"HTTP {response.status_code}")
+
+            response = await client.post(f"{base}/{attachment['id']}/replace", headers=headers,
+                                         files={"file": ("notes.txt", b"replaced", "text/plain")})
+            body = await wait_for(attachment["id"])
+            check("replace restarts the job",
+                  body.get("status") == "done" and body.get("attempts") == 1
+                  and body.get("created_at", "") > response.json()["created_at"],
+                  f"{body.get('status')}")
+            response = await client.get(f"{base}/{attachment['id']}/preview", params={"format": "text"}, headers=headers)
+            check("replaced preview is rendered", response.json() == {"content": "replaced"})
+
+            worker.cancel()
+            await asyncio.gather(worker, return_exceptions=True)
+            broken = (await client.post(base, headers=headers,
+                                        files={"file": ("broken.docx", make_docx(5), "application/octet-stream")})).json()
+            (workdir / broken["file_path"]).unlink()
+            worker = asyncio.create_task(process_jobs())
+            body = await wait_for(broken["id"], ("failed",), timeout=10)
+            check("missing file fails after the last attempt",
+                  body.get("status") == "failed" and body.get("attempts") == settings.PROCESSING_MAX_ATTEMPTS
+                  and body.get("error"), f"{body.get('attempts')} attempt(s): {body.get('error')}")
+
+            worker.cancel()
+            await asyncio.gather(worker, return_exceptions=True)
+            async with SessionLocal() as db:
+                await db.execute(
+                    update(ProcessingJob).where(ProcessingJob.attachment_id == attachment["id"])
+                    .values(status=JobStatus.running,
+                            started_at=datetime.utcnow() - timedelta(seconds=settings.PROCESSING_JOB_TIMEOUT_SECONDS + 1))
+                )
+                await db.commit()
+            claimed = await claim_job()
+            check("job of a dead worker is claimed again", claimed is not None and claimed[1] == attachment["id"])
+
+            await client.delete(f"{base}/{attachment['id']}", headers=headers)
+            async with SessionLocal() as db:
+                left = await db.scalar(select(ProcessingJob).where(ProcessingJob.attachment_id == attachment["id"]))
+            check("deleting the attachment removes its job", left is None)
+    finally:
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+        shutdown_process_pool()
+        async with SessionLocal() as db:
+            digests = (await db.scalars(
+                select(ThesisAttachment.blob_sha256).where(ThesisAttachment.thesis_id == thesis.id)
+            )).all()
+            await db.execute(delete(ThesisAttachment).where(ThesisAttachment.thesis_id == thesis.id))
+            await db.execute(delete(FileBlob).where(FileBlob.sha256.in_(digests)))
+            await db.execute(delete(Thesis).where(Thesis.id == thesis.id))
+            await db.execute(delete(User).where(User.id.in_([student.id, other.id])))
+            await db.commit()
+        await engine.dispose()
+    return check.failures
+
+
+def main() -> None:
+    exit_with(run())
+
+
+if __name__ == "__main__":
+    main()
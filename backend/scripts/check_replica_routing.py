@@ -0,0 +1,105 @@
+"""
+Routing check for the read replica and the read-your-writes window.
+
+Calls endpoints in-process and records which engine (primary or replica)
+served each statement, then checks that GET requests read from the replica,
+writes go to the primary, and a user's reads stick to the primary for the
+configured window after their own write while other users keep reading
+from the replica.
+
+    REPLICA_DATABASE_URI=postgresql://... python -m scripts.check_replica_routing
+
+Without REPLICA_DATABASE_URI a second engine on the primary database stands
+in for the replica, which is enough to observe the routing decisions.
+"""
+import argparse
+import asyncio
+
+import httpx
+from sqlalchemy import delete, event
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db import session as db_session
+from app.db.session import SessionLocal, engine, read_your_writes
+from app.main import app as fastapi_app
+from app.models import User, UserRole
+from scripts.checks import Checks, exit_with, uid
+
+
+async def run(args) -> int:
+    if db_session.replica_engine is None:
+        db_session.replica_engine = create_async_engine(settings.ASYNC_DATABASE_URI)
+    replica_engine = db_session.replica_engine
+    read_your_writes.window = args.window
+
+    hits = []
+
+    def recorder(name):
+        def record(*_):
+            hits.append(name)
+        return record
+
+    users = [
+        User(id=uid(), email=f"rr-{uid()}@example.com", full_name=f"RR User {i}",
+             role=UserRole.student, is_active=True)
+        for i in range(2)
+    ]
+    async with SessionLocal() as db:
+        db.add_all(users)
+        await db.commit()
+    # Give a real replica time to receive the seeded rows
+    await asyncio.sleep(args.lag)
+
+    writer, reader = (
+        {"Authorization": f"Bearer {create_access_token(user.id)}"} for user in users
+    )
+    steps = [
+        ("read before any write", "GET", writer, "replica"),
+        ("own write", "PUT", writer, "primary"),
+        ("own read inside window", "GET", writer, "primary"),
+        ("other user's read", "GET", reader, "replica"),
+        ("own read after window", "GET", writer, "replica"),
+    ]
+
+    check = Checks(width=26)
+    primary_listener, replica_listener = recorder("primary"), recorder("replica")
+    event.listen(engine.sync_engine, "before_cursor_execute", primary_listener)
+    event.listen(replica_engine.sync_engine, "before_cursor_execute", replica_listener)
+    try:
+        transport = httpx.ASGITransport(app=fastapi_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+            for label, method, headers, expected in steps:
+                if label == "own read after window":
+                    await asyncio.sleep(args.window)
+                hits.clear()
+                response = await client.request(
+                    method, "/api/v1/users/me", headers=headers,
+                    json={"bio": "routing check"} if method == "PUT" else None,
+                )
+                check(label, response.status_code < 400 and bool(hits) and set(hits) == {expected},
+                      f"expected {expected:<8} got {', '.join(sorted(set(hits))) or '-'} "
+                      f"(HTTP {response.status_code})")
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", primary_listener)
+        event.remove(replica_engine.sync_engine, "before_cursor_execute", replica_listener)
+        async with SessionLocal() as db:
+            await db.execute(delete(User).where(User.id.in_([user.id for user in users])))
+            await db.commit()
+        await engine.dispose()
+        await replica_engine.dispose()
+    return check.failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--window", type=float, default=0.5,
+                        help="read-your-writes window to use, in seconds")
+    parser.add_argument("--lag", type=float, default=0.0,
+                        help="seconds to wait for the replica after seeding")
+    exit_with(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Resumable upload check.
+
+Uploads a file in chunks into a temporary local store, in-process: chunks
+arrive out of order and one is sent again, a chunk with the wrong checksum
+or size is refused, completing with chunks missing is refused with 409, and
+progress reports the chunks received so far. Completing turns the chunks
+into an attachment whose download matches the original bytes and shares
+the blob of an identical direct upload. Also checks a whole-file checksum
+mismatch, aborting a session, chunks that finish arriving after their
+session was aborted or expired, and purging expired sessions together with
+chunk directories left without a session.
+
+    python -m scripts.check_resumable_uploads
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+from sqlalchemy import delete, select, update
+
+from app.core import file_utils, storage
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.core.upload_sessions import purge_expired_sessions, session_dir
+from app.db.session import SessionLocal, engine
+from app.main import app as fastapi_app
+from app.models import FileBlob, Thesis, ThesisAttachment, ThesisStatus, UploadSession, User, UserRole
+from scripts.checks import Checks, exit_with, uid
+
+
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+async def run() -> int:
+    workdir = Path(tempfile.mkdtemp())
+    file_utils.UPLOAD_DIR = workdir
+    storage._storage = storage.LocalStorage(workdir)
+    settings.UPLOAD_SESSION_CHUNK_SIZE = 256 * 1024
+
+    now = datetime.utcnow()
+    student = User(id=uid(), email=f"uploads-{uid()}@example.com", full_name="Upload Check",
+                   role=UserRole.student, is_active=True)
+    other = User(id=uid(), email=f"uploads-{uid()}@example.com", full_name="Other Student",
+                 role=UserRole.student, is_active=True)
+    thesis = Thesis(id=uid(), title="Upload check", abstract="Uploads", status=ThesisStatus.draft,
+                    student_id=student.id, created_at=now, updated_at=now)
+    async with SessionLocal() as db:
+        db.add_all([student, other, thesis])
+        await db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(student.id)}"}
+    other_headers = {"Authorization": f"Bearer {create_access_token(other.id)}"}
+    base = f"/api/v1/theses/{thesis.id}/uploads"
+
+    check = Checks()
+
+    chunk_size = settings.UPLOAD_SESSION_CHUNK_SIZE
+    data = os.urandom(3 * chunk_size + 1234)
+    pieces = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+    transport = httpx.ASGITransport(app=fastapi_app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+            async def start(body):
+                response = await client.post(base, headers=headers, json=body)
+                return response.json() if response.status_code == 200 else response
+
+            async def put(upload_id, index, piece, digest=None):
+                return await client.put(
+                    f"{base}/{upload_id}/chunks/{index}", content=piece,
+                    headers={**headers, "X-Chunk-SHA256": digest or sha256(piece)},
+                )
+
+            session = await start({"filename": "thesis.pdf", "file_size": len(data),
+                                   "description": "Final draft", "sha256": sha256(data)})
+            upload_id = session["id"]
+            check("session splits the file into chunks",
+                  session["chunk_count"] == 4 and session["chunk_size"] == chunk_size
+                  and session["received_chunks"] == [], f"{session['chunk_count']} chunk(s)")
+
+            for index in (3, 1):
+                response = await put(upload_id, index, pieces[index])
+            progress = response.json()
+            check("chunks are accepted out of order",
+                  response.status_code == 200 and progress["received_chunks"] == [1, 3]
+                  and progress["received_bytes"] == len(pieces[1]) + len(pieces[3]),
+                  f"received {progress.get('received_chunks')}")
+
+            response = await put(upload_id, 0, pieces[0], digest=sha256(b"other"))
+            check("bad chunk checksum -> 400", response.status_code == 400, f"HTTP {response.status_code}")
+            response = await put(upload_id, 0, pieces[0][:-1])
+            check("wrong chunk size -> 400", response.status_code == 400, f"HTTP {response.status_code}")
+            response = await put(upload_id, 4, b"x")
+            check("chunk index out of range -> 400", response.status_code == 400, f"HTTP {response.status_code}")
+            response = await client.get(f"{base}/{upload_id}", headers=headers)
+            check("refused chunks are not kept", response.json()["received_chunks"] == [1, 3],
+                  f"received {response.json()['received_chunks']}")
+            response = await client.get(f"{base}/{upload_id}", headers=other_headers)
+            check("other users do not see the session", response.status_code == 404, f"HTTP {response.status_code}")
+
+            response = await client.post(f"{base}/{upload_id}/complete", headers=headers)
+            check("complete with missing chunks -> 409",
+                  response.status_code == 409 and "[0, 2]" in response.json().get("detail", ""),
+                  response.json().get("detail", ""))
+
+            for index in (0, 2, 1):
+                response = await put(upload_id, index, pieces[index])
+            check("chunk sent again is accepted", response.status_code == 200
+                  and response.json()["received_chunks"] == [0, 1, 2, 3], f"HTTP {response.status_code}")
+
+            response = await client.post(f"{base}/{upload_id}/complete", headers=headers)
+            attachment = response.json()
+            check("complete creates the attachment",
+                  response.status_code == 200 and attachment["file_size"] == len(data)
+                  and attachment["file_type"] == "application/pdf"
+                  and attachment["description"] == "Final draft", f"HTTP {response.status_code}")
+            download = await client.get(
+                f"/api/v1/theses/{thesis.id}/attachments/{attachment['id']}/download", headers=headers)
+            check("download matches the uploaded file", download.content == data,
+                  f"{len(download.content)} bytes")
+            check("session and chunks are gone",
+                  (await client.get(f"{base}/{upload_id}", headers=headers)).status_code == 404
+                  and not session_dir(upload_id).exists())
+            direct = (await client.post(
+                f"/api/v1/theses/{thesis.id}/attachments", headers=headers,
+                files={"file": ("copy.pdf", data, "application/pdf")},
+            )).json()
+            check("identical direct upload shares the blob", direct["file_path"] == attachment["file_path"],
+                  direct["file_path"][:24])
+
+            session = await start({"filename": "notes.txt", "file_size": 5, "sha256": sha256(b"hello")})
+            await put(session["id"], 0, b"world")
+            response = await client.post(f"{base}/{session['id']}/complete", headers=headers)
+            check("whole-file checksum mismatch -> 400", response.status_code == 400, f"HTTP {response.status_code}")
+
+            response = await client.delete(f"{base}/{session['id']}", headers=headers)
+            check("abort removes session and chunks",
+                  response.status_code == 204 and not session_dir(session["id"]).exists(),
+                  f"HTTP {response.status_code}")
+
+            async def held_chunk(upload_id, meanwhile):
+                """PUT chunk 0 and run meanwhile() while its body is half sent."""
+                halfway, release = asyncio.Event(), asyncio.Event()
+
+                async def body():
+                    yield pieces[0][:1024]
+                    halfway.set()
+                    await release.wait()
+                    yield pieces[0][1024:]
+
+                sent = asyncio.create_task(put(upload_id, 0, body(), digest=sha256(pieces[0])))
+                await halfway.wait()
+                await meanwhile()
+                release.set()
+                return await sent
+
+            session = await start({"filename": "late.pdf", "file_size": chunk_size})
+            response = await held_chunk(session["id"], lambda: client.delete(
+                f"{base}/{session['id']}", headers=headers))
+            check("chunk finishing after abort -> 404",
+                  response.status_code == 404 and not any(session_dir(session["id"]).glob("*")),
+                  f"HTTP {response.status_code}")
+
+            session = await start({"filename": "late.pdf", "file_size": chunk_size})
+
+            async def expire():
+                async with SessionLocal() as db:
+                    await db.execute(
+                        update(UploadSession).where(UploadSession.id == session["id"])
+                        .values(expires_at=datetime.utcnow() - timedelta(seconds=1))
+                    )
+                    await db.commit()
+
+            response = await held_chunk(session["id"], expire)
+            check("chunk finishing after expiry -> 404",
+                  response.status_code == 404 and not any(session_dir(session["id"]).glob("*")),
+                  f"HTTP {response.status_code}")
+            async with SessionLocal() as db:
+                await db.execute(delete(UploadSession).where(UploadSession.id == session["id"]))
+                await db.commit()
+
+            response = await start({"filename": "thesis.exe", "file_size": 10})
+            check("invalid file type -> 400", response.status_code == 400, f"HTTP {response.status_code}")
+            response = await start({"filename": "thesis.pdf", "file_size": settings.MAX_UPLOAD_SIZE + 1})
+            check("oversized file -> 413", response.status_code == 413, f"HTTP {response.status_code}")
+
+            stale = await start({"filename": "stale.pdf", "file_size": 10})
+            await put(stale["id"], 0, b"0123456789")
+            live = await start({"filename": "live.pdf", "file_size": 10})
+            await put(live["id"], 0, b"0123456789")
+            orphan = session_dir(uid())
+            orphan.mkdir(parents=True)
+            async with SessionLocal() as db:
+                await db.execute(
+                    update(UploadSession).where(UploadSession.id == stale["id"])
+                    .values(expires_at=datetime.utcnow() - timedelta(seconds=1))
+                )
+                await db.commit()
+            removed = await purge_expired_sessions()
+            check("purge removes expired sessions",
+                  removed == 1 and not session_dir(stale["id"]).exists()
+                  and (await client.get(f"{base}/{stale['id']}", headers=headers)).status_code == 404,
+                  f"{removed} removed")
+            check("purge removes orphaned chunk directories", not orphan.exists())
+            check("purge keeps live sessions", session_dir(live["id"]).exists()
+                  and (await client.get(f"{base}/{live['id']}", headers=headers)).status_code == 200)
+    finally:
+        async with SessionLocal() as db:
+            digests = (await db.scalars(
+                select(ThesisAttachment.blob_sha256).where(ThesisAttachment.thesis_id == thesis.id)
+            )).all()
+            await db.execute(delete(UploadSession).where(UploadSession.thesis_id == thesis.id))
+            await db.execute(delete(ThesisAttachment).where(ThesisAttachment.thesis_id == thesis.id))
+            await db.execute(delete(FileBlob).where(FileBlob.sha256.in_(digests)))
+            await db.execute(delete(Thesis).where(Thesis.id == thesis.id))
+            await db.execute(delete(User).where(User.id.in_([student.id, other.id])))
+            await db.commit()
+        await engine.dispose()
+    return check.failures
+
+
+def main() -> None:
+    exit_with(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Full-text search check.
+
+Runs the processing worker in-process against a temporary local store and
+creates theses of two students under two professors, some with attachments.
+Every search uses words made up for the run, so other rows in the database
+never match. Checks that processing indexes attachment text, that
+each role finds only the theses GET /theses/ lists for it, that a match in
+the title ranks above one only in an attachment, that highlights are
+escaped HTML with the matches in <mark>, that text in angle brackets is
+not dropped as an HTML tag, that phrase and exclusion syntax
+work, and that the index follows thesis updates and attachment replacement
+and deletion without a rebuild. Also pages through the results with the
+cursor and prints the query plans, with sequential scans disabled since the
+tables of a development database are too small for the planner to pick
+the GIN indexes by itself.
+
+    python -m scripts.check_search
+"""
+import asyncio
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+from sqlalchemy import delete, func, select, text
+
+from app.core import file_utils, storage
+from app.core.config import settings
+from app.core.pagination import CURSOR_HEADER
+from app.core.process_pool import shutdown_process_pool
+from app.core.processing import process_jobs
+from app.core.search import search_query
+from app.core.security import create_access_token
+from app.db.session import SessionLocal, engine
+from app.main import app as fastapi_app
+from app.models import (
+    AttachmentText, FileBlob, Thesis, ThesisAttachment, ThesisStatus, User, UserRole,
+)
+from scripts.bench_similarity import TextGenerator
+from scripts.checks import Checks, exit_with, uid
+
+PAGED_THESES = 7
+
+
+async def run() -> int:
+    workdir = Path(tempfile.mkdtemp())
+    file_utils.UPLOAD_DIR = workdir
+    storage._storage = storage.LocalStorage(workdir)
+    settings.PROCESSING_POLL_INTERVAL_SECONDS = 0.2
+
+    # Made-up words, unique to the run
+    tag = uuid.uuid4().hex[:8]
+    word = {name: f"{name}{tag}" for name in ("shared", "title", "content", "other", "renamed", "new", "paged")}
+    generator = TextGenerator()
+
+    now = datetime.utcnow()
+
+    def user(role):
+        return User(id=uid(), email=f"search-{uid()}@example.com", full_name=f"Search {role.value}",
+                    role=role, is_active=True)
+
+    students = [user(UserRole.student), user(UserRole.student)]
+    professors = [user(UserRole.professor), user(UserRole.professor)]
+    assistant = user(UserRole.graduation_assistant)
+    users = students + professors + [assistant]
+
+    def thesis(title, abstract, n):
+        return Thesis(id=uid(), title=title, abstract=abstract, status=ThesisStatus.draft,
+                      student_id=students[n].id, supervisor_id=professors[n].id, created_at=now, updated_at=now)
+
+    in_title = thesis(f"On {word['shared']} and <b>{word['title']}</b> & more", "An abstract.", 0)
+    in_content = thesis("A thesis of the second student", f"The {word['other']} method.", 1)
+    in_abstract = thesis("Yet another thesis", f"{generator.text(80)} {word['shared']} {generator.text(80)}", 0)
+    paged = [thesis(f"Paged {word['paged']} {n}", generator.text(40), n % 2) for n in range(PAGED_THESES)]
+    theses = [in_title, in_content, in_abstract] + paged
+    async with SessionLocal() as db:
+        db.add_all(users + theses)
+        await db.commit()
+    headers = {user.id: {"Authorization": f"Bearer {create_access_token(user.id)}"} for user in users}
+
+    check = Checks()
+
+    worker = asyncio.create_task(process_jobs())
+    transport = httpx.ASGITransport(app=fastapi_app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+            def base(thesis):
+                return f"/api/v1/theses/{thesis.id}/attachments"
+
+            async def wait_for(thesis, attachment_id, timeout=120):
+                deadline = time.monotonic() + timeout
+                while time.monotonic() < deadline:
+                    body = (await client.get(f"{base(thesis)}/{attachment_id}/processing",
+                                             headers=headers[thesis.student_id])).json()
+                    if body.get("status") in ("done", "failed"):
+                        return body
+                    await asyncio.sleep(0.05)
+                return body
+
+            async def search(q, as_user=assistant, **params):
+                response = await client.get("/api/v1/theses/search", headers=headers[as_user.id],
+                                            params={"q": q, **params})
+                return response.status_code, response.json(), response.headers.get(CURSOR_HEADER)
+
+            def ids(body):
+                return [result["id"] for result in body] if isinstance(body, list) else body
+
+            document = (f"{generator.text(300)} the {word['shared']} {word['content']} results "
+                        f"{generator.text(300)} <script> {word['content']} {generator.text(50)}")
+            response = await client.post(base(in_content), headers=headers[students[1].id],
+                                         files={"file": ("thesis.txt", document.encode("utf-8"))})
+            attachment = response.json()
+            job = await wait_for(in_content, attachment["id"])
+            async with SessionLocal() as db:
+                indexed = await db.get(AttachmentText, attachment["id"])
+            check("processing indexes attachment text", job.get("status") == "done" and indexed is not None,
+                  f"job {job.get('status')}")
+
+            status, body, _ = await search(word["shared"])
+            found = ids(body)
+            check("finds title, abstract and attachment matches",
+                  status == 200 and set(found) == {in_title.id, in_content.id, in_abstract.id},
+                  f"HTTP {status}, {len(found)} result(s)")
+            check("title match ranks above attachment match",
+                  status == 200 and found.index(in_title.id) < found.index(in_content.id),
+                  " > ".join(f"{result['rank']:.3f}" for result in body) if status == 200 else "")
+
+            first = next(result for result in body if result["id"] == in_title.id)
+            check("title highlight is escaped, matches marked",
+                  first["title_highlight"] == f"On <mark>{word['shared']}</mark> and &lt;b&gt;{word['title']}"
+                                             f"&lt;/b&gt; &amp; more",
+                  first["title_highlight"])
+            match = next(result for result in body if result["id"] == in_content.id)
+            check("content highlight names its attachment",
+                  match["attachment_id"] == attachment["id"] and match["attachment_filename"] == "thesis.txt"
+                  and f"<mark>{word['shared']}</mark>" in (match["content_highlight"] or "")
+                  and match["title_highlight"] == in_content.title,
+                  (match["content_highlight"] or "")[:60])
+            match = next(result for result in body if result["id"] == in_abstract.id)
+            check("abstract highlight is a fragment",
+                  f"<mark>{word['shared']}</mark>" in (match["abstract_highlight"] or "")
+                  and len(match["abstract_highlight"]) < len(in_abstract.abstract),
+                  f"{len(match['abstract_highlight'] or '')} of {len(in_abstract.abstract)} chars")
+
+            status, body, _ = await search(f"{word['content']} script")
+            highlight = body[0]["content_highlight"] if status == 200 and body else ""
+            check("words in angle brackets are found, escaped",
+                  "&lt;<mark>script</mark>&gt;" in highlight and "<script>" not in highlight,
+                  highlight[highlight.find("&lt;"):][:60])
+
+            status, body, _ = await search(f'"{word["shared"]} {word["content"]}"')
+            phrase = ids(body)
+            status, body, _ = await search(f'"{word["content"]} {word["shared"]}"')
+            check("quoted phrases match in order", phrase == [in_content.id] and ids(body) == [],
+                  f"{len(phrase)} then {len(ids(body))} result(s)")
+            status, body, _ = await search(f"{word['shared']} -{word['title']}")
+            check("-word excludes", set(ids(body)) == {in_content.id, in_abstract.id}, f"{len(ids(body))} result(s)")
+
+            results = {}
+            for name, as_user in [("student", students[0]), ("professor", professors[1]), ("assistant", assistant)]:
+                results[name] = set(ids((await search(word["shared"], as_user))[1]))
+            supervised = set(ids((await search(word["shared"], assistant, supervisor_id=professors[1].id))[1]))
+            check("each role finds only the theses it lists",
+                  results == {"student": {in_title.id, in_abstract.id}, "professor": {in_content.id},
+                              "assistant": {in_title.id, in_content.id, in_abstract.id}}
+                  and supervised == {in_content.id},
+                  ", ".join(f"{name} {len(found)}" for name, found in results.items()))
+            status, _, _ = await search("")
+            check("empty query -> 422", status == 422, f"HTTP {status}")
+
+            await client.put(f"/api/v1/theses/{in_title.id}", headers=headers[students[0].id],
+                             json={"title": f"On {word['renamed']}"})
+            renamed = ids((await search(word["renamed"]))[1])
+            before = ids((await search(word["title"]))[1])
+            check("thesis update is searchable at once", renamed == [in_title.id] and before == [],
+                  f"{len(renamed)} new, {len(before)} old")
+
+            await client.post(f"{base(in_content)}/{attachment['id']}/replace", headers=headers[students[1].id],
+                              files={"file": ("thesis.txt", f"{generator.text(200)} {word['new']}".encode("utf-8"))})
+            await asyncio.sleep(0.1)
+            await wait_for(in_content, attachment["id"])
+            new = ids((await search(word["new"]))[1])
+            old = ids((await search(word["content"]))[1])
+            check("replaced attachment is re-indexed", new == [in_content.id] and old == [],
+                  f"{len(new)} new, {len(old)} old")
+            await client.delete(f"{base(in_content)}/{attachment['id']}", headers=headers[students[1].id])
+            gone = ids((await search(word["new"]))[1])
+            check("deleted attachment leaves the index", gone == [], f"{len(gone)} result(s)")
+
+            pages, cursor = [], None
+            while True:
+                status, body, cursor = await search(word["paged"], limit=3, **({"cursor": cursor} if cursor else {}))
+                pages.append(ids(body))
+                if not cursor or len(pages) > PAGED_THESES:
+                    break
+            seen = [thesis_id for page in pages for thesis_id in page]
+            _, everything, _ = await search(word["paged"], limit=100)
+            check("cursor pages through every result once",
+                  seen == ids(everything) and set(seen) == {thesis.id for thesis in paged},
+                  f"{len(pages)} page(s), {len(seen)} result(s)")
+
+        async with engine.begin() as connection:
+            await connection.execute(text("SET LOCAL enable_seqscan = off"))
+            for model in (Thesis, AttachmentText):
+                query = select(func.count()).where(model.search_vector.bool_op("@@")(search_query(word["shared"])))
+                compiled = query.compile(engine.sync_engine, compile_kwargs={"literal_binds": True})
+                plan = (await connection.execute(text(f"EXPLAIN {compiled}"))).scalars().all()
+                index = f"ix_{model.__tablename__}_search_vector"
+                check(f"{model.__tablename__} search uses its GIN index", any(index in line for line in plan),
+                      next((line.strip() for line in plan if "Index" in line), plan[0])[:70])
+    finally:
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+        shutdown_process_pool()
+        async with SessionLocal() as db:
+            thesis_ids = [thesis.id for thesis in theses]
+            digests = (await db.scalars(
+                select(ThesisAttachment.blob_sha256).where(ThesisAttachment.thesis_id.in_(thesis_ids))
+            )).all()
+            await db.execute(delete(ThesisAttachment).where(ThesisAttachment.thesis_id.in_(thesis_ids)))
+            await db.execute(delete(FileBlob).where(FileBlob.sha256.in_(digests)))
+            await db.execute(delete(Thesis).where(Thesis.id.in_(thesis_ids)))
+            await db.execute(delete(User).where(User.id.in_([user.id for user in users])))
+            await db.commit()
+        await engine.dispose()
+    return check.failures
+
+
+def main() -> None:
+    exit_with(run())
+
+
+if __name__ == "__main__":
+    main()
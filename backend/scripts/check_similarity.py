@@ -0,0 +1,196 @@
+"""
+Similarity index check.
+
+Runs the processing worker in-process against a temporary local store and
+uploads theses of three students: the sample PDF from ../pdfs, a text
+that copies a third of it into otherwise original text, and an unrelated
+text. Checks that processing indexes every upload, that the report for the
+copy finds the PDF with about the copied share and quotes the copied
+text, that the unrelated text and other attachments of the same thesis
+are not reported, and that only reviewers can read reports. Also checks
+that an attachment missing from the index is queued and reported once
+processed, replacing a file re-indexes it, and deleting it removes it from
+the index.
+
+    python -m scripts.check_similarity
+"""
+import asyncio
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+from sqlalchemy import delete, func, select
+
+from app.core import file_utils, minhash, storage
+from app.core.config import settings
+from app.core.process_pool import shutdown_process_pool
+from app.core.processing import process_jobs
+from app.core.security import create_access_token
+from app.db.session import SessionLocal, engine
+from app.main import app as fastapi_app
+from app.models import (
+    FileBlob, SimilarityBucket, SimilaritySignature, Thesis, ThesisAttachment, ThesisStatus, User, UserRole,
+)
+from scripts.bench_similarity import TextGenerator
+from scripts.checks import Checks, exit_with, uid
+
+PDF_DIR = Path(__file__).resolve().parents[2] / "pdfs"
+
+
+async def run() -> int:
+    workdir = Path(tempfile.mkdtemp())
+    file_utils.UPLOAD_DIR = workdir
+    storage._storage = storage.LocalStorage(workdir)
+    settings.PROCESSING_POLL_INTERVAL_SECONDS = 0.2
+
+    pdf = sorted(PDF_DIR.glob("*.pdf"))[0]
+    sample = pdf.with_suffix(".txt").read_text(encoding="utf-8")
+    generator = TextGenerator()
+    copied = generator.copy_of(sample, 0.3, len(sample.split()))
+    unrelated = generator.text(len(sample.split()))
+
+    now = datetime.utcnow()
+    users = {
+        role: User(id=uid(), email=f"similarity-{uid()}@example.com", full_name=f"Similarity {role}",
+                   role=role, is_active=True)
+        for role in (UserRole.student, UserRole.professor)
+    }
+    others = [User(id=uid(), email=f"similarity-{uid()}@example.com", full_name="Other Student",
+                   role=UserRole.student, is_active=True) for _ in range(2)]
+    students = [users[UserRole.student]] + others
+    theses = [Thesis(id=uid(), title=f"Similarity check {n}", abstract="Similarity", status=ThesisStatus.submitted,
+                     student_id=student.id, created_at=now, updated_at=now) for n, student in enumerate(students)]
+    async with SessionLocal() as db:
+        db.add_all(list(users.values()) + others + theses)
+        await db.commit()
+    student_headers = [{"Authorization": f"Bearer {create_access_token(student.id)}"} for student in students]
+    professor = {"Authorization": f"Bearer {create_access_token(users[UserRole.professor].id)}"}
+    bases = [f"/api/v1/theses/{thesis.id}/attachments" for thesis in theses]
+
+    check = Checks()
+
+    worker = asyncio.create_task(process_jobs())
+    transport = httpx.ASGITransport(app=fastapi_app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+            async def upload(n, filename, data):
+                response = await client.post(bases[n], headers=student_headers[n], files={"file": (filename, data)})
+                return response.json()
+
+            async def wait_for(n, attachment_id, timeout=120):
+                deadline = time.monotonic() + timeout
+                while time.monotonic() < deadline:
+                    body = (await client.get(f"{bases[n]}/{attachment_id}/processing",
+                                             headers=student_headers[n])).json()
+                    if body.get("status") in ("done", "failed"):
+                        return body
+                    await asyncio.sleep(0.05)
+                return body
+
+            async def report(n, attachment_id, headers=professor, **params):
+                return await client.get(f"{bases[n]}/{attachment_id}/similarity", headers=headers, params=params)
+
+            original = await upload(0, "thesis.pdf", pdf.read_bytes())
+            own_text = await upload(0, "thesis.txt", sample.encode("utf-8"))
+            copy = await upload(1, "copy.txt", copied.encode("utf-8"))
+            other = await upload(2, "other.txt", unrelated.encode("utf-8"))
+            legacy = await upload(2, "legacy.doc", b"legacy word file")
+            uploads = [(0, original), (0, own_text), (1, copy), (2, other), (2, legacy)]
+            started = time.perf_counter()
+            jobs = [await wait_for(n, attachment["id"]) for n, attachment in uploads]
+            async with SessionLocal() as db:
+                signatures = {row.attachment_id: row for row in (await db.scalars(select(SimilaritySignature).where(
+                    SimilaritySignature.attachment_id.in_([attachment["id"] for _, attachment in uploads])
+                ))).all()}
+                buckets = await db.scalar(select(func.count()).select_from(SimilarityBucket).where(
+                    SimilarityBucket.attachment_id == original["id"]
+                ))
+            check("processing indexes every upload",
+                  all(job.get("status") == "done" for job in jobs) and len(signatures) == len(uploads),
+                  f"{len(signatures)} of {len(uploads)} in {time.perf_counter() - started:.1f} s")
+            check("signature has a bucket per band", buckets == minhash.BANDS,
+                  f"{buckets} buckets, {signatures[original['id']].shingle_count} phrases")
+            check(".doc placeholder text is not indexed", signatures[legacy["id"]].shingle_count == 0)
+
+            response = await report(1, copy["id"])
+            body = response.json()
+            match = next((m for m in body.get("matches", []) if m["attachment_id"] == original["id"]), None)
+            check("copy reports the original", response.status_code == 200 and match is not None,
+                  f"HTTP {response.status_code}, {len(body.get('matches', []))} match(es)")
+            check("overlap is about the copied share", match and 0.25 <= match["overlap"] <= 0.35,
+                  f"overlap {match and match['overlap']:.2f}, similarity {match and match['similarity']:.2f}")
+            passages = match["passages"] if match else []
+            quoted = sum(passage["word_count"] for passage in passages)
+            check("passages quote the copied block",
+                  passages and quoted > 0.15 * len(copied.split())
+                  and all(p["text"][:200] in " ".join(copied.split()) for p in passages),
+                  f"{len(passages)} passage(s), {quoted} words")
+
+            response = await report(0, original["id"])
+            matches = [m["attachment_id"] for m in response.json().get("matches", [])]
+            check("original reports the copy, not its own thesis",
+                  copy["id"] in matches and own_text["id"] not in matches, f"{len(matches)} match(es)")
+            response = await report(2, other["id"])
+            check("unrelated text has no matches", response.json().get("matches") == [],
+                  f"{response.json().get('matches')}")
+
+            response = await report(1, copy["id"], headers=student_headers[1])
+            check("students cannot read reports", response.status_code == 403, f"HTTP {response.status_code}")
+            response = await report(1, uid())
+            check("unknown attachment -> 404", response.status_code == 404, f"HTTP {response.status_code}")
+
+            async with SessionLocal() as db:
+                await db.execute(delete(SimilaritySignature).where(SimilaritySignature.attachment_id == copy["id"]))
+                await db.commit()
+            response = await report(1, copy["id"])
+            await wait_for(1, copy["id"])
+            retried = await report(1, copy["id"])
+            check("unindexed attachment is queued, then reported",
+                  response.status_code == 409 and retried.status_code == 200
+                  and any(m["attachment_id"] == original["id"] for m in retried.json()["matches"]),
+                  f"HTTP {response.status_code} then {retried.status_code}")
+
+            await client.post(f"{bases[1]}/{copy['id']}/replace", headers=student_headers[1],
+                              files={"file": ("copy.txt", generator.text(2000).encode("utf-8"))})
+            await asyncio.sleep(0.1)
+            await wait_for(1, copy["id"])
+            response = await report(0, original["id"])
+            check("replaced file is re-indexed",
+                  copy["id"] not in [m["attachment_id"] for m in response.json().get("matches", [])],
+                  f"{len(response.json().get('matches', []))} match(es)")
+
+            await client.delete(f"{bases[0]}/{original['id']}", headers=student_headers[0])
+            async with SessionLocal() as db:
+                left = await db.scalar(select(func.count()).select_from(SimilarityBucket).where(
+                    SimilarityBucket.attachment_id == original["id"]
+                ))
+                left += await db.scalar(select(func.count()).select_from(SimilaritySignature).where(
+                    SimilaritySignature.attachment_id == original["id"]
+                ))
+            check("deleting the attachment removes it from the index", left == 0, f"{left} row(s) left")
+    finally:
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+        shutdown_process_pool()
+        async with SessionLocal() as db:
+            thesis_ids = [thesis.id for thesis in theses]
+            digests = (await db.scalars(
+                select(ThesisAttachment.blob_sha256).where(ThesisAttachment.thesis_id.in_(thesis_ids))
+            )).all()
+            await db.execute(delete(ThesisAttachment).where(ThesisAttachment.thesis_id.in_(thesis_ids)))
+            await db.execute(delete(FileBlob).where(FileBlob.sha256.in_(digests)))
+            await db.execute(delete(Thesis).where(Thesis.id.in_(thesis_ids)))
+            await db.execute(delete(User).where(User.id.in_([user.id for user in list(users.values()) + others])))
+            await db.commit()
+        await engine.dispose()
+    return check.failures
+
+
+def main() -> None:
+    exit_with(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Object-storage check against an S3-compatible stand-in.
+
+Uses the bucket at S3_ENDPOINT_URL (e.g. a local MinIO) when it is set,
+and otherwise starts an in-process moto S3 server. Switches the app to the
+S3 backend, then uploads, downloads, previews and deletes attachments and
+a profile picture in-process. Checks that files land in the bucket and not
+on local disk, downloads redirect to presigned URLs that serve the right
+bytes and headers, identical uploads share one object, and objects are
+removed once nothing references them, but not when dropping the last
+reference rolls back. The sweep removes the objects of uploads that rolled
+back. Finishes with a download through the local backend.
+
+    python -m scripts.check_storage
+
+Needs boto3 (the s3 extra), plus moto[server] without S3_ENDPOINT_URL.
+"""
+import hashlib
+import logging
+import os
+import socket
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+from sqlalchemy import delete, select
+
+from app.core import file_utils, storage
+from app.core.blob_store import collect_blobs, release_blob, staging_path, store_staged_blob
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.session import SessionLocal, engine
+from app.main import app as fastapi_app
+from app.models import FileBlob, Thesis, ThesisAttachment, ThesisStatus, User, UserRole
+from scripts.checks import Checks, exit_with, uid
+
+
+def start_moto() -> str:
+    from moto.server import ThreadedMotoServer
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    ThreadedMotoServer(ip_address="127.0.0.1", port=port, verbose=False).start()
+    return f"http://127.0.0.1:{port}"
+
+
+def use_s3() -> storage.S3Storage:
+    if not settings.S3_ENDPOINT_URL:
+        settings.S3_ENDPOINT_URL = start_moto()
+        settings.S3_ACCESS_KEY_ID = settings.S3_SECRET_ACCESS_KEY = "check"
+        settings.S3_REGION = "us-east-1"
+    settings.STORAGE_BACKEND = "s3"
+    settings.S3_BUCKET = settings.S3_BUCKET or "thesistrack-check"
+    backend = storage.create_storage()
+    try:
+        backend.client.create_bucket(Bucket=backend.bucket)
+    except backend.client.exceptions.BucketAlreadyOwnedByYou:
+        pass
+    storage._storage = backend
+    return backend
+
+
+async def run() -> int:
+    backend = use_s3()
+    workdir = Path(tempfile.mkdtemp())
+    file_utils.UPLOAD_DIR = workdir
+
+    def object_keys(prefix=""):
+        listing = backend.client.list_objects_v2(Bucket=backend.bucket, Prefix=prefix)
+        return [item["Key"] for item in listing.get("Contents", [])]
+
+    def local_files():
+        return [path for path in workdir.rglob("*") if path.is_file()]
+
+    now = datetime.utcnow()
+    student = User(id=uid(), email=f"storage-{uid()}@example.com", full_name="Storage Check",
+                   role=UserRole.student, is_active=True)
+    thesis = Thesis(id=uid(), title="Storage check", abstract="Storage", status=ThesisStatus.draft,
+                    student_id=student.id, created_at=now, updated_at=now)
+    async with SessionLocal() as db:
+        db.add_all([student, thesis])
+        await db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(student.id)}"}
+    base = f"/api/v1/theses/{thesis.id}/attachments"
+
+    check = Checks()
+
+    data = os.urandom(3 * 1024 * 1024)
+    transport = httpx.ASGITransport(app=fastapi_app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://check") as client, \
+                httpx.AsyncClient() as outside:
+            first = (await client.post(base, headers=headers,
+                                       files={"file": ("report.pdf", data, "application/pdf")})).json()
+            check("upload goes to the bucket", object_keys() == [first["file_path"]],
+                  first["file_path"][:24])
+            check("nothing left on local disk", not local_files(), f"{len(local_files())} file(s)")
+
+            second = (await client.post(base, headers=headers,
+                                        files={"file": ("copy.pdf", data, "application/pdf")})).json()
+            check("identical upload shares the object",
+                  second["file_path"] == first["file_path"] and len(object_keys()) == 1,
+                  f"{len(object_keys())} object(s)")
+
+            response = await client.get(f"{base}/{first['id']}/download", headers=headers)
+            location = response.headers.get("location", "")
+            check("download redirects to a presigned URL",
+                  response.status_code == 307 and "X-Amz-Signature" in location,
+                  f"HTTP {response.status_code}")
+            fetched = await outside.get(location)
+            check("presigned URL serves the file",
+                  fetched.status_code == 200 and fetched.content == data
+                  and fetched.headers.get("content-type") == "application/pdf"
+                  and fetched.headers.get("content-disposition") == "attachment; filename=report.pdf",
+                  f"HTTP {fetched.status_code}, {fetched.headers.get('content-disposition')}")
+            response = await client.get(f"{base}/{first['id']}/download?inline=true", headers=headers)
+            fetched = await outside.get(response.headers.get("location", ""))
+            check("inline download", fetched.headers.get("content-disposition") == "inline; filename=report.pdf",
+                  f"{fetched.headers.get('content-disposition')}")
+
+            text = (await client.post(base, headers=headers,
+                                      files={"file": ("notes.txt", b"storage check", "text/plain")})).json()
+            response = await client.get(f"{base}/{text['id']}/preview", headers=headers)
+            check("preview reads from the bucket",
+                  response.status_code == 200 and response.json().get("content") == "storage check",
+                  f"HTTP {response.status_code}")
+
+            await client.delete(f"{base}/{first['id']}", headers=headers)
+            check("object kept while still referenced", first["file_path"] in object_keys())
+            await client.delete(f"{base}/{second['id']}", headers=headers)
+            check("object removed with the last reference", first["file_path"] not in object_keys())
+
+            # The object goes only once dropping the last reference commits
+            digest = text["file_path"].rsplit("/", 1)[1]
+            async with SessionLocal() as db:
+                await db.execute(delete(ThesisAttachment).where(ThesisAttachment.id == text["id"]))
+                released = await release_blob(db, digest)
+                await db.rollback()
+            check("rolled back release keeps the object", released == digest and text["file_path"] in object_keys())
+            async with SessionLocal() as db:
+                await db.execute(delete(ThesisAttachment).where(ThesisAttachment.id == text["id"]))
+                await release_blob(db, digest)
+                await db.commit()
+            kept = text["file_path"] in object_keys()
+            removed = await collect_blobs()
+            check("sweep removes unreferenced blobs", kept and text["file_path"] not in object_keys(),
+                  f"{removed} removed")
+
+            # An upload whose transaction rolls back leaves its object to the sweep
+            content = os.urandom(2048)
+            staged = staging_path()
+            staged.write_bytes(content)
+            async with SessionLocal() as db:
+                stored = await store_staged_blob(db, staged, len(content), hashlib.sha256(content).hexdigest())
+                await db.rollback()
+            kept = stored in object_keys()
+            removed = await collect_blobs()
+            check("sweep removes objects of rolled back uploads",
+                  kept and stored not in object_keys(), f"{removed} removed")
+
+            picture = b"\x89PNG" + os.urandom(1024)
+            user = (await client.post("/api/v1/users/me/profile-picture", headers=headers,
+                                      files={"file": ("me.png", picture, "image/png")})).json()
+            key = user.get("profile_picture") or ""
+            check("profile picture goes to the bucket", key in object_keys("profiles/"), key)
+            response = await client.get(f"/api/v1/users/profile-picture/{key}")
+            fetched = await outside.get(response.headers.get("location", ""))
+            check("profile picture served from the bucket",
+                  response.status_code == 307 and fetched.content == picture
+                  and fetched.headers.get("cache-control") == "public, max-age=3600",
+                  f"HTTP {response.status_code}/{fetched.status_code}")
+            response = await client.get("/api/v1/users/profile-picture/profiles/../blobs/x")
+            check("rejects paths outside profiles", response.status_code == 403, f"HTTP {response.status_code}")
+            await client.delete("/api/v1/users/me/profile-picture", headers=headers)
+            check("profile picture removed", key not in object_keys("profiles/"))
+
+            # Same flow through the local backend streams the bytes itself
+            storage._storage = storage.LocalStorage(workdir)
+            local = (await client.post(base, headers=headers,
+                                       files={"file": ("local.pdf", data, "application/pdf")})).json()
+            response = await client.get(f"{base}/{local['id']}/download", headers=headers)
+            check("local backend streams the download",
+                  response.status_code == 200 and response.content == data, f"HTTP {response.status_code}")
+    finally:
+        async with SessionLocal() as db:
+            digests = (await db.scalars(
+                select(ThesisAttachment.blob_sha256).where(ThesisAttachment.thesis_id == thesis.id)
+            )).all()
+            await db.execute(delete(ThesisAttachment).where(ThesisAttachment.thesis_id == thesis.id))
+            await db.execute(delete(FileBlob).where(FileBlob.sha256.in_(digests)))
+            await db.execute(delete(Thesis).where(Thesis.id == thesis.id))
+            await db.execute(delete(User).where(User.id == student.id))
+            await db.commit()
+        await engine.dispose()
+    return check.failures
+
+
+def main() -> None:
+    exit_with(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Thesis access check.
+
+Creates two students' theses under a professor, with a long abstract, and
+checks app.core.thesis_access: that ThesisAccess.can_view and the
+viewable_by predicate agree for every role, that listed_for selects what
+GET /theses/ lists, that the projection is read once per session and read
+again after the thesis changes, and that the endpoints under
+/theses/{id}/ and an event of the thesis answer without reading the whole
+thesis row (no statement selects the abstract), the committee and event
+with the thesis they embed, and still return 404 and 403.
+Also times the projection against loading the whole row.
+
+    python -m scripts.check_thesis_access
+"""
+import time
+from datetime import datetime
+
+import httpx
+from sqlalchemy import delete, event, func, select
+
+from app.core.thesis_access import get_thesis_access, listed_for, viewable_by
+from app.core.user_cache import Principal
+from app.core.security import create_access_token
+from app.db.session import SessionLocal, engine
+from app.main import app as fastapi_app
+from app.models import (
+    CommitteeMemberRole, Event, Thesis, ThesisComment, ThesisCommitteeMember, ThesisStatus, User, UserRole,
+)
+from scripts.bench_similarity import TextGenerator
+from scripts.checks import Checks, exit_with, uid
+
+TIMED_LOOKUPS = 300
+
+
+async def run() -> int:
+    now = datetime.utcnow()
+
+    def user(role):
+        return User(id=uid(), email=f"access-{uid()}@example.com", full_name=f"Access {role.value}",
+                    role=role, is_active=True)
+
+    owner, other = user(UserRole.student), user(UserRole.student)
+    professor, colleague = user(UserRole.professor), user(UserRole.professor)
+    assistant = user(UserRole.graduation_assistant)
+    users = [owner, other, professor, colleague, assistant]
+    # About the size of a real abstract pasted with its keywords and summary
+    abstract = TextGenerator().text(8000)
+    theses = [
+        Thesis(id=uid(), title=f"Access check {n}", abstract=abstract, status=ThesisStatus.submitted,
+               student_id=student.id, supervisor_id=professor.id, created_at=now, updated_at=now)
+        for n, student in enumerate([owner, other])
+    ]
+    thesis = theses[0]
+    # Rows whose responses embed the thesis, so their loads can be checked
+    member = ThesisCommitteeMember(id=uid(), thesis_id=thesis.id, user_id=colleague.id,
+                                   role=CommitteeMemberRole.reviewer, created_at=now, updated_at=now)
+    defense = Event(id=uid(), title="Defense", start_time=now, end_time=now, thesis_id=thesis.id,
+                    user_id=owner.id, created_at=now, updated_at=now)
+    async with SessionLocal() as db:
+        db.add_all(users + theses)
+        await db.flush()
+        db.add_all([member, defense])
+        await db.commit()
+    principals = {u.full_name + u.id[:4]: Principal(u.id, u.role, True) for u in users}
+
+    check = Checks()
+
+    statements = []
+
+    def record(conn, cursor, statement, *_):
+        statements.append(statement)
+
+    try:
+        async with SessionLocal() as db:
+            mismatches = []
+            for name, principal in principals.items():
+                for row in theses:
+                    access = await get_thesis_access(db, row.id)
+                    in_sql = await db.scalar(
+                        select(func.count()).select_from(Thesis).where(Thesis.id == row.id, viewable_by(principal))
+                    )
+                    if access.can_view(principal) != bool(in_sql):
+                        mismatches.append((name, row.title))
+            check("can_view and viewable_by agree", not mismatches, f"{len(mismatches)} mismatch(es)")
+
+        event.listen(engine.sync_engine, "before_cursor_execute", record)
+        async with SessionLocal() as db:
+            statements.clear()
+            first = await get_thesis_access(db, thesis.id)
+            again = await get_thesis_access(db, thesis.id)
+            check("projection is read once per session", first is again and len(statements) == 1,
+                  f"{len(statements)} statement(s)")
+            check("projection leaves the abstract out", "abstract" not in statements[0], statements[0][:60])
+            missing = await get_thesis_access(db, uid())
+            check("unknown thesis -> None", missing is None)
+
+            row = await db.get(Thesis, thesis.id)
+            row.supervisor_id = colleague.id
+            await db.flush()
+            moved = await get_thesis_access(db, thesis.id)
+            check("changing the thesis forgets its projection", moved.supervisor_id == colleague.id,
+                  f"supervisor {'updated' if moved.supervisor_id == colleague.id else 'stale'}")
+            await db.rollback()
+
+        transport = httpx.ASGITransport(app=fastapi_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+            def headers(u):
+                return {"Authorization": f"Bearer {create_access_token(u.id)}"}
+
+            listed = {}
+            for u in users:
+                body = (await client.get("/api/v1/theses/", headers=headers(u), params={"limit": 1000})).json()
+                listed[u.id] = {row["id"] for row in body} & {row.id for row in theses}
+            async with SessionLocal() as db:
+                expected = {
+                    u.id: set((await db.scalars(select(Thesis.id).where(
+                        Thesis.id.in_([row.id for row in theses]), listed_for(Principal(u.id, u.role, True))
+                    ))).all())
+                    for u in users
+                }
+            check("listed_for selects what GET /theses/ lists",
+                  listed == expected and listed[owner.id] == {thesis.id} and listed[colleague.id] == set()
+                  and len(listed[assistant.id]) == 2, ", ".join(str(len(ids)) for ids in listed.values()))
+
+            base = f"/api/v1/theses/{thesis.id}"
+            wide = []
+            for path in (f"{base}/comments", f"{base}/attachments", f"{base}/committee", f"/api/v1/events/{defense.id}"):
+                statements.clear()
+                response = await client.get(path, headers=headers(owner))
+                if response.status_code != 200 or any("thesis.abstract" in s for s in statements):
+                    wide.append(f"{path.rsplit('/', 1)[1]} HTTP {response.status_code}")
+                elif path.endswith("/committee") and [row["thesis"]["id"] for row in response.json()] != [thesis.id]:
+                    wide.append("committee without its thesis")
+            statements.clear()
+            response = await client.post(base + "/comments", headers=headers(owner), json={
+                "content": "Access check", "thesis_id": thesis.id, "user_id": owner.id,
+            })
+            if response.status_code != 200 or any("thesis.abstract" in s for s in statements):
+                wide.append(f"POST /comments HTTP {response.status_code}")
+            check("endpoints check access without the full row", not wide, ", ".join(wide))
+
+            codes = [
+                (await client.get(base + "/attachments", headers=headers(other))).status_code,
+                (await client.get(f"/api/v1/theses/{uid()}/attachments", headers=headers(owner))).status_code,
+                (await client.get(base + "/committee", headers=headers(professor))).status_code,
+            ]
+            check("other student 403, unknown 404, professor 200", codes == [403, 404, 200], f"HTTP {codes}")
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+        timings = {}
+        for label, lookup in [
+            ("full row", lambda db: db.get(Thesis, thesis.id)),
+            ("projection", lambda db: get_thesis_access(db, thesis.id)),
+        ]:
+            started = time.perf_counter()
+            for _ in range(TIMED_LOOKUPS):
+                async with SessionLocal() as db:
+                    await lookup(db)
+            timings[label] = (time.perf_counter() - started) / TIMED_LOOKUPS * 1000
+        print(f"     per lookup with a {len(abstract) // 1000} kB abstract: "
+              + ", ".join(f"{label} {ms:.2f} ms" for label, ms in timings.items()))
+    finally:
+        if event.contains(engine.sync_engine, "before_cursor_execute", record):
+            event.remove(engine.sync_engine, "before_cursor_execute", record)
+        async with SessionLocal() as db:
+            await db.execute(delete(ThesisComment).where(ThesisComment.thesis_id.in_([row.id for row in theses])))
+            await db.execute(delete(ThesisCommitteeMember).where(ThesisCommitteeMember.id == member.id))
+            await db.execute(delete(Event).where(Event.id == defense.id))
+            await db.execute(delete(Thesis).where(Thesis.id.in_([row.id for row in theses])))
+            await db.execute(delete(User).where(User.id.in_([u.id for u in users])))
+            await db.commit()
+        await engine.dispose()
+    return check.failures
+
+
+def main() -> None:
+    exit_with(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+User search check.
+
+Creates a few users with names and emails made up for the run and checks
+GET /users/search against them: matches on any part of the name or email
+regardless of case, names starting with the input first, the role filter,
+that inactive users are left out, that LIKE wildcards in the input match
+literally, the result limit and minimum input length, the lean projection
+and the Cache-Control header.
+
+    python -m scripts.check_user_search
+"""
+import uuid
+from datetime import datetime
+
+import httpx
+from sqlalchemy import delete
+
+from app.api.v1.endpoints.users import MAX_SEARCH_RESULTS, SEARCH_CACHE_SECONDS
+from app.core.security import create_access_token
+from app.db.session import SessionLocal, engine
+from app.main import app as fastapi_app
+from app.models import User, UserRole
+from scripts.checks import Checks, exit_with, uid
+
+
+async def run() -> int:
+    tag, batch = uuid.uuid4().hex[:8], uuid.uuid4().hex[:8]
+    now = datetime.utcnow()
+
+    def user(full_name, role=UserRole.student, is_active=True, email=None):
+        return User(id=uid(), email=email or f"search-{uid()}@example.com", full_name=full_name,
+                    role=role, is_active=is_active, created_at=now)
+
+    # The tag goes inside the names, so only a substring search finds them
+    starts = user(f"{tag}ова Мария", UserRole.professor)
+    inside = user(f"Анна Петрова{tag}", UserRole.graduation_assistant)
+    student = user(f"Иван Стоянов{tag}")
+    inactive = user(f"Бивш {tag}", UserRole.professor, is_active=False)
+    by_email = user("Без име", UserRole.professor, email=f"lecturer.{tag}@example.com")
+    wildcard = user(f"Percent 50%_{tag}")
+    many = [user(f"Many {batch} {n:02d}") for n in range(MAX_SEARCH_RESULTS + 5)]
+    users = [starts, inside, student, inactive, by_email, wildcard] + many
+    async with SessionLocal() as db:
+        db.add_all(users)
+        await db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(student.id)}"}
+
+    check = Checks()
+
+    transport = httpx.ASGITransport(app=fastapi_app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+            async def search(q, **params):
+                response = await client.get("/api/v1/users/search", headers=headers, params={"q": q, **params})
+                body = response.json()
+                return response, [user["id"] for user in body] if response.status_code == 200 else body
+
+            response, found = await search(tag.upper())
+            check("matches inside names, ignoring case",
+                  response.status_code == 200 and set(found) == {starts.id, inside.id, student.id, by_email.id, wildcard.id},
+                  f"HTTP {response.status_code}, {len(found)} result(s)")
+            check("names starting with the input come first", found[:1] == [starts.id], f"{found[:1]}")
+            check("inactive users are left out", inactive.id not in found)
+            check("results are the lean projection",
+                  set(response.json()[0]) == {"id", "email", "full_name", "role", "profile_picture", "student_count"},
+                  ", ".join(response.json()[0]))
+            check("responses may be cached briefly",
+                  response.headers.get("cache-control") == f"private, max-age={SEARCH_CACHE_SECONDS}",
+                  response.headers.get("cache-control", ""))
+
+            _, found = await search(f"lecturer.{tag}")
+            check("matches emails", found == [by_email.id], f"{len(found)} result(s)")
+            _, found = await search(tag, role=["professor", "graduation_assistant"])
+            check("role filter takes several roles", set(found) == {starts.id, inside.id, by_email.id},
+                  f"{len(found)} result(s)")
+            _, found = await search("50%_")
+            check("wildcards in the input match literally", found == [wildcard.id], f"{len(found)} result(s)")
+            _, found = await search(batch, limit=MAX_SEARCH_RESULTS)
+            check("limit caps the results", len(found) == MAX_SEARCH_RESULTS, f"{len(found)} result(s)")
+
+            statuses = [(await search(q, **params))[0].status_code
+                        for q, params in [("ab", {}), (tag, {"limit": MAX_SEARCH_RESULTS + 1})]]
+            check("short input or large limit -> 422", statuses == [422, 422], f"HTTP {statuses}")
+            response = await client.get("/api/v1/users/search", params={"q": tag})
+            check("anonymous -> 401", response.status_code == 401, f"HTTP {response.status_code}")
+    finally:
+        async with SessionLocal() as db:
+            await db.execute(delete(User).where(User.id.in_([user.id for user in users])))
+            await db.commit()
+        await engine.dispose()
+    return check.failures
+
+
+def main() -> None:
+    exit_with(run())
+
+
+if __name__ == "__main__":
+    main()
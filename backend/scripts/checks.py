@@ -0,0 +1,33 @@
+"""
+Shared harness for the check_* scripts.
+
+Each check seeds its own rows, exercises the code under test in-process,
+prints one ok/FAIL line per expectation and removes the rows again. They
+run against the configured database, so only point them at a development
+database.
+"""
+import asyncio
+import sys
+import uuid
+from typing import Awaitable
+
+
+def uid() -> str:
+    return str(uuid.uuid4())
+
+
+class Checks:
+    """Print one line per expectation and count the ones that failed."""
+
+    def __init__(self, width: int = 46):
+        self.width = width
+        self.failures = 0
+
+    def __call__(self, label: str, ok: bool, detail: str = "") -> None:
+        self.failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {label:<{self.width}} {detail}")
+
+
+def exit_with(run: Awaitable[int]) -> None:
+    """Run a check and exit non-zero when any of its expectations failed."""
+    sys.exit(1 if asyncio.run(run) else 0)
@@ -0,0 +1,39 @@
+"""
+Queue every attachment missing from the similarity or search index for
+processing.
+
+Attachments uploaded before an index existed are not in it, so they are
+neither checked nor found. This queues a processing job for each of them;
+the running server's workers extract the text and index it.
+
+    python -m scripts.reindex_attachments
+"""
+import asyncio
+
+from sqlalchemy import or_, select
+
+from app.core.processing import queue_processing
+from app.db.session import SessionLocal, engine
+from app.models import AttachmentText, SimilaritySignature, ThesisAttachment
+
+
+async def run() -> int:
+    async with SessionLocal() as db:
+        missing = (await db.scalars(
+            select(ThesisAttachment.id)
+            .outerjoin(SimilaritySignature, SimilaritySignature.attachment_id == ThesisAttachment.id)
+            .outerjoin(AttachmentText, AttachmentText.attachment_id == ThesisAttachment.id)
+            .where(
+                or_(SimilaritySignature.attachment_id.is_(None), AttachmentText.attachment_id.is_(None)),
+                ThesisAttachment.blob_sha256.is_not(None),
+            )
+        )).all()
+        for attachment_id in missing:
+            await queue_processing(db, attachment_id)
+        await db.commit()
+    await engine.dispose()
+    return len(missing)
+
+
+if __name__ == "__main__":
+    print(f"Queued {asyncio.run(run())} attachment(s) for indexing")
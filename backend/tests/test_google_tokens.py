@@ -0,0 +1,211 @@
+"""
+Google ID token verification against a JWKS stand-in.
+
+The key set is served through an httpx mock transport and the cache reads
+a fake monotonic clock, so max-age expiry, the background refresh and the
+refetch after a key rotation run without waiting or touching the network.
+"""
+import asyncio
+import time
+import uuid
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from authlib.jose import JsonWebKey, jwt
+from sqlalchemy import delete
+
+from app.core import google_tokens
+from app.core.config import settings
+from app.core.google_tokens import CachedKeySet, InvalidIdToken, verify_google_id_token
+from app.main import app as fastapi_app
+from app.models import User
+
+pytestmark = pytest.mark.anyio
+
+CLIENT_ID = "test-client.apps.googleusercontent.com"
+MAX_AGE = 600
+
+
+def new_key(kid: str):
+    return JsonWebKey.generate_key("RSA", 2048, is_private=True, options={"kid": kid, "alg": "RS256"})
+
+
+def id_token(key, email: str = "student@example.com", **overrides) -> str:
+    now = int(time.time())
+    claims = {
+        "iss": "https://accounts.google.com", "aud": CLIENT_ID, "sub": email,
+        "email": email, "name": "Test User", "iat": now, "exp": now + 600,
+    }
+    claims.update(overrides)
+    return jwt.encode({"alg": "RS256", "kid": key.kid}, claims, key).decode()
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class KeyServer:
+    """Serves `keys` the way Google's certs endpoint does."""
+
+    def __init__(self, *keys):
+        self.keys = list(keys)
+        self.max_age = MAX_AGE
+        self.requests = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        headers = {}
+        if self.max_age is not None:
+            headers["Cache-Control"] = f"public, max-age={self.max_age}, must-revalidate"
+        body = {"keys": [key.as_dict(is_private=False) for key in self.keys]}
+        return httpx.Response(200, json=body, headers=headers)
+
+
+@pytest.fixture(scope="module")
+def signing_key():
+    return new_key("key-1")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(google_tokens, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+@pytest.fixture
+async def server(monkeypatch, signing_key):
+    server = KeyServer(signing_key)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(server)) as client:
+        monkeypatch.setattr(google_tokens, "get_http_client", lambda: client)
+        yield server
+
+
+@pytest.fixture
+def keys(monkeypatch, server, clock):
+    keys = CachedKeySet("https://keys.test/certs")
+    monkeypatch.setattr(google_tokens, "google_keys", keys)
+    monkeypatch.setattr(settings, "GOOGLE_CLIENT_ID", CLIENT_ID)
+    return keys
+
+
+async def test_valid_token(keys, signing_key):
+    claims = await verify_google_id_token(id_token(signing_key, "valid@example.com"))
+
+    assert claims["email"] == "valid@example.com"
+    assert keys.fetches == 1
+
+
+async def test_concurrent_callers_share_one_fetch(keys, server, signing_key):
+    await asyncio.gather(*(verify_google_id_token(id_token(signing_key)) for _ in range(20)))
+
+    assert server.requests == 1
+
+
+async def test_key_set_is_reused_until_max_age(keys, clock, signing_key):
+    await keys.get()
+    clock.now += MAX_AGE - google_tokens.REFRESH_AHEAD_SECONDS - 1
+    await keys.get()
+    assert keys.fetches == 1
+
+    clock.now += google_tokens.REFRESH_AHEAD_SECONDS + 1
+    await keys.get()
+    assert keys.fetches == 2
+
+
+async def test_expired_key_set_drops_retired_keys(keys, server, clock, signing_key):
+    token = id_token(signing_key)
+    await verify_google_id_token(token)
+
+    server.keys = [new_key("key-2")]
+    clock.now += MAX_AGE
+    with pytest.raises(InvalidIdToken):
+        await verify_google_id_token(token)
+    assert keys.fetches == 2
+
+
+async def test_refreshes_ahead_of_max_age_in_background(keys, server, clock, signing_key):
+    first = await keys.get()
+    rotated = new_key("key-2")
+    server.keys = [signing_key, rotated]
+    clock.now += MAX_AGE - google_tokens.REFRESH_AHEAD_SECONDS + 1
+
+    # The caller gets the current keys at once while the refresh runs
+    assert await keys.get() is first
+    await keys._refresh
+    assert keys.fetches == 2
+    assert (await keys.get()).find_by_kid(rotated.kid)
+
+
+async def test_missing_max_age_uses_default(keys, server, clock):
+    server.max_age = None
+    await keys.get()
+
+    clock.now += google_tokens.DEFAULT_MAX_AGE_SECONDS - google_tokens.REFRESH_AHEAD_SECONDS - 1
+    await keys.get()
+    assert keys.fetches == 1
+    clock.now += google_tokens.REFRESH_AHEAD_SECONDS + 1
+    await keys.get()
+    assert keys.fetches == 2
+
+
+async def test_refetches_after_key_rotation(keys, server, clock, signing_key):
+    await verify_google_id_token(id_token(signing_key))
+    rotated = new_key("key-2")
+    server.keys = [signing_key, rotated]
+    clock.now += google_tokens.MIN_REFETCH_INTERVAL_SECONDS
+
+    claims = await verify_google_id_token(id_token(rotated, "rotated@example.com"))
+
+    assert claims["email"] == "rotated@example.com"
+    assert keys.fetches == 2
+
+
+async def test_unknown_key_refetch_is_rate_limited(keys, server, signing_key):
+    await verify_google_id_token(id_token(signing_key))
+    server.keys = [signing_key, new_key("key-2")]
+
+    with pytest.raises(InvalidIdToken):
+        await verify_google_id_token(id_token(server.keys[1]))
+    assert keys.fetches == 1
+
+
+@pytest.mark.parametrize("label", [
+    "another key", "wrong audience", "wrong issuer", "expired", "HS256", "garbage",
+])
+async def test_rejects(keys, signing_key, label):
+    token = {
+        # Same key id as the real key, different key material
+        "another key": lambda: id_token(new_key(signing_key.kid)),
+        "wrong audience": lambda: id_token(signing_key, aud="someone-else"),
+        "wrong issuer": lambda: id_token(signing_key, iss="https://evil.example.com"),
+        "expired": lambda: id_token(signing_key, exp=int(time.time()) - 60),
+        "HS256": lambda: jwt.encode({"alg": "HS256"}, {"aud": CLIENT_ID}, b"secret").decode(),
+        "garbage": lambda: "not-a-token",
+    }[label]()
+
+    with pytest.raises(InvalidIdToken):
+        await verify_google_id_token(token)
+
+
+async def test_google_sign_in(database, keys, signing_key):
+    email = f"google-{uuid.uuid4()}@example.com"
+    transport = httpx.ASGITransport(app=fastapi_app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            signed_in = await client.post("/api/v1/auth/google", json={"token": id_token(signing_key, email)})
+            forged = await client.post(
+                "/api/v1/auth/google", json={"token": id_token(new_key(signing_key.kid), email)}
+            )
+    finally:
+        async with database.begin() as connection:
+            await connection.execute(delete(User).where(User.email == email))
+
+    assert signed_in.status_code == 200
+    assert signed_in.json()["access_token"]
+    assert forged.status_code == 401
@@ -0,0 +1,40 @@
+import random
+
+from app.core import minhash
+
+
+def test_short_text_fingerprint(tmp_path):
+    # One shingle fills one bin; the others sit up to NUM_PERM - 1 bins away
+    path = tmp_path / "page.txt"
+    path.write_text("The quick brown fox jumps", encoding="utf-8")
+
+    fingerprint = minhash.fingerprint_files([path])
+
+    assert fingerprint.shingle_count == 1
+    assert len(fingerprint.buckets) == minhash.BANDS
+    values = minhash.unpack_signature(fingerprint.signature)
+    assert len(values) == minhash.NUM_PERM
+    assert all(value < 1 << 64 for value in values)
+
+
+def test_few_shingles_pack_into_64_bits():
+    rng = random.Random(1)
+    for _ in range(2000):
+        hashes = {rng.getrandbits(64) for _ in range(rng.randint(1, 12))}
+        values = minhash.signature(hashes)
+        assert minhash.unpack_signature(minhash.pack_signature(values)) == values
+
+
+def test_identical_short_texts_match():
+    hashes = minhash.shingle_hashes(["one two three four five six seven"])
+
+    assert minhash.estimate_similarity(minhash.signature(hashes), minhash.signature(set(hashes))) == 1.0
+
+
+def test_empty_text_has_no_buckets(tmp_path):
+    path = tmp_path / "empty.txt"
+    path.write_text("too short", encoding="utf-8")
+
+    fingerprint = minhash.fingerprint_files([path])
+
+    assert fingerprint.shingle_count == 0 and fingerprint.buckets == []
@@ -0,0 +1,161 @@
+"""
+Statement budgets for endpoints that serialize nested relationships.
+
+A page of theses with comments, attachments, committee members and assistant
+requests is seeded and each endpoint is called in-process while every engine
+the session router can return counts its statements. An N+1 regression shows
+up as a count above the budget, which is fixed while the seeded page is large.
+"""
+import uuid
+from datetime import datetime
+
+import httpx
+import pytest
+from sqlalchemy import delete, event
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db import session as db_session
+from app.db.session import SessionLocal
+from app.main import app as fastapi_app
+from app.models import (
+    AssistantRequest,
+    CommitteeMemberRole,
+    RequestStatus,
+    Thesis,
+    ThesisAttachment,
+    ThesisComment,
+    ThesisCommitteeMember,
+    ThesisStatus,
+    User,
+    UserRole,
+)
+
+pytestmark = pytest.mark.anyio
+
+THESES = 50
+
+# (path template, caller, max statements including authentication)
+BUDGETS = {
+    "GET /theses/all": ("/api/v1/theses/all?limit=100", "professor", 6),
+    "GET /theses/{id}": ("/api/v1/theses/{thesis_id}", "professor", 6),
+    "GET /theses/{id}/comments": ("/api/v1/theses/{thesis_id}/comments", "professor", 3),
+    "GET /assistant/requests/": ("/api/v1/assistant/requests/?limit=100", "assistant", 2),
+    "GET /assistant/requests/{id}": ("/api/v1/assistant/requests/{request_id}", "assistant", 2),
+    "GET /users/": ("/api/v1/users/?limit=100", "professor", 2),
+    "GET /users/?summary=true": ("/api/v1/users/?limit=100&summary=true", "professor", 2),
+    "GET /users/{id}": ("/api/v1/users/{assistant}", "professor", 2),
+}
+
+
+def _uid() -> str:
+    return str(uuid.uuid4())
+
+
+@pytest.fixture(scope="module")
+async def seeded(database):
+    now = datetime.utcnow()
+    professor = User(id=_uid(), email=f"qc-prof-{_uid()}@example.com", full_name="QC Professor",
+                     role=UserRole.professor, is_active=True)
+    assistant = User(id=_uid(), email=f"qc-assistant-{_uid()}@example.com", full_name="QC Assistant",
+                     role=UserRole.graduation_assistant, is_active=True)
+    students = [
+        User(id=_uid(), email=f"qc-student-{_uid()}@example.com", full_name=f"QC Student {i}",
+             role=UserRole.student, is_active=True)
+        for i in range(THESES)
+    ]
+    rows = [professor, assistant, *students]
+    thesis_ids, request_ids = [], []
+    for student in students:
+        thesis = Thesis(id=_uid(), title=f"QC thesis {student.full_name}", abstract="QC",
+                        status=ThesisStatus.submitted, student_id=student.id,
+                        supervisor_id=professor.id, created_at=now, updated_at=now)
+        thesis_ids.append(thesis.id)
+        reply = ThesisComment(id=_uid(), content="Reply", thesis_id=thesis.id, user_id=student.id)
+        root = ThesisComment(id=_uid(), content="Root", thesis_id=thesis.id, user_id=professor.id,
+                             replies=[reply])
+        rows += [
+            thesis, root,
+            ThesisAttachment(id=_uid(), filename="qc.pdf", file_path="qc/qc.pdf",
+                             file_type="application/pdf", file_size=1, thesis_id=thesis.id,
+                             uploaded_by=student.id),
+            ThesisCommitteeMember(id=_uid(), role=CommitteeMemberRole.chair, thesis_id=thesis.id,
+                                  user_id=assistant.id),
+            AssistantRequest(id=_uid(), student_id=student.id, assistant_id=assistant.id,
+                             thesis_id=thesis.id, status=RequestStatus.requested),
+        ]
+        request_ids.append(rows[-1].id)
+    async with SessionLocal() as db:
+        db.add_all(rows)
+        await db.commit()
+
+    yield {
+        "professor": professor.id,
+        "assistant": assistant.id,
+        "thesis_id": thesis_ids[0],
+        "request_id": request_ids[0],
+    }
+
+    user_ids = [u.id for u in (professor, assistant, *students)]
+    async with SessionLocal() as db:
+        for model in (AssistantRequest, ThesisCommitteeMember, ThesisAttachment):
+            await db.execute(delete(model).where(model.thesis_id.in_(thesis_ids)))
+        await db.execute(delete(ThesisComment).where(
+            ThesisComment.thesis_id.in_(thesis_ids), ThesisComment.parent_id.is_not(None)
+        ))
+        await db.execute(delete(ThesisComment).where(ThesisComment.thesis_id.in_(thesis_ids)))
+        await db.execute(delete(Thesis).where(Thesis.id.in_(thesis_ids)))
+        await db.execute(delete(User).where(User.id.in_(user_ids)))
+        await db.commit()
+
+
+@pytest.fixture(scope="module", params=["primary", "replica"])
+async def routing(request, database):
+    """
+    Run every budget once on the primary alone and once with a replica, which
+    serves the GET requests. Without REPLICA_DATABASE_URI a second engine on
+    the primary database stands in for it.
+    """
+    configured = db_session.replica_engine
+    stand_in = None
+    if request.param == "primary":
+        db_session.replica_engine = None
+    elif configured is None:
+        stand_in = db_session.replica_engine = create_async_engine(settings.ASYNC_DATABASE_URI)
+    yield request.param
+    db_session.replica_engine = configured
+    if stand_in is not None:
+        await stand_in.dispose()
+
+
+@pytest.fixture
+def statements(routing):
+    """Count statements on every engine the router can return."""
+    executed = []
+
+    def count(*_):
+        executed.append(1)
+
+    engines = [db_session.engine, db_session.replica_engine]
+    engines = [e.sync_engine for e in engines if e is not None]
+    for sync_engine in engines:
+        event.listen(sync_engine, "before_cursor_execute", count)
+    yield executed
+    for sync_engine in engines:
+        event.remove(sync_engine, "before_cursor_execute", count)
+
+
+@pytest.mark.parametrize("label", BUDGETS)
+async def test_statement_budget(label, seeded, statements):
+    path, caller, budget = BUDGETS[label]
+    token = create_access_token(seeded[caller])
+    transport = httpx.ASGITransport(app=fastapi_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        statements.clear()
+        response = await client.get(
+            path.format(**seeded), headers={"Authorization": f"Bearer {token}"}
+        )
+
+    assert response.status_code == 200
+    assert 0 < len(statements) <= budget
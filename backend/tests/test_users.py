@@ -0,0 +1,53 @@
+import uuid
+
+import httpx
+import pytest
+from sqlalchemy import delete, func, select
+
+from app.api.v1.endpoints.users import MAX_PAGE_SIZE
+from app.core.security import create_access_token
+from app.db.session import SessionLocal
+from app.main import app as fastapi_app
+from app.models import User, UserRole
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def client(database):
+    user = User(id=str(uuid.uuid4()), email=f"users-{uuid.uuid4()}@example.com", full_name="Users Test",
+                role=UserRole.professor, is_active=True)
+    async with SessionLocal() as db:
+        db.add(user)
+        await db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(user.id)}"}
+    transport = httpx.ASGITransport(app=fastapi_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", headers=headers) as client:
+        yield client
+    async with SessionLocal() as db:
+        await db.execute(delete(User).where(User.id == user.id))
+        await db.commit()
+
+
+@pytest.mark.parametrize("params", [{"limit": 0}, {"limit": MAX_PAGE_SIZE + 1}, {"skip": -1}])
+async def test_list_rejects_out_of_range_paging(client, params):
+    response = await client.get("/api/v1/users/", params=params)
+
+    assert response.status_code == 422
+
+
+async def test_cursor_pages_cover_every_user(client):
+    async with SessionLocal() as db:
+        total = await db.scalar(select(func.count()).select_from(User))
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, "summary": True, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/api/v1/users/", params=params)
+        assert response.status_code == 200
+        seen += [user["id"] for user in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+
+    assert len(seen) == len(set(seen)) == total
@@ -135,11 +135,12 @@ const AllThesesList = () => {
   const handleOpenReviewerModal = async (thesisId: string) => {
     try {
       setSelectedThesisForReviewer(thesisId);
-      const users = await getUsers();
-      // Filter for professors and graduation assistants only
-      const reviewers = users.filter(user => 
-        user.role === 'professor' || user.role === 'graduation_assistant'
-      );
+      // Only professors and graduation assistants can review
+      const [professors, assistants] = await Promise.all([
+        getUsers('professor'),
+        getUsers('graduation_assistant')
+      ]);
+      const reviewers = [...professors, ...assistants];
               setAvailableReviewers(reviewers as any);
       setReviewerModalOpen(true);
     } catch (error) {
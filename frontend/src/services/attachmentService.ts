@@ -1,5 +1,5 @@
 import api from './api';
-import { Attachment, PreviewData } from '../types';
+import { Attachment, PreviewData, PreviewPages, SimilarityReport } from '../types';
 
 export const getAttachments = async (thesisId: string): Promise<Attachment[]> => {
   const response = await api.get(`/theses/${thesisId}/attachments`);
@@ -78,6 +78,29 @@ export const getAttachmentPreview = async (
   return response.data;
 };
 
+export const getAttachmentPages = async (
+  thesisId: string,
+  attachmentId: string,
+  start = 1,
+  count = 10
+): Promise<PreviewPages> => {
+  const response = await api.get(`/theses/${thesisId}/attachments/${attachmentId}/pages`, {
+    params: { start, count },
+  });
+  return response.data;
+};
+
+export const getAttachmentSimilarity = async (
+  thesisId: string,
+  attachmentId: string,
+  limit = 5
+): Promise<SimilarityReport> => {
+  const response = await api.get(`/theses/${thesisId}/attachments/${attachmentId}/similarity`, {
+    params: { limit },
+  });
+  return response.data;
+};
+
 export const getDownloadUrl = (thesisId: string, attachmentId: string, inline = false): string => {
   return `/api/v1/theses/${thesisId}/attachments/${attachmentId}/download${inline ? '?inline=true' : ''}`;
 }; 
\ No newline at end of file
@@ -1,5 +1,5 @@
 import api from './api';
-import { Thesis, ThesisWithRelations, ThesisStatus, ReviewCreate, ReviewRead, ErrorResponse } from '../types';
+import { Thesis, ThesisSearchResult, ThesisWithRelations, ThesisStatus, ReviewCreate, ReviewRead, ErrorResponse } from '../types';
 import { AxiosError } from 'axios';
 
 export const getTheses = async (supervisorId?: string): Promise<Thesis[]> => {
@@ -14,6 +14,19 @@ export const getTheses = async (supervisorId?: string): Promise<Thesis[]> => {
   }
 };
 
+export const searchTheses = async (
+  query: string,
+  cursor?: string
+): Promise<{ results: ThesisSearchResult[]; nextCursor: string | null }> => {
+  try {
+    const response = await api.get('/theses/search', { params: { q: query, cursor } });
+    return { results: response.data, nextCursor: response.headers['x-next-cursor'] ?? null };
+  } catch (error) {
+    console.error('Error searching theses:', error);
+    throw error;
+  }
+};
+
 export const getAllThesesForProfessors = async (): Promise<ThesisWithRelations[]> => {
   try {
     const response = await api.get('/theses/all');
@@ -1,14 +1,30 @@
 import api from './api';
 import { GraduationAssistant, UserSimple, User } from '../types';
 
+// Largest page the user directory serves (MAX_PAGE_SIZE in the backend)
+const USERS_PAGE_SIZE = 200;
+
+/**
+ * Fetch every page of the user directory, following the X-Next-Cursor
+ * header until the last page
+ */
+const getAllUsers = async <T>(params: Record<string, string | boolean>): Promise<T[]> => {
+  const users: T[] = [];
+  let cursor: string | undefined;
+  do {
+    const response = await api.get('/users/', { params: { ...params, cursor, limit: USERS_PAGE_SIZE } });
+    users.push(...response.data);
+    cursor = response.headers['x-next-cursor'] ?? undefined;
+  } while (cursor);
+  return users;
+};
+
 /**
- * Fetch users with optional role filter
+ * Fetch users with optional role filter, in the lean summary form
  */
 export const getUsers = async (role?: string): Promise<UserSimple[]> => {
   try {
-    const params = role ? { role } : {};
-    const response = await api.get('/users/', { params });
-    return response.data;
+    return await getAllUsers<UserSimple>(role ? { role, summary: true } : { summary: true });
   } catch (error) {
     console.error('Error fetching users:', error);
     throw error;
@@ -20,10 +36,7 @@ export const getUsers = async (role?: string): Promise<UserSimple[]> => {
  */
 export const getGraduationAssistants = async (): Promise<GraduationAssistant[]> => {
   try {
-    const response = await api.get('/users/', { 
-      params: { role: 'graduation_assistant' } 
-    });
-    return response.data;
+    return await getAllUsers<GraduationAssistant>({ role: 'graduation_assistant' });
   } catch (error) {
     console.error('Error fetching graduation assistants:', error);
     throw error;
@@ -36,19 +49,40 @@ export const getGraduationAssistants = async (): Promise<GraduationAssistant[]>
 export const getThesisSupervisors = async (): Promise<GraduationAssistant[]> => {
   try {
     // Fetch both graduation assistants and professors
-    const [assistantsResponse, professorsResponse] = await Promise.all([
-      api.get('/users/', { params: { role: 'graduation_assistant' } }),
-      api.get('/users/', { params: { role: 'professor' } })
+    const [assistants, professors] = await Promise.all([
+      getAllUsers<GraduationAssistant>({ role: 'graduation_assistant' }),
+      getAllUsers<GraduationAssistant>({ role: 'professor' })
     ]);
     
     // Combine both arrays and return
-    return [...assistantsResponse.data, ...professorsResponse.data];
+    return [...assistants, ...professors];
   } catch (error) {
     console.error('Error fetching thesis supervisors:', error);
     throw error;
   }
 };
 
+/**
+ * Find active users whose name or email contains the query (at least 3
+ * characters), for typeahead pickers
+ */
+export const searchUsers = async (
+  query: string,
+  roles: string[] = [],
+  limit = 10
+): Promise<UserSimple[]> => {
+  try {
+    const response = await api.get('/users/search', {
+      params: { q: query, role: roles, limit },
+      paramsSerializer: { indexes: null },
+    });
+    return response.data;
+  } catch (error) {
+    console.error('Error searching users:', error);
+    throw error;
+  }
+};
+
 /**
  * Get user by ID
  */
@@ -56,6 +56,16 @@ export interface Thesis {
   updated_at: string;
 }
 
+// Highlights are HTML: the text escaped, with the matched words in <mark>
+export interface ThesisSearchResult extends Thesis {
+  rank: number;
+  title_highlight: string;
+  abstract_highlight: string | null;
+  content_highlight: string | null;
+  attachment_id: string | null;
+  attachment_filename: string | null;
+}
+
 export interface ThesisWithRelations extends Thesis {
   student: User;
   supervisor: User | null;
@@ -90,11 +100,33 @@ export interface PreviewData {
   content_type: string;
   content: string | null;
   html: string | null;
+  page_count?: number | null; // PDFs only; text comes from getAttachmentPages
   filename: string;
   file_size: number;
   description: string | null;
 }
 
+export interface PreviewPages {
+  page_count: number;
+  pages: { number: number; text: string }[];
+}
+
+export interface SimilarityMatch {
+  attachment_id: string;
+  filename: string;
+  thesis_id: string;
+  thesis_title: string;
+  similarity: number;
+  overlap: number;
+  passages: { text: string; source_text: string; word_count: number }[];
+}
+
+export interface SimilarityReport {
+  attachment_id: string;
+  shingle_count: number;
+  matches: SimilarityMatch[];
+}
+
 // Comment related types
 export interface CommentBase {
   id: string;